@@ -3,14 +3,44 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import joblib
 from pathlib import Path
 import json
+import os
 from datetime import datetime, timedelta
 import warnings
 import time
 import textwrap
+import tempfile
+import threading
+import uuid
+
+from nexus.batch import DEFAULT_CHUNK_ROWS, score_file
+from nexus.cube import CUBE_COLUMNS, SalesCube
+from nexus.downsample import CHART_WIDTH_PX, SCATTER_MAX_POINTS, density_grid, downsample
+from nexus.elasticity import ELASTICITY_COLUMNS, ELASTICITY_DIMENSIONS, WATERFALL_STEPS, ElasticityModel, waterfall
+from nexus.export import EXPORT_FORMATS, available_formats, export_name, export_reader
+from nexus.features import ENCODED_COLUMNS, REQUIRED_COLUMNS
+from nexus.figures import cached_form, figure_title
+from nexus.forecast import FORECASTER_LOADERS, PRETRAINED_FORECASTERS, DailyForecaster
+from nexus.frame import compact_frame, load_compact_sales, read_footprint
+from nexus.index import FILTER_DIMENSIONS, RANGE_DIMENSIONS, FilteredView, FilterIndex
+from nexus.ingest import Ingestor, LiveCube
+from nexus.model_cache import ModelCache, filter_fingerprint, fingerprint
+from nexus.moments import MomentCube
+from nexus.profiling import PROFILE_LOG_ENV, PROFILE_LOG_PATH, ProfileLog, RerunProfiler, profiling_enabled, summary_rows
+from nexus.registry import ModelRegistry
+from nexus.report import (CHART_CACHE_DIR, CHART_CACHE_MB, MATPLOTLIB_AVAILABLE, batch_reports, batch_values,
+                          build_report, report_name, zip_reports)
+from nexus.sampling import MIN_SAMPLE_ROWS, StratifiedSample, stratum_keys
+from nexus.simulation import DISTRIBUTIONS, histogram, segment_bands, segment_totals, simulate, summarize
+from nexus.sketches import SketchCube
+from nexus.store import CSV_PATH, STORE_PATH, data_version, store_files
+from nexus.synthetic import iter_cleaned_sales
+from nexus.topk import top_k, top_k_view
+from nexus.training import best_model_name, load_comparison
 
 # ML Imports
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
@@ -32,6 +62,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Instrumentation du rerun (NEXUS_PROFILE=1 ou ?profile=1) : inactive, elle ne mesure rien
+if 'profile_session' not in st.session_state:
+    st.session_state['profile_session'] = uuid.uuid4().hex
+profiler = RerunProfiler(profiling_enabled(st.query_params.get('profile')), session=st.session_state['profile_session'])
+
 # -----------------------------------------------------------------------------
 # 2. MOTEUR DE STYLE CSS (DESIGN SYSTEM)
 # -----------------------------------------------------------------------------
@@ -207,122 +242,200 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 
 @st.cache_data
-def generate_dummy_data():
-    """Génère des données si aucun fichier n'est trouvé pour la démo"""
-    dates = pd.date_range(start="2023-01-01", end="2023-12-31", freq="D")
-    regions = ['North America', 'Europe', 'Asia Pacific', 'Latin America']
-    categories = ['Electronics', 'Furniture', 'Office Supplies', 'Software']
-    
-    data = []
-    for date in dates:
-        n_transactions = np.random.randint(5, 15)
-        for _ in range(n_transactions):
-            price = np.random.uniform(50, 2000)
-            qty = np.random.randint(1, 10)
-            discount = np.random.choice([0, 0.05, 0.1, 0.2], p=[0.6, 0.2, 0.15, 0.05])
-            
-            data.append({
-                'Sale_Date': date,
-                'Region': np.random.choice(regions),
-                'Product_Category': np.random.choice(categories),
-                'Sales_Amount': price * qty * (1 - discount),
-                'Quantity_Sold': qty,
-                'Unit_Price': price,
-                'Discount': discount,
-                'Profit': (price * qty * (1 - discount)) * np.random.uniform(0.1, 0.4), # Profit ~10-40%
-                'Sales_Rep': f"Rep_{np.random.randint(1, 20)}"
-            })
-    
-    df = pd.DataFrame(data)
-    df['Region_and_Sales_Rep'] = df['Region'] + " - " + df['Sales_Rep']
-    return df
+def generate_dummy_data(n_rows=3650):
+    """Génère des données si aucun fichier n'est trouvé pour la démo (générateur vectorisé, nettoyées comme dans le notebook)"""
+    return pd.concat(list(iter_cleaned_sales(n_rows, start="2023-01-01", end="2023-12-31", seed=42)),
+                     ignore_index=True)
 
-@st.cache_data
-def load_data():
-    """Charge les données réelles ou génère des fausses"""
-    data_path = Path('output/data/cleaned_sales_data.csv')
-    if data_path.exists():
+# Colonnes lues par page (projection sur le store Parquet). None = toutes les colonnes,
+# [] = page servie uniquement par le cube d'agrégats (aucune transaction chargée).
+PAGE_COLUMNS = {
+    "Accueil": [],
+    "Tableau de Bord": [],
+    "Analyse Détaillée": None,
+    "Géographie & Segments": [],
+    "Simulateur IA": [],
+    "Machine Learning": None,
+    "Rapports & Données": None,
+}
+
+def page_columns(nav_label):
+    """Retourne les colonnes nécessaires à la page sélectionnée"""
+    for page, columns in PAGE_COLUMNS.items():
+        if page in nav_label:
+            return columns
+    return None
+
+@st.cache_resource(max_entries=8)
+def load_data(columns=None, version=None):
+    """
+    Charge les données réelles ou génère des fausses.
+    Le frame est compact (catégorielles, float32) et mappé en mémoire : partagé entre
+    sessions et workers, il ne doit pas être modifié en place.
+    `version` (data_version) ne sert qu'à la clé du cache : rechargement après une ingestion.
+    """
+    if CSV_PATH.exists() or STORE_PATH.exists():
         try:
-            df = pd.read_csv(data_path, parse_dates=['Sale_Date'])
-            return df
+            return load_compact_sales(columns)
         except Exception as e:
             st.warning(f"Erreur chargement fichier: {e}. Utilisation données démo.")
-            return generate_dummy_data()
+            df = generate_dummy_data()
     else:
         # Si pas de fichier, on génère silencieusement des données pour la démo
-        return generate_dummy_data()
+        df = generate_dummy_data()
+    df = compact_frame(df)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
 
-# Chargement initial
-df = load_data()
+@st.cache_resource(max_entries=2)
+def load_filter_index(version=None):
+    """Construit l'index de filtrage (bitmaps par valeur, dates triées), une fois par version des données"""
+    return FilterIndex(load_data(FILTER_DIMENSIONS + RANGE_DIMENSIONS, version))
 
-# Calculs globaux pour réutilisation
-total_sales = df['Sales_Amount'].sum()
-total_Profit = df['Profit'].sum()
-avg_margin = (total_Profit / total_sales) * 100
-current_date = df['Sale_Date'].max()
+def load_store_snapshot(columns=None):
+    """
+    Ventes et liste des fichiers du store qu'elles couvrent exactement (None hors store).
+    La liste est relevée avant le chargement et vérifiée après : un fichier ingéré entre-temps
+    serait sinon compté comme déjà agrégé (perdu) ou agrégé deux fois ; on recharge alors.
+    """
+    while True:
+        files = store_files() if STORE_PATH.exists() else None
+        df = load_data(columns, None if files is None else data_version())
+        if files is None or store_files() == files:
+            return df, files
 
-@st.cache_data
-def prepare_ml_data(df_input):
-    """Prépare les données pour le ML comme dans le notebook"""
-    df_ml = df_input.copy()
-    
-    # Features temporelles
-    df_ml['Year'] = df_ml['Sale_Date'].dt.year
-    df_ml['Month'] = df_ml['Sale_Date'].dt.month
-    df_ml['Day'] = df_ml['Sale_Date'].dt.day
-    df_ml['DayOfWeek'] = df_ml['Sale_Date'].dt.dayofweek
-    df_ml['DayOfYear'] = df_ml['Sale_Date'].dt.dayofyear
-    df_ml['Week'] = df_ml['Sale_Date'].dt.isocalendar().week
-    
-    # Encodage
-    categorical_cols = ['Region', 'Sales_Rep', 'Product_Category', 'Customer_Type', 'Payment_Method', 'Sales_Channel', 'Region_and_Sales_Rep']
-    encoders = {}
-    for col in categorical_cols:
-        le = LabelEncoder()
-        df_ml[f"{col}_encoded"] = le.fit_transform(df_ml[col].astype(str))
-        encoders[col] = le
-        
-    # Features selection
-    numerical_features = [
-        'Quantity_Sold', 'Unit_Cost', 'Unit_Price', 'Discount',
-        'Year', 'Month', 'Day', 'DayOfWeek', 'DayOfYear', 'Week',
-        'Total_Cost', 'Profit', 'Profit_Margin'
-    ]
-    encoded_features = [f"{col}_encoded" for col in categorical_cols]
-    
-    features = numerical_features + encoded_features
-    
-    # Clean NaN/Inf
-    X = df_ml[features].replace([np.inf, -np.inf], np.nan).fillna(0)
-    y = df_ml['Sales_Amount']
-    
-    return X, y, features, encoders, df_ml
+@st.cache_resource
+def load_sales_cube():
+    """
+    Construit une seule fois le cube d'agrégats (jour × dimensions de vente).
+    Les fichiers ajoutés ensuite au store par l'ingestion y sont intégrés par delta (`refresh`).
+    """
+    df, files = load_store_snapshot(CUBE_COLUMNS)
+    return LiveCube(SalesCube.build(df), files)
 
-@st.cache_data
-def get_encoders_from_data(df):
-    """Crée les encodeurs à partir des données pour la prédiction"""
-    encoders = {}
-    categorical_cols = ['Region', 'Product_Category', 'Customer_Type', 'Payment_Method', 'Sales_Channel']
-    
-    for col in categorical_cols:
-        if col in df.columns:
-            le = LabelEncoder()
-            le.fit(df[col].astype(str))
-            encoders[col] = le
-    
-    return encoders
+@st.cache_resource
+def load_moment_cube():
+    """
+    Statistiques suffisantes de la matrice de corrélation (nombre, sommes, produits croisés par
+    cellule jour × filtres), construites une seule fois puis complétées par delta comme le cube.
+    """
+    df, files = load_store_snapshot()
+    cube = MomentCube.build(df)
+    return LiveCube(cube, files, columns=cube.source_columns)
+
+@st.cache_resource
+def load_sketch_cube():
+    """
+    Sketches de quantiles des distributions (prix unitaire, profit) par cellule jour × filtres,
+    construits une seule fois puis complétés par delta comme le cube.
+    """
+    df, files = load_store_snapshot()
+    cube = SketchCube.build(df)
+    return LiveCube(cube, files, columns=cube.source_columns)
+
+@st.cache_resource
+def load_sample():
+    """
+    Échantillon stratifié Région × Catégorie du mode rapide, tiré une seule fois ; les fichiers
+    ajoutés au store y entrent par réservoir (`refresh`), sans retirer l'échantillon.
+    """
+    df, files = load_store_snapshot()
+    return LiveCube(StratifiedSample.build(df), files, columns=None)
+
+@st.cache_resource
+def start_ingest_watcher():
+    """Surveillance du dossier de dépôt dans un thread du serveur (NEXUS_INGEST_WATCH=1)"""
+    interval = float(os.environ.get('NEXUS_INGEST_INTERVAL', '5'))
+    watcher = threading.Thread(target=Ingestor().watch, args=(interval,), daemon=True, name='nexus-ingest')
+    watcher.start()
+    return watcher
+
+@st.cache_resource(max_entries=4)
+def load_elasticity_model(selections, date_range, version=None):
+    """Tableaux groupés du simulateur par segment pour un état des filtres (transactions filtrées)"""
+    data = load_data(ELASTICITY_COLUMNS, version)
+    rows = load_filter_index(version).select(selections, ranges={'Sale_Date': date_range})
+    return ElasticityModel.build(FilteredView(data, rows))
+
+@st.cache_resource
+def get_forecast_cache():
+    """Cache des modèles de prévision, partagé par toutes les sessions (LRU borné en mémoire)"""
+    # NEXUS_FORECAST_CACHE_DIR vide = pas de persistance disque
+    persist_dir = os.environ.get('NEXUS_FORECAST_CACHE_DIR', 'output/models/forecast_cache')
+    max_mb = int(os.environ.get('NEXUS_FORECAST_CACHE_MB', '256'))
+    return ModelCache(max_bytes=max_mb * 1024**2, persist_dir=persist_dir or None)
+
+@st.cache_resource
+def get_report_cache():
+    """Images des graphiques des rapports, par (graphique, empreinte des filtres), persistées sur disque"""
+    return ModelCache(max_bytes=CHART_CACHE_MB * 1024**2, persist_dir=CHART_CACHE_DIR)
+
+@st.cache_resource
+def get_report_jobs():
+    """Rapports PDF générés en arrière-plan (un seul à la fois), conservés pour le téléchargement"""
+    return ModelCache(max_bytes=128 * 1024**2)
+
+@st.cache_resource
+def get_figure_cache():
+    """Figures validées (tableaux compacts), partagées par les sessions, LRU bornée en octets"""
+    return ModelCache(max_bytes=int(os.environ.get('NEXUS_FIGURE_CACHE_MB', '128')) * 1024**2)
+
+def cached_figure(chart_id, build, *parts):
+    """
+    Figure `chart_id` pour l'état courant des filtres et des données (et les paramètres `parts`) :
+    `build()` n'est appelé que si elle est absente du cache ; un objet Figure n'est pas revalidé
+    par st.plotly_chart, qui ne fait plus que le sérialiser.
+    """
+    def create():
+        with profiler.stage(f"build:{chart_id}", 'chart'):
+            return cached_form(build())
+    return get_figure_cache().get_or_create(fingerprint(chart_id, filter_key, current_version, *parts), create)
+
+@st.cache_resource
+def get_model_registry():
+    """Registre des modèles de output/models, partagé par toutes les sessions du processus"""
+    registry = ModelRegistry(loaders=FORECASTER_LOADERS)
+    # NEXUS_PRELOAD_MODELS=1 : chargement en arrière-plan dès le premier affichage
+    if os.environ.get('NEXUS_PRELOAD_MODELS', '').lower() in ('1', 'true', 'yes'):
+        registry.preload()
+    return registry
+
+def load_forecaster(name):
+    """Modèle de prévision pré-entraîné servi par le registre -> (modèle, erreur)"""
+    try:
+        return get_model_registry().get(PRETRAINED_FORECASTERS[name]), None
+    except Exception as e:
+        return None, str(e)
+
+@st.cache_resource
+def get_profile_log():
+    """Historique des reruns instrumentés, partagé par les sessions (NEXUS_PROFILE_LOG= vide : pas de fichier)"""
+    return ProfileLog(os.environ.get(PROFILE_LOG_ENV, str(PROFILE_LOG_PATH)) or None)
+
+def load_feature_pipeline(registry):
+    """
+    Pipeline de features sauvegardé par le notebook avec le modèle. Sans lui, les prédictions
+    n'utiliseraient ni les médianes ni les ventes cumulées de l'entraînement : pas de repli.
+    """
+    if 'feature_pipeline' not in registry:
+        raise FileNotFoundError(f"{registry.path('feature_pipeline')} introuvable : exécutez la section "
+                                "« Sauvegarde du meilleur modèle » du notebook")
+    return registry.get('feature_pipeline')
 
 # -----------------------------------------------------------------------------
 # 4. COMPOSANTS UI RÉUTILISABLES
 # -----------------------------------------------------------------------------
 
-def card_metric(title, value, delta=None, prefix="", suffix="", color="text-dark"):
-    """Affiche une carte métrique stylisée"""
+def card_metric(title, value, delta=None, prefix="", suffix="", color="text-dark", interval=None):
+    """Affiche une carte métrique stylisée (`interval` : demi-largeur de l'IC d'une valeur estimée)"""
     delta_html = ""
     if delta is not None:
         delta_cls = "delta-pos" if delta >= 0 else "delta-neg"
         icon = "▲" if delta >= 0 else "▼"
         delta_html = f'<span class="metric-delta {delta_cls}">{icon} {abs(delta)}%</span>'
+    if interval is not None:
+        delta_html += f'<span style="font-size: 12px; color: #7F8C8D;">± {interval}{suffix} (IC 95 %)</span>'
     
     st.markdown(f"""
     <div class="nexus-card animate-fade-in">
@@ -337,6 +450,16 @@ def card_metric(title, value, delta=None, prefix="", suffix="", color="text-dark
     </div>
     """, unsafe_allow_html=True)
 
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart instrumenté : sérialisation (taille envoyée) et rendu mesurés"""
+    if not profiler.enabled:
+        return st.plotly_chart(fig, **kwargs)
+    with profiler.stage(f"chart:{figure_title(fig)}", 'chart') as record:
+        start = time.perf_counter()
+        record['payload_kb'] = len(pio.to_json(fig, validate=False)) / 1024
+        record['serialize_ms'] = (time.perf_counter() - start) * 1000
+        return st.plotly_chart(fig, **kwargs)
+
 def card_chart_wrapper(title, chart_func, height=300):
     """Enveloppe un graphique Plotly dans le style 'Card'"""
     st.markdown(f"""<div class="nexus-card animate-fade-in">
@@ -377,12 +500,58 @@ with st.sidebar:
     )
     
     st.markdown("---")
-    
+
+# Chargement des colonnes utiles à la page courante (aucune pour les pages servies par le cube)
+nav_columns = page_columns(nav_selection)
+if os.environ.get('NEXUS_INGEST_WATCH', '').lower() in ('1', 'true', 'yes'):
+    start_ingest_watcher()
+# Version des données (fichiers du store) : change à chaque ingestion
+current_version = data_version()
+profiler.page = nav_selection
+with profiler.stage('load_data', 'data', columns=len(nav_columns) if nav_columns else None):
+    df = load_data(nav_columns, current_version) if nav_columns != [] else None
+with profiler.stage('load_sales_cube', 'data'):
+    sales_cube = load_sales_cube().refresh()
+model_registry = get_model_registry()
+
+# Calculs globaux pour réutilisation
+cube_all = sales_cube.select()
+total_sales = cube_all.total('Sales_Amount')
+total_Profit = cube_all.total('Profit')
+avg_margin = (total_Profit / total_sales) * 100
+current_date = sales_cube.cells['Sale_Date'].max()
+
+with st.sidebar:
     # Sidebar Widgets
     st.markdown("<p style='font-size:12px; text-transform:uppercase; letter-spacing:1px; color:#95A5A6; margin-bottom:10px;'>Filtres Rapides</p>", unsafe_allow_html=True)
     
-    selected_region = st.multiselect("Régions", options=df['Region'].unique(), default=df['Region'].unique())
-    selected_cat = st.multiselect("Catégories", options=df['Product_Category'].unique(), default=df['Product_Category'].unique())
+    with profiler.stage('load_filter_index', 'data'):
+        filter_index = load_filter_index(current_version)
+    filter_labels = {
+        'Region': "Régions",
+        'Product_Category': "Catégories",
+        'Sales_Channel': "Canaux de vente",
+        'Customer_Type': "Types de clients",
+    }
+    selections = {}
+    for dim in filter_index.dimensions:
+        options = filter_index.values(dim)
+        selections[dim] = st.multiselect(filter_labels.get(dim, dim), options=options, default=options)
+    selected_region = selections['Region']
+    selected_cat = selections['Product_Category']
+
+    date_min, date_max = filter_index.bounds('Sale_Date')
+    date_min, date_max = pd.Timestamp(date_min).date(), pd.Timestamp(date_max).date()
+    selected_dates = st.date_input("Période", value=(date_min, date_max), min_value=date_min, max_value=date_max)
+    if len(selected_dates) == 2:
+        date_range = (pd.Timestamp(selected_dates[0]), pd.Timestamp(selected_dates[1]) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1))
+    else:
+        date_range = (pd.Timestamp(date_min), pd.Timestamp(date_max) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1))
+    
+    approx_mode = st.toggle("⚡ Mode rapide", value=False,
+                            help="Analyse Détaillée : nuage de points et moyennes estimés sur un "
+                                 "échantillon stratifié (Région × Catégorie), avec intervalles de confiance. "
+                                 "Les indicateurs issus du cube restent exacts.")
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -397,8 +566,14 @@ with st.sidebar:
         </div>
     """, unsafe_allow_html=True)
 
-# Filtrage des données
-df_filtered = df[df['Region'].isin(selected_region) & df['Product_Category'].isin(selected_cat)]
+# Filtrage des données : intersection des bitmaps, vue légère sans copie du DataFrame
+date_ranges = {'Sale_Date': date_range}
+with profiler.stage('filter', 'data'):
+    cube_filtered = sales_cube.select(selections, ranges=date_ranges)
+    # Identifie l'état des filtres pour le cache des figures
+    filter_key = filter_fingerprint(selections, date_range)
+    if df is not None:
+        filtered_view = FilteredView(df, filter_index.select(selections, ranges=date_ranges))
 
 # -----------------------------------------------------------------------------
 # 6. CONTENU DES PAGES
@@ -418,10 +593,13 @@ st.markdown(f"""
     </div>
 """, unsafe_allow_html=True)
 
-if df_filtered.empty:
+if cube_filtered.empty:
     st.error("Aucune donnée ne correspond aux filtres sélectionnés.")
     st.stop()
 
+# Agrégations et graphiques de la page, mesurés comme une seule étape englobante
+page_stage = profiler.begin(f"page:{nav_selection.split(' ', 1)[-1]}", 'page')
+
 # =============================================================================
 # PAGE 0: ACCUEIL
 # =============================================================================
@@ -524,7 +702,7 @@ if "Accueil" in nav_selection:
                 <h3 style="color: #2C3E50; margin-bottom: 15px; font-size: 18px; font-weight: 500;">Export & Rapports</h3>
                 <p style="color: #7F8C8D; line-height: 1.7; font-size: 14px;">
                     Génération de rapports personnalisés et export des données filtrées. 
-                    Formats CSV et Excel pour intégration externe.
+                    Formats CSV, Parquet et Excel pour intégration externe.
                 </p>
             </div>
         """, unsafe_allow_html=True)
@@ -555,36 +733,39 @@ elif "Tableau de Bord" in nav_selection:
     
     # Calculs dynamiques (comparaison vs période précédente simulée)
     with col1:
-        card_metric("Chiffre d'Affaires", f"{df_filtered['Sales_Amount'].sum()/1000:,.1f}k", 12.5, prefix="$")
+        card_metric("Chiffre d'Affaires", f"{cube_filtered.total('Sales_Amount')/1000:,.1f}k", 12.5, prefix="$")
     with col2:
-        card_metric("Commandes", f"{len(df_filtered):,}", -2.4)
+        card_metric("Commandes", f"{cube_filtered.count:,}", -2.4)
     with col3:
-        Profit = df_filtered['Profit'].sum()
-        margin = (Profit / df_filtered['Sales_Amount'].sum()) * 100
+        Profit = cube_filtered.total('Profit')
+        margin = (Profit / cube_filtered.total('Sales_Amount')) * 100
         card_metric("Marge Nette", f"{margin:.1f}", 5.3, suffix="%")
     with col4:
-        avg_basket = df_filtered['Sales_Amount'].mean()
+        avg_basket = cube_filtered.mean('Sales_Amount')
         card_metric("Panier Moyen", f"{avg_basket:.0f}", 0.8, prefix="$")
     
     # --- Ligne 2: Graphique Principal + Top Produits ---
     col_main, col_side = st.columns([2, 1])
     
     with col_main:
-        def plot_sales_trend(height):
-            daily = df_filtered.groupby('Sale_Date')[['Sales_Amount', 'Profit']].sum().reset_index()
+        def build_sales_trend(height):
+            daily = cube_filtered.rollup('Sale_Date', ['Sales_Amount', 'Profit'])
             daily['MA7'] = daily['Sales_Amount'].rolling(7).mean()
+            # Séries décimées à la largeur de la carte (2/3 de la page)
+            sales_points = downsample(daily, 'Sale_Date', 'Sales_Amount', width_px=CHART_WIDTH_PX * 2 // 3)
+            profit_points = downsample(daily, 'Sale_Date', 'Profit', width_px=CHART_WIDTH_PX * 2 // 3)
             
             fig = go.Figure()
             # Zone de fond (Sales)
             fig.add_trace(go.Scatter(
-                x=daily['Sale_Date'], y=daily['Sales_Amount'],
+                x=sales_points['Sale_Date'], y=sales_points['Sales_Amount'],
                 mode='lines', fill='tozeroy', name='Ventes',
                 line=dict(color='#3498DB', width=1),
                 fillcolor='rgba(52, 152, 219, 0.1)'
             ))
             # Ligne de tendance (Profit)
             fig.add_trace(go.Scatter(
-                x=daily['Sale_Date'], y=daily['Profit'],
+                x=profit_points['Sale_Date'], y=profit_points['Profit'],
                 mode='lines', name='Profit',
                 line=dict(color='#2ECC71', width=2)
             ))
@@ -597,13 +778,15 @@ elif "Tableau de Bord" in nav_selection:
                 legend=dict(orientation="h", y=1.1),
                 height=height
             )
-            st.plotly_chart(fig, use_container_width=True)
+            return fig
             
-        card_chart_wrapper("Évolution Ventes & Profit (YTD)", plot_sales_trend, height=380)
+        card_chart_wrapper("Évolution Ventes & Profit (YTD)",
+                           lambda height: plotly_chart(cached_figure('sales_trend', lambda: build_sales_trend(height), height),
+                                                       use_container_width=True), height=380)
 
     with col_side:
         # Liste stylisée des meilleures catégories
-        cat_perf = df_filtered.groupby('Product_Category')['Sales_Amount'].sum().sort_values(ascending=False)
+        cat_perf = cube_filtered.rollup('Product_Category', ['Sales_Amount']).set_index('Product_Category')['Sales_Amount'].sort_values(ascending=False)
         max_val = cat_perf.max()
         
         html_content = textwrap.dedent(f"""
@@ -634,19 +817,22 @@ elif "Tableau de Bord" in nav_selection:
     c1, c2 = st.columns(2)
     
     with c1:
-        def plot_donut(height):
-            fig = px.pie(df_filtered, names='Region', values='Sales_Amount', hole=0.6,
+        def build_donut(height):
+            fig = px.pie(cube_filtered.rollup('Region', ['Sales_Amount']), names='Region', values='Sales_Amount', hole=0.6,
                          color_discrete_sequence=px.colors.qualitative.Prism)
             fig.update_layout(showlegend=True, margin=dict(l=20, r=0, t=0, b=0), height=height)
             fig.update_traces(textinfo='percent+label', textposition='inside')
-            st.plotly_chart(fig, use_container_width=True)
-        card_chart_wrapper("Répartition Géographique", plot_donut, height=300)
+            return fig
+        card_chart_wrapper("Répartition Géographique",
+                           lambda height: plotly_chart(cached_figure('donut', lambda: build_donut(height), height),
+                                                       use_container_width=True), height=300)
         
     with c2:
-        def plot_bar_stack(height):
+        def build_bar_stack(height):
             # Top 5 Sales Reps
-            top_reps = df_filtered.groupby('Region_and_Sales_Rep')['Sales_Amount'].sum().nlargest(5).index
-            df_top = df_filtered[df_filtered['Region_and_Sales_Rep'].isin(top_reps)]
+            rep_mix = cube_filtered.rollup(['Region_and_Sales_Rep', 'Product_Category'], ['Sales_Amount'])
+            top_reps = top_k(rep_mix['Region_and_Sales_Rep'], rep_mix['Sales_Amount'], 5).labels
+            df_top = rep_mix[rep_mix['Region_and_Sales_Rep'].isin(top_reps)]
             
             fig = px.bar(df_top, x='Region_and_Sales_Rep', y='Sales_Amount', color='Product_Category',
                          color_discrete_sequence=px.colors.qualitative.Pastel)
@@ -655,36 +841,104 @@ elif "Tableau de Bord" in nav_selection:
                 margin=dict(l=0, r=0, t=0, b=0), height=height, showlegend=False,
                 xaxis_title=""
             )
-            st.plotly_chart(fig, use_container_width=True)
-        card_chart_wrapper("Top 5 Vendeurs par Mix Produit", plot_bar_stack, height=300)
+            return fig
+        card_chart_wrapper("Top 5 Vendeurs par Mix Produit",
+                           lambda height: plotly_chart(cached_figure('bar_stack', lambda: build_bar_stack(height), height),
+                                                       use_container_width=True), height=300)
 
 # =============================================================================
 # PAGE 2: ANALYSE DÉTAILLÉE (DEEP DIVE)
 # =============================================================================
 elif "Analyse Détaillée" in nav_selection:
     
+    # Mode rapide : ventes de l'échantillon stratifié retenues par les filtres, effectifs exacts des strates lus dans le cube
+    sample_slice = None
+    if approx_mode:
+        with profiler.stage('sample', 'data'):
+            strata_counts = cube_filtered.rollup(['Region', 'Product_Category'], ['Sales_Amount'])
+            population = pd.Series(strata_counts['count'].to_numpy(), index=stratum_keys(strata_counts))
+            sample_slice = load_sample().refresh().select(selections, ranges=date_ranges, population=population)
+        if sample_slice.complete or len(sample_slice) < MIN_SAMPLE_ROWS:
+            # Sélection petite (ou entièrement échantillonnée) : le calcul exact est immédiat ou plus sûr
+            sample_slice = None
+    
+    # Moyennes des mesures absentes du cube : exactes (statistiques suffisantes) ou estimées avec IC
+    kpi_measures = [("Prix Unitaire Moyen", 'Unit_Price', "$", "", 1), ("Coût Unitaire Moyen", 'Unit_Cost', "$", "", 1),
+                    ("Remise Moyenne", 'Discount', "", "%", 100)]
+    kpi_cols = st.columns(len(kpi_measures))
+    if sample_slice is None:
+        kpi_means = load_moment_cube().refresh().select(selections, ranges=date_ranges).mean()
+    for col, (title, measure, prefix, suffix, scale) in zip(kpi_cols, kpi_measures):
+        with col:
+            if sample_slice is None:
+                card_metric(title, f"{kpi_means[measure] * scale:,.1f}", prefix=prefix, suffix=suffix)
+            else:
+                estimate, half_width = sample_slice.mean(measure)
+                card_metric(title, f"{estimate * scale:,.1f}", prefix=prefix, suffix=suffix, interval=f"{half_width * scale:,.2f}")
+    if sample_slice is not None:
+        st.caption(f"⚡ Mode rapide : estimations sur {len(sample_slice):,} ventes échantillonnées parmi {sample_slice.size:,.0f} "
+                   f"({sample_slice.fraction:.1%}). Désactivez le mode rapide dans la barre latérale pour le calcul exact.")
+    
     tabs = st.tabs(["📊 Distributions", "🌡️ Corrélations", "📅 Saisonnalité"])
+    # Mesures proposées pour le nuage de points (lues dans la vue filtrée seulement si la figure manque au cache)
+    numeric_cols = filtered_view.df.select_dtypes(include=[np.number]).columns.tolist()
+    approx = sample_slice is not None
+    
+    def sketch_cube():
+        with profiler.stage('load_sketch_cube', 'data'):
+            return load_sketch_cube().refresh()
+    
+    def build_price_histogram(height):
+        # Histogramme issu des sketches des cellules sélectionnées : trente barres, quel que soit le nombre de ventes
+        edges, counts = sketch_cube().select('Unit_Price', selections, ranges=date_ranges).histogram()
+        fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), marker_color='#3498DB'))
+        fig.update_layout(height=height, bargap=0, xaxis_title="Unit_Price", yaxis_title="count",
+                          paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        return fig
+    
+    def build_profit_box(height):
+        # Boîtes précalculées (quartiles, moustaches) et valeurs atypiques plafonnées, une par catégorie
+        cube = sketch_cube()
+        colors = px.colors.qualitative.Plotly
+        fig = go.Figure()
+        for i, category in enumerate(selected_cat):
+            stats = cube.select('Profit', {**selections, 'Product_Category': [category]}, ranges=date_ranges).box()
+            if np.isnan(stats['median']):
+                continue
+            color = colors[i % len(colors)]
+            fig.add_trace(go.Box(x=[category], q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+                                 lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']],
+                                 name=category, marker_color=color, boxpoints=False))
+            if len(stats['outliers']):
+                fig.add_trace(go.Scatter(x=[category] * len(stats['outliers']), y=stats['outliers'], mode='markers',
+                                         marker=dict(color=color, size=5), name=category, showlegend=False))
+        fig.update_layout(height=height, xaxis_title="Product_Category", yaxis_title="Profit",
+                          paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        return fig
     
     with tabs[0]:
         col1, col2 = st.columns(2)
         with col1:
             card_chart_wrapper("Distribution des Prix Unitaires", 
-                               lambda height: st.plotly_chart(px.histogram(df_filtered, x="Unit_Price", nbins=30, color_discrete_sequence=['#3498DB']).update_layout(height=height, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'), use_container_width=True))
+                               lambda height: plotly_chart(cached_figure('price_histogram', lambda: build_price_histogram(height), height), use_container_width=True))
         with col2:
             card_chart_wrapper("Distribution des Profits", 
-                               lambda height: st.plotly_chart(px.box(df_filtered, x="Product_Category", y="Profit", color="Product_Category").update_layout(height=height, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'), use_container_width=True))
+                               lambda height: plotly_chart(cached_figure('profit_box', lambda: build_profit_box(height), height), use_container_width=True))
     
     with tabs[1]:
         # Heatmap de corrélation
         st.markdown('<div class="nexus-card">', unsafe_allow_html=True)
         st.markdown('<div class="card-title">Matrice de Corrélation</div>', unsafe_allow_html=True)
         
-        numeric_cols = df_filtered.select_dtypes(include=[np.number]).columns.tolist()
-        corr = df_filtered[numeric_cols].corr()
-        
-        fig = px.imshow(corr, text_auto=True, aspect="auto", color_continuous_scale="RdBu_r")
-        fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        def build_correlation():
+            # Somme des statistiques des cellules sélectionnées : aucune transaction relue
+            with profiler.stage('load_moment_cube', 'data'):
+                moment_cube = load_moment_cube().refresh()
+            corr = moment_cube.select(selections, ranges=date_ranges).correlation()
+            fig = px.imshow(corr, text_auto=True, aspect="auto", color_continuous_scale="RdBu_r")
+            fig.update_layout(height=500)
+            return fig
+        plotly_chart(cached_figure('correlation', build_correlation), use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Scatter Plot interactif
@@ -693,25 +947,46 @@ elif "Analyse Détaillée" in nav_selection:
         with col_y: y_axis = st.selectbox("Axe Y", numeric_cols, index=4) # Profit default
         with col_c: color_var = st.selectbox("Couleur", ['Region', 'Product_Category'])
         
-        fig = px.scatter(df_filtered, x=x_axis, y=y_axis, color=color_var, size='Quantity_Sold', 
-                         hover_data=['Region_and_Sales_Rep'], template="plotly_white")
-        st.plotly_chart(fig, use_container_width=True)
+        if sample_slice is None and len(filtered_view) > SCATTER_MAX_POINTS:
+            # Trop de points pour le navigateur : grille de densité calculée côté serveur
+            def build_density():
+                x_centers, y_centers, counts = density_grid(filtered_view[x_axis], filtered_view[y_axis])
+                fig = go.Figure(go.Heatmap(x=x_centers, y=y_centers, z=counts, colorscale='Blues',
+                                           colorbar=dict(title="Ventes")))
+                fig.update_layout(xaxis_title=x_axis, yaxis_title=y_axis, template="plotly_white")
+                return fig
+            plotly_chart(cached_figure('density', build_density, x_axis, y_axis), use_container_width=True)
+            st.caption(f"Densité de {len(filtered_view):,} ventes (au-delà de {SCATTER_MAX_POINTS:,} points, le nuage est agrégé par cellule).")
+        else:
+            def build_scatter():
+                scatter_columns = [x_axis, y_axis, color_var, 'Quantity_Sold', 'Region_and_Sales_Rep']
+                if sample_slice is None:
+                    scatter_df = filtered_view.frame(scatter_columns)
+                else:
+                    # Mode rapide : nuage de SCATTER_MAX_POINTS ventes représentatives de la sélection
+                    scatter_df = sample_slice.frame(scatter_columns, n=min(SCATTER_MAX_POINTS, len(sample_slice)))
+                return px.scatter(scatter_df, x=x_axis, y=y_axis, color=color_var, size='Quantity_Sold', 
+                                  hover_data=['Region_and_Sales_Rep'], template="plotly_white")
+            plotly_chart(cached_figure('scatter', build_scatter, x_axis, y_axis, color_var, approx), use_container_width=True)
 
     with tabs[2]:
-        # Analyse temporelle (Heatmap calendrier)
-        df_filtered['Month'] = df_filtered['Sale_Date'].dt.month_name()
-        df_filtered['Day'] = df_filtered['Sale_Date'].dt.day_name()
-        
-        pivot_hm = df_filtered.pivot_table(index='Day', columns='Month', values='Sales_Amount', aggfunc='sum').fillna(0)
-        # Ordonner les jours
-        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        pivot_hm = pivot_hm.reindex(days_order)
+        def build_seasonality():
+            # Analyse temporelle (Heatmap calendrier), à partir des totaux journaliers du cube
+            daily_hm = cube_filtered.rollup('Sale_Date', ['Sales_Amount'])
+            daily_hm['Month'] = daily_hm['Sale_Date'].dt.month_name()
+            daily_hm['Day'] = daily_hm['Sale_Date'].dt.day_name()
+            
+            pivot_hm = daily_hm.pivot_table(index='Day', columns='Month', values='Sales_Amount', aggfunc='sum').fillna(0)
+            # Ordonner les jours
+            days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+            pivot_hm = pivot_hm.reindex(days_order)
+            fig = px.imshow(pivot_hm, labels=dict(x="Mois", y="Jour", color="Ventes"), color_continuous_scale="Viridis")
+            fig.update_layout(height=400)
+            return fig
         
         st.markdown('<div class="nexus-card">', unsafe_allow_html=True)
         st.markdown('<div class="card-title">Intensité des Ventes: Jour vs Mois</div>', unsafe_allow_html=True)
-        fig = px.imshow(pivot_hm, labels=dict(x="Mois", y="Jour", color="Ventes"), color_continuous_scale="Viridis")
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(cached_figure('seasonality', build_seasonality), use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
 # =============================================================================
@@ -724,38 +999,62 @@ elif "Géographie & Segments" in nav_selection:
     with col1:
         st.subheader("Analyse Pareto (Loi des 80/20)")
         st.caption("Identifiez les produits qui génèrent 80% de votre chiffre d'affaires.")
+        pareto_labels = {'Region_and_Sales_Rep': "Vendeurs", 'Product_ID': "Produits"}
+        pareto_dim = st.radio("Dimension", list(pareto_labels), format_func=pareto_labels.get, horizontal=True)
         
-        # Préparation Pareto
-        pareto_df = df_filtered.groupby('Region_and_Sales_Rep')['Sales_Amount'].sum().sort_values(ascending=False).reset_index()
-        pareto_df['Cumulative_Sales'] = pareto_df['Sales_Amount'].cumsum()
-        pareto_df['Cumulative_Pct'] = pareto_df['Cumulative_Sales'] / pareto_df['Sales_Amount'].sum() * 100
-        
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        def pareto_top():
+            """Top des entités (nombre de barres borné) et seuil des 80 %"""
+            if pareto_dim == 'Product_ID':
+                # Dimension absente du cube : totaux par produit sur les transactions sélectionnées
+                products = load_data(['Product_ID', 'Sales_Amount'], current_version)
+                view = FilteredView(products, filter_index.select(selections, ranges=date_ranges))
+                return top_k_view(view, 'Product_ID', 'Sales_Amount')
+            sellers = cube_filtered.rollup(pareto_dim, ['Sales_Amount'])
+            return top_k(sellers[pareto_dim], sellers['Sales_Amount'])
         
-        fig.add_trace(go.Bar(x=pareto_df['Region_and_Sales_Rep'], y=pareto_df['Sales_Amount'], name="Ventes", marker_color="#3498DB"), secondary_y=False)
-        fig.add_trace(go.Scatter(x=pareto_df['Region_and_Sales_Rep'], y=pareto_df['Cumulative_Pct'], name="Cumul %", marker_color="#E74C3C", mode="lines"), secondary_y=True)
-        
-        fig.update_layout(height=500, title_text="Pareto des Vendeurs")
-        fig.update_yaxes(title_text="Montant (€)", secondary_y=False)
-        fig.update_yaxes(title_text="Cumul (%)", secondary_y=True, range=[0, 110])
+        def build_pareto():
+            top = pareto_top()
+            pareto_df = top.frame(pareto_dim)
+            colors = ["#3498DB" if rank < top.cutoff_rank else "#AED6F1" for rank in range(len(top.labels))]
+            colors += ["#BDC3C7"] * (len(pareto_df) - len(top.labels))
+            
+            fig = make_subplots(specs=[[{"secondary_y": True}]])
+            
+            fig.add_trace(go.Bar(x=pareto_df[pareto_dim], y=pareto_df['Sales_Amount'], name="Ventes", marker_color=colors), secondary_y=False)
+            fig.add_trace(go.Scatter(x=pareto_df[pareto_dim], y=pareto_df['Cumulative_Pct'], name="Cumul %", marker_color="#E74C3C", mode="lines"), secondary_y=True)
+            fig.add_hline(y=top.share * 100, line_dash="dash", line_color="#7F8C8D", secondary_y=True)
+            
+            # Résumé approché (Space-Saving) : rang estimé, nombre total d'entités inconnu
+            cutoff = f"{top.cutoff_rank:,}" + (f" sur {top.n_entities:,}" if top.n_entities is not None else "")
+            fig.update_layout(height=500, title_text=f"Pareto des {pareto_labels[pareto_dim]} : {'' if top.exact else '≈ '}{cutoff} font {top.share:.0%} des ventes")
+            fig.update_xaxes(type='category')
+            fig.update_yaxes(title_text="Montant (€)", secondary_y=False)
+            fig.update_yaxes(title_text="Cumul (%)", secondary_y=True, range=[0, 110])
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(cached_figure('pareto', build_pareto, pareto_dim), use_container_width=True)
         
     with col2:
         st.subheader("Treemap des Catégories")
         st.caption("Vue hiérarchique Région > Catégorie")
         
-        fig_tree = px.treemap(df_filtered, path=['Region', 'Product_Category'], values='Sales_Amount',
-                              color='Profit', color_continuous_scale='RdBu')
-        fig_tree.update_layout(height=500)
-        st.plotly_chart(fig_tree, use_container_width=True)
+        def build_treemap():
+            fig_tree = px.treemap(cube_filtered.rollup(['Region', 'Product_Category'], ['Sales_Amount', 'Profit']),
+                                  path=['Region', 'Product_Category'], values='Sales_Amount',
+                                  color='Profit', color_continuous_scale='RdBu')
+            fig_tree.update_layout(height=500)
+            return fig_tree
+        plotly_chart(cached_figure('treemap', build_treemap), use_container_width=True)
         
     # Sunburst Chart
     st.markdown("---")
     st.subheader("Vue Radiale des Ventes")
-    fig_sun = px.sunburst(df_filtered, path=['Region', 'Product_Category', 'Region_and_Sales_Rep'], values='Sales_Amount', color='Profit')
-    fig_sun.update_layout(height=600)
-    st.plotly_chart(fig_sun, use_container_width=True)
+    def build_sunburst():
+        sun_df = cube_filtered.rollup(['Region', 'Product_Category', 'Region_and_Sales_Rep'], ['Sales_Amount', 'Profit'])
+        fig_sun = px.sunburst(sun_df, path=['Region', 'Product_Category', 'Region_and_Sales_Rep'], values='Sales_Amount', color='Profit')
+        fig_sun.update_layout(height=600)
+        return fig_sun
+    plotly_chart(cached_figure('sunburst', build_sunburst), use_container_width=True)
 
 # =============================================================================
 # PAGE 4: SIMULATEUR AVANCÉ (WHAT-IF)
@@ -771,6 +1070,11 @@ elif "Simulateur IA" in nav_selection:
     col_params, col_res = st.columns([1, 2])
     
     with col_params:
+        sim_mode = st.radio("Mode", ["Déterministe", "Monte Carlo", "Par segment"], horizontal=True,
+                            help="Monte Carlo : milliers de scénarios tirés autour des valeurs choisies, par Région × Catégorie. "
+                                 "Par segment : élasticités par Catégorie × Type client, recalcul à la maille de la transaction")
+        monte_carlo = sim_mode == "Monte Carlo"
+        by_segment = sim_mode == "Par segment"
         st.markdown("#### Paramètres d'entrée")
         sim_price_change = st.slider("Variation Prix (%)", -20, 20, 0, help="Impact sur le prix unitaire")
         sim_vol_change = st.slider("Variation Volume (%)", -20, 20, 0, help="Impact sur la quantité vendue")
@@ -783,43 +1087,147 @@ elif "Simulateur IA" in nav_selection:
         if sim_price_change != 0:
             implied_vol_change = sim_price_change * elasticity
             st.info(f"L'élasticité suggère un impact volume de {implied_vol_change:.1f}%")
+        
+        if monte_carlo:
+            st.markdown("#### Incertitude (écarts-types)")
+            sd_price = st.number_input("Écart-type Prix (pts %)", min_value=0.0, max_value=20.0, value=2.0, step=0.5)
+            sd_volume = st.number_input("Écart-type Volume (pts %)", min_value=0.0, max_value=20.0, value=3.0, step=0.5)
+            sd_cost = st.number_input("Écart-type Coûts (pts %)", min_value=0.0, max_value=20.0, value=1.5, step=0.5)
+            sd_elasticity = st.number_input("Écart-type Élasticité", min_value=0.0, max_value=3.0, value=0.3, step=0.1)
+            distribution_labels = {'normal': "Normale", 'uniform': "Uniforme", 'triangular': "Triangulaire"}
+            sim_distribution = st.selectbox("Loi des tirages", DISTRIBUTIONS, format_func=distribution_labels.get)
+            sim_correlation = st.slider("Corrélation entre segments", 0.0, 1.0, 0.7, 0.05,
+                                        help="1 : même choc pour tous les segments, 0 : segments indépendants")
+            n_scenarios = st.select_slider("Nombre de scénarios", options=[1_000, 10_000, 100_000], value=10_000,
+                                           format_func=lambda n: f"{n:,}".replace(",", " "))
+        
+        if by_segment:
+            sim_discount_change = st.slider("Variation Remise (pts)", -20, 20, 0,
+                                            help="Ajoutée à la remise de chaque transaction (bornée entre 0 et 100 %)")
+            # Tableaux groupés préparés une fois par état des filtres ; les curseurs ne font que les réappliquer
+            elasticity_model = load_elasticity_model(selections, date_range, current_version)
+            st.markdown("#### Élasticités par segment")
+            segment_elasticities = st.data_editor(
+                elasticity_model.segments.assign(Elasticity=elasticity),
+                disabled=ELASTICITY_DIMENSIONS, hide_index=True, use_container_width=True,
+                column_config={'Elasticity': st.column_config.NumberColumn("Élasticité", step=0.1, format="%.2f")},
+                key=f"segment_elasticities_{elasticity}"
+            )
     
     with col_res:
-        # Logique de simulation
-        base_sales = df_filtered['Sales_Amount'].sum()
-        base_Profit = df_filtered['Profit'].sum()
-        base_cost = base_sales - base_Profit
+        if by_segment:
+            projection = elasticity_model.project(sim_price_change, sim_vol_change, sim_cost_change,
+                                                  sim_discount_change, segment_elasticities['Elasticity'].to_numpy())
+            base_revenue, new_revenue = projection['Base_Revenue'].sum(), projection['Revenue'].sum()
+            base_cost, new_cost = projection['Base_Cost'].sum(), projection['Cost'].sum()
+            base_Profit, projected_Profit = projection['Base_Profit'].sum(), projection['Profit'].sum()
+            
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                st.metric("CA Projeté", f"${new_revenue:,.0f}", f"{(new_revenue/base_revenue - 1)*100:.1f}%" if base_revenue else None)
+            with c2:
+                st.metric("Coûts Projetés", f"${new_cost:,.0f}", f"{(new_cost/base_cost - 1)*100:.1f}%" if base_cost else None, delta_color="inverse")
+            with c3:
+                st.metric("Profit Projeté", f"${projected_Profit:,.0f}",
+                          f"{(projected_Profit - base_Profit)/abs(base_Profit)*100:.1f}%" if base_Profit else None)
+            st.caption("CA et coûts recalculés à partir de Unit_Price, Unit_Cost, Quantity_Sold et Discount de chaque transaction filtrée.")
+            
+            segment_labels = ["Tous les segments"] + [f"{cat} · {ctype}" for cat, ctype in
+                                                      zip(projection['Product_Category'], projection['Customer_Type'])]
+            waterfall_segment = st.selectbox("Segment du waterfall", range(len(segment_labels)), format_func=lambda i: segment_labels[i])
+            steps = waterfall(projection if waterfall_segment == 0 else projection.iloc[[waterfall_segment - 1]])
+            fig = go.Figure(go.Waterfall(
+                orientation="v",
+                measure=["absolute"] + ["relative"] * (len(steps) - 2) + ["total"],
+                x=[label for label, _ in steps],
+                y=[value for _, value in steps[:-1]] + [0],
+                text=[f"{value/1000:,.0f}k" for _, value in steps],
+                textposition="outside",
+                connector={"line": {"color": "rgb(63, 63, 63)"}},
+            ))
+            fig.update_layout(title=f"Waterfall du profit · {segment_labels[waterfall_segment]}", height=400)
+            plotly_chart(fig, use_container_width=True)
+            
+            # Variation du profit par segment, décomposée par effet
+            breakdown = projection.melt(id_vars=ELASTICITY_DIMENSIONS, value_vars=WATERFALL_STEPS, var_name="Effet", value_name="Impact")
+            breakdown['Segment'] = breakdown['Product_Category'].astype(str) + " · " + breakdown['Customer_Type'].astype(str)
+            fig = px.bar(breakdown, x='Segment', y='Impact', color='Effet', barmode='relative',
+                         title="Impact sur le profit par segment", height=400)
+            plotly_chart(fig, use_container_width=True)
+        elif monte_carlo:
+            # Une seule passe vectorisée sur la matrice scénarios × segments (Région × Catégorie)
+            segments = segment_totals(cube_filtered)
+            start_time = time.perf_counter()
+            projected_sales, projected_costs = simulate(
+                segments['Sales_Amount'], segments['Cost'],
+                price=(sim_price_change, sd_price), volume=(sim_vol_change, sd_volume),
+                cost=(sim_cost_change, sd_cost), elasticity=(elasticity, sd_elasticity),
+                n_scenarios=n_scenarios, correlation=sim_correlation, distribution=sim_distribution
+            )
+            sim = summarize(projected_sales, projected_costs)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            base_Profit = segments['Profit'].sum()
+            profit_bands = sim['quantiles']['profit']
+            
+            c1, c2, c3 = st.columns(3)
+            for col, q, label in zip((c1, c2, c3), (5, 50, 95), ("Profit P5 (pessimiste)", "Profit P50 (médian)", "Profit P95 (optimiste)")):
+                with col:
+                    delta = (profit_bands[q] - base_Profit) / abs(base_Profit) * 100 if base_Profit else 0.0
+                    st.metric(label, f"${profit_bands[q]:,.0f}", f"{delta:.1f}%")
+            st.caption(f"{n_scenarios:,} scénarios × {len(segments)} segments calculés en {elapsed_ms:.0f} ms · "
+                       f"probabilité de baisse du profit : {(sim['profit'] < base_Profit).mean():.0%}".replace(",", " "))
+            
+            # Distribution du profit : histogramme calculé côté serveur, taille du graphique indépendante du nombre de scénarios
+            hist = histogram(sim['profit'])
+            fig = go.Figure(go.Bar(x=hist['value'], y=hist['count'], marker_color='#3498DB', name="Scénarios"))
+            for q, color in ((5, '#E74C3C'), (50, '#2C3E50'), (95, '#2ECC71')):
+                fig.add_vline(x=profit_bands[q], line_dash="dash", line_color=color,
+                              annotation_text=f"P{q}", annotation_position="top")
+            fig.add_vline(x=base_Profit, line_color="#95A5A6", annotation_text="Actuel", annotation_position="bottom right")
+            fig.update_layout(title="Distribution du profit projeté", xaxis_title="Profit ($)", yaxis_title="Scénarios",
+                              height=400, bargap=0.02, showlegend=False)
+            plotly_chart(fig, use_container_width=True)
+            
+            st.markdown("#### Bandes de profit par segment")
+            bands = segment_bands(segments, projected_sales, projected_costs)
+            st.dataframe(bands.sort_values('P50', ascending=False), use_container_width=True, hide_index=True,
+                         column_config={col: st.column_config.NumberColumn(col, format="$%.0f") for col in ['Profit', 'P5', 'P50', 'P95']})
+        else:
+            # Logique de simulation
+            base_sales = cube_filtered.total('Sales_Amount')
+            base_Profit = cube_filtered.total('Profit')
+            base_cost = base_sales - base_Profit
         
-        # Application scénario
-        new_sales_vol_factor = 1 + ((sim_vol_change + (sim_price_change * elasticity))/100)
-        new_price_factor = 1 + (sim_price_change/100)
-        new_cost_factor = 1 + (sim_cost_change/100)
+            # Application scénario
+            new_sales_vol_factor = 1 + ((sim_vol_change + (sim_price_change * elasticity))/100)
+            new_price_factor = 1 + (sim_price_change/100)
+            new_cost_factor = 1 + (sim_cost_change/100)
         
-        projected_sales = base_sales * new_sales_vol_factor * new_price_factor
-        projected_costs = base_cost * new_sales_vol_factor * new_cost_factor
-        projected_Profit = projected_sales - projected_costs
+            projected_sales = base_sales * new_sales_vol_factor * new_price_factor
+            projected_costs = base_cost * new_sales_vol_factor * new_cost_factor
+            projected_Profit = projected_sales - projected_costs
         
-        # Affichage résultats
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            st.metric("Sales Projetés", f"${projected_sales:,.0f}", f"{(projected_sales/base_sales - 1)*100:.1f}%")
-        with c2:
-            st.metric("Coûts Projetés", f"${projected_costs:,.0f}", f"{(projected_costs/base_cost - 1)*100:.1f}%", delta_color="inverse")
-        with c3:
-            st.metric("Profit Projeté", f"${projected_Profit:,.0f}", f"{(projected_Profit/base_Profit - 1)*100:.1f}%")
+            # Affichage résultats
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                st.metric("Sales Projetés", f"${projected_sales:,.0f}", f"{(projected_sales/base_sales - 1)*100:.1f}%")
+            with c2:
+                st.metric("Coûts Projetés", f"${projected_costs:,.0f}", f"{(projected_costs/base_cost - 1)*100:.1f}%", delta_color="inverse")
+            with c3:
+                st.metric("Profit Projeté", f"${projected_Profit:,.0f}", f"{(projected_Profit/base_Profit - 1)*100:.1f}%")
             
-        # Graphique Waterfall
-        fig = go.Figure(go.Waterfall(
-            name = "20", orientation = "v",
-            measure = ["relative", "relative", "relative", "total"],
-            x = ["Base Profit", "Impact Prix/Vol", "Impact Coûts", "Nouveau Profit"],
-            textposition = "outside",
-            text = [f"{base_Profit/1000:.0f}k", "", "", f"{projected_Profit/1000:.0f}k"],
-            y = [base_Profit, projected_sales - base_sales - (projected_costs - base_cost) + (projected_costs - base_cost), -(projected_costs - base_cost), projected_Profit],
-            connector = {"line":{"color":"rgb(63, 63, 63)"}},
-        ))
-        fig.update_layout(title = "Analyse d'impact du scénario (Waterfall)", height=400)
-        st.plotly_chart(fig, use_container_width=True)
+            # Graphique Waterfall
+            fig = go.Figure(go.Waterfall(
+                name = "20", orientation = "v",
+                measure = ["relative", "relative", "relative", "total"],
+                x = ["Base Profit", "Impact Prix/Vol", "Impact Coûts", "Nouveau Profit"],
+                textposition = "outside",
+                text = [f"{base_Profit/1000:.0f}k", "", "", f"{projected_Profit/1000:.0f}k"],
+                y = [base_Profit, projected_sales - base_sales - (projected_costs - base_cost) + (projected_costs - base_cost), -(projected_costs - base_cost), projected_Profit],
+                connector = {"line":{"color":"rgb(63, 63, 63)"}},
+            ))
+            fig.update_layout(title = "Analyse d'impact du scénario (Waterfall)", height=400)
+            plotly_chart(fig, use_container_width=True)
 
 # =============================================================================
 # PAGE 5: MACHINE LEARNING (SUMMARY)
@@ -827,22 +1235,39 @@ elif "Simulateur IA" in nav_selection:
 elif "Machine Learning" in nav_selection:
     st.subheader("🤖 Centre de Prédiction ML")
     
-    tabs = st.tabs(["🎯 Prédictions", "📈 Prévisions (Forecasting)"])
+    tabs = st.tabs(["🎯 Prédictions", "📈 Prévisions (Forecasting)", "📦 Scoring par Lot"])
     
-    # Charger le modèle pré-entraîné
-    model_path = Path("output/models/best_model_gradientboosting.joblib")
-    scaler_path = Path("output/models/scaler.joblib")
+    with st.expander("🗂️ Registre des modèles", expanded=False):
+        st.dataframe(pd.DataFrame(model_registry.status()), use_container_width=True, hide_index=True)
+        comparison = load_comparison()
+        if comparison:
+            # Dernière comparaison de `python -m nexus.training` (validation croisée temporelle)
+            st.caption(f"Comparaison du {comparison['trained_at']} : {comparison['rows']:,} ventes, "
+                       f"{comparison['validation']['folds']} plis à origine glissante")
+            st.dataframe(pd.DataFrame(comparison['models']), use_container_width=True, hide_index=True)
+    
+    # Modèle pré-entraîné servi par le registre (chargé une fois, rechargé si le fichier change) :
+    # celui retenu par la dernière comparaison, sinon le GradientBoosting du notebook
+    model_name = best_model_name()
+    # Artefacts de la prédiction : le modèle et le pipeline de features (qui contient le scaler)
+    prediction_artifacts = [model_name, 'feature_pipeline']
+    
+    # Ventes cumulées connues par point de vente : Cum_Sales_By_Point se poursuit sur les nouvelles transactions
+    point_sales = cube_all.rollup('Region_and_Sales_Rep', ['Sales_Amount'])
+    cum_offsets = dict(zip(point_sales['Region_and_Sales_Rep'].astype(str), point_sales['Sales_Amount']))
     
     with tabs[0]:
         st.markdown("### 🔮 Prédiction de Ventes avec Modèle Pré-entraîné")
         
-        if model_path.exists() and scaler_path.exists():
+        missing_artifacts = [name for name in prediction_artifacts if name not in model_registry]
+        if not missing_artifacts:
             try:
-                # Charger le modèle et le scaler
-                model = joblib.load(model_path)
-                scaler = joblib.load(scaler_path)
+                # Récupérer le modèle et le pipeline de features (encodeurs, scaler, ordre des colonnes)
+                with profiler.stage('model_load', 'model', model=model_name):
+                    model = model_registry.get(model_name)
+                    feature_pipeline = load_feature_pipeline(model_registry)
                 
-                st.success("✅ Modèle GradientBoosting chargé avec succès !")
+                st.success(f"✅ Modèle {type(model).__name__} chargé avec succès !")
                 
                 col1, col2 = st.columns([1, 2])
                 
@@ -856,9 +1281,12 @@ elif "Machine Learning" in nav_selection:
                     unit_cost = st.number_input("Coût Unitaire ($)", min_value=1.0, max_value=10000.0, value=50.0)
                     discount = st.slider("Remise (%)", 0.0, 50.0, 5.0)
                     
-                    region = st.selectbox("Région", df_filtered['Region'].unique())
-                    category = st.selectbox("Catégorie Produit", df_filtered['Product_Category'].unique())
-                    customer_type = st.selectbox("Type Client", df_filtered['Customer_Type'].unique())
+                    region = st.selectbox("Région", filtered_view['Region'].unique())
+                    category = st.selectbox("Catégorie Produit", filtered_view['Product_Category'].unique())
+                    customer_type = st.selectbox("Type Client", filtered_view['Customer_Type'].unique())
+                    sales_rep = st.selectbox("Commercial", filtered_view['Sales_Rep'].unique())
+                    payment_method = st.selectbox("Moyen de Paiement", filtered_view['Payment_Method'].unique())
+                    sales_channel = st.selectbox("Canal de Vente", filtered_view['Sales_Channel'].unique())
                     
                     predict_button = st.button("🚀 Prédire les Ventes", type="primary")
                     st.markdown('</div>', unsafe_allow_html=True)
@@ -866,53 +1294,25 @@ elif "Machine Learning" in nav_selection:
                 with col2:
                     if predict_button:
                         with st.spinner('Calcul de la prédiction...'):
-                            # Créer les encodeurs à partir des données
-                            encoders = get_encoders_from_data(df)
-                            
-                            # Encoder les valeurs sélectionnées
-                            try:
-                                region_encoded = encoders['Region'].transform([str(region)])[0] if 'Region' in encoders else 0
-                                category_encoded = encoders['Product_Category'].transform([str(category)])[0] if 'Product_Category' in encoders else 0
-                                customer_encoded = encoders['Customer_Type'].transform([str(customer_type)])[0] if 'Customer_Type' in encoders else 0
-                            except:
-                                region_encoded = 0
-                                category_encoded = 0
-                                customer_encoded = 0
-                            
-                            # Préparer les features avec TOUTES les colonnes nécessaires
-                            current_date = datetime.now()
-                            
-                            # Ordre exact des features comme dans prepare_ml_data
-                            X_pred = pd.DataFrame({
-                                # Numerical features (dans l'ordre exact)
+                            # Transaction brute : les features sont dérivées par le pipeline, comme à l'entraînement
+                            transaction = pd.DataFrame({
+                                'Sale_Date': [pd.Timestamp(datetime.now().date())],
                                 'Quantity_Sold': [quantity],
-                                'Unit_Cost': [unit_cost],
                                 'Unit_Price': [unit_price],
-                                'Discount': [discount],
-                                'Year': [current_date.year],
-                                'Month': [current_date.month],
-                                'Day': [current_date.day],
-                                'DayOfWeek': [current_date.weekday()],
-                                'DayOfYear': [current_date.timetuple().tm_yday],
-                                'Week': [current_date.isocalendar()[1]],
-                                'Total_Cost': [quantity * unit_cost],
-                                'Profit': [quantity * (unit_price - unit_cost) * (1 - discount/100)],
-                                'Profit_Margin': [((unit_price - unit_cost) / unit_price * 100) if unit_price > 0 else 0],
-                                'Cum_Sales_By_Point': [0],
-                                
-                                # Encoded features (dans l'ordre exact)
-                                'Region_encoded': [region_encoded],
-                                'Sales_Rep_encoded': [0],
-                                'Product_Category_encoded': [category_encoded],
-                                'Customer_Type_encoded': [customer_encoded],
-                                'Payment_Method_encoded': [0],
-                                'Sales_Channel_encoded': [0],
-                                'Region_and_Sales_Rep_encoded': [0]
+                                'Unit_Cost': [unit_cost],
+                                'Discount': [discount / 100],
+                                'Region': [str(region)],
+                                'Sales_Rep': [str(sales_rep)],
+                                'Product_Category': [str(category)],
+                                'Customer_Type': [str(customer_type)],
+                                'Payment_Method': [str(payment_method)],
+                                'Sales_Channel': [str(sales_channel)],
                             })
                             
                             # Prédiction
                             try:
-                                prediction = model.predict(X_pred)[0]
+                                with profiler.stage('model_predict', 'model', model=model_name):
+                                    prediction = feature_pipeline.predict(model, transaction, cum_offsets)[0]
                                 
                                 # Afficher le résultat
                                 st.markdown(f"""
@@ -951,75 +1351,168 @@ elif "Machine Learning" in nav_selection:
             except Exception as e:
                 st.error(f"Erreur lors du chargement du modèle: {str(e)}")
         else:
-            st.warning("⚠️ Modèle pré-entraîné non trouvé. Veuillez vérifier le dossier 'output/models/'.")
+            st.warning(f"⚠️ Modèle pré-entraîné non trouvé ({', '.join(f'{name}.joblib' for name in missing_artifacts)}). "
+                       "Veuillez vérifier le dossier 'output/models/'.")
     
     with tabs[1]:
         st.markdown("### 🔮 Prévision des Ventes")
         
+        GB_LABEL = "GradientBoosting (sélection courante)"
+        with profiler.stage('forecaster_load', 'model'):
+            available_models = [name for name in PRETRAINED_FORECASTERS if load_forecaster(name)[0] is not None]
+        unavailable = {name: load_forecaster(name)[1] for name in PRETRAINED_FORECASTERS if name not in available_models}
+        
         # Slider pour choisir le nombre de jours
-        col_slider, col_button = st.columns([3, 1])
+        col_model, col_slider, col_level, col_button = st.columns([2, 3, 2, 1])
+        with col_model:
+            model_choice = st.selectbox("Modèle", available_models + [GB_LABEL])
         with col_slider:
             forecast_days = st.slider("Nombre de jours à prévoir", min_value=7, max_value=90, value=30, step=7)
+        with col_level:
+            confidence = st.select_slider("Intervalle de confiance", options=[0.80, 0.90, 0.95], value=0.95,
+                                          format_func=lambda v: f"{v:.0%}")
         with col_button:
             st.markdown("<br>", unsafe_allow_html=True)
             generate_forecast = st.button("🚀 Générer les prévisions", type="primary")
+        for name, error in unavailable.items():
+            st.caption(f"⚠️ {name} indisponible : {error}")
         
-        if generate_forecast:
-            with st.spinner(f"Calcul des prévisions pour {forecast_days} jours..."):
-                # Simple Forecasting logic based on aggregated daily data
-                daily_data = df_filtered.groupby('Sale_Date')['Sales_Amount'].sum().reset_index()
-                daily_data['DayOfYear'] = daily_data['Sale_Date'].dt.dayofyear
-                daily_data['Year'] = daily_data['Sale_Date'].dt.year
-                daily_data['DayOfWeek'] = daily_data['Sale_Date'].dt.dayofweek
-                
-                # Features for forecast
-                X_ts = daily_data[['DayOfYear', 'Year', 'DayOfWeek']]
-                y_ts = daily_data['Sales_Amount']
-                
-                # Train Forecast Model
-                ts_model = GradientBoostingRegressor(n_estimators=200, random_state=42)
-                ts_model.fit(X_ts, y_ts)
-                
-                # Future Dates (utiliser forecast_days)
-                last_date = daily_data['Sale_Date'].max()
-                future_dates = [last_date + timedelta(days=x) for x in range(1, forecast_days + 1)]
-                future_df = pd.DataFrame({'Sale_Date': future_dates})
-                future_df['DayOfYear'] = future_df['Sale_Date'].dt.dayofyear
-                future_df['Year'] = future_df['Sale_Date'].dt.year
-                future_df['DayOfWeek'] = future_df['Sale_Date'].dt.dayofweek
-                
-                # Predict
-                future_pred = ts_model.predict(future_df[['DayOfYear', 'Year', 'DayOfWeek']])
-                future_df['Predicted_Sales'] = future_pred
-                
-                # Métriques de prévision
-                total_forecast = future_df['Predicted_Sales'].sum()
-                avg_daily_forecast = future_df['Predicted_Sales'].mean()
-                
-                metric_col1, metric_col2, metric_col3 = st.columns(3)
-                metric_col1.metric("📅 Période", f"{forecast_days} jours")
-                metric_col2.metric("💰 Total Prévu", f"${total_forecast:,.0f}")
-                metric_col3.metric("📊 Moyenne/Jour", f"${avg_daily_forecast:,.0f}")
-                
-                # Plot
-                fig_forecast = go.Figure()
-                fig_forecast.add_trace(go.Scatter(x=daily_data['Sale_Date'], y=daily_data['Sales_Amount'], 
-                                                  mode='lines', name='Historique', line=dict(color='#3498DB')))
-                fig_forecast.add_trace(go.Scatter(x=future_df['Sale_Date'], y=future_df['Predicted_Sales'], 
-                                                  mode='lines+markers', name='Prévision', 
-                                                  line=dict(dash='dash', color='#2ECC71')))
+        # Agrégat journalier de la sélection, lu dans le cube
+        daily_data = cube_filtered.rollup('Sale_Date', ['Sales_Amount'])
+        future_df = None
+        
+        if model_choice == GB_LABEL:
+            # Un modèle par sélection de filtres et version des données, entraîné en arrière-plan :
+            # une fois prêt, changer l'horizon ne relance que la prédiction des nouvelles dates
+            forecast_cache = get_forecast_cache()
+            forecast_key = fingerprint(
+                'daily_gradientboosting',
+                {dim: sorted(map(str, values)) for dim, values in selections.items()},
+                date_range, current_version
+            )
+            if generate_forecast or forecast_key in forecast_cache or forecast_cache.is_pending(forecast_key):
+                try:
+                    forecaster = forecast_cache.get_or_submit(forecast_key, lambda: DailyForecaster.fit(daily_data))
+                except Exception as e:
+                    forecaster = None
+                    st.error(f"Erreur lors de l'entraînement: {str(e)}")
+                if forecaster is not None:
+                    with profiler.stage('forecast', 'model', model=model_choice, days=forecast_days):
+                        future_df = forecaster.forecast(forecast_days, level=confidence)
+                elif forecast_cache.is_pending(forecast_key):
+                    st.info("⏳ Entraînement du modèle en arrière-plan... Actualisez dans quelques secondes.")
+                    st.button("🔄 Actualiser")
+        elif generate_forecast or st.session_state.get('forecast_model') == model_choice:
+            # Modèles pré-entraînés sur la série globale : inférence seule, puis mise à l'échelle
+            # par la part de la sélection dans les ventes des 90 derniers jours
+            st.session_state['forecast_model'] = model_choice
+            forecaster = load_forecaster(model_choice)[0]
+            global_daily = cube_all.rollup('Sale_Date', ['Sales_Amount']).set_index('Sale_Date')['Sales_Amount']
+            # Part calculée sur les 90 derniers jours de la sélection (filtres et période de la barre latérale)
+            recent_end = daily_data['Sale_Date'].max() if len(daily_data) else global_daily.index.max()
+            recent_start = recent_end - pd.Timedelta(days=90)
+            in_window = (global_daily.index > recent_start) & (global_daily.index <= recent_end)
+            recent_total = global_daily[in_window].sum()
+            recent_selection = daily_data.loc[daily_data['Sale_Date'] > recent_start, 'Sales_Amount'].sum()
+            share = recent_selection / recent_total if recent_total else 1.0
+            try:
+                with profiler.stage('forecast', 'model', model=model_choice, days=forecast_days):
+                    future_df = forecaster.forecast(global_daily, forecast_days, level=confidence)
+                future_df[['Predicted_Sales', 'Lower', 'Upper']] *= share
+            except Exception as e:
+                st.error(f"Erreur lors de la prévision: {str(e)}")
+            if share < 1:
+                st.caption(f"Modèle entraîné sur les ventes globales, ramené à la part de la sélection ({share:.1%}).")
+            if model_choice == 'Prophet':
+                st.caption(f"Intervalle de confiance fixé à l'entraînement : {forecaster.interval_width:.0%}.")
+        
+        if future_df is not None:
+            # Métriques de prévision
+            total_forecast = future_df['Predicted_Sales'].sum()
+            avg_daily_forecast = future_df['Predicted_Sales'].mean()
+            
+            metric_col1, metric_col2, metric_col3 = st.columns(3)
+            metric_col1.metric("📅 Période", f"{forecast_days} jours")
+            metric_col2.metric("💰 Total Prévu", f"${total_forecast:,.0f}")
+            metric_col3.metric("📊 Moyenne/Jour", f"${avg_daily_forecast:,.0f}")
+            
+            # Plot
+            fig_forecast = go.Figure()
+            history = downsample(daily_data, 'Sale_Date', 'Sales_Amount')
+            fig_forecast.add_trace(go.Scatter(x=history['Sale_Date'], y=history['Sales_Amount'], 
+                                              mode='lines', name='Historique', line=dict(color='#3498DB')))
+            fig_forecast.add_trace(go.Scatter(
+                x=pd.concat([future_df['Sale_Date'], future_df['Sale_Date'][::-1]]),
+                y=pd.concat([future_df['Upper'], future_df['Lower'][::-1]]),
+                fill='toself', fillcolor='rgba(46, 204, 113, 0.2)', line=dict(color='rgba(0,0,0,0)'),
+                hoverinfo='skip', name='Intervalle de confiance'
+            ))
+            fig_forecast.add_trace(go.Scatter(x=future_df['Sale_Date'], y=future_df['Predicted_Sales'], 
+                                              mode='lines+markers', name=f'Prévision ({model_choice})', 
+                                              line=dict(dash='dash', color='#2ECC71')))
+            
+            fig_forecast.update_layout(
+                title=f"Prévision des Ventes - {forecast_days} prochains jours", 
+                hovermode="x unified", 
+                height=500
+            )
+            plotly_chart(fig_forecast, use_container_width=True)
+            
+            # Afficher le tableau avec scroll si beaucoup de jours
+            st.markdown("#### 📋 Détail des Prévisions")
+            st.dataframe(future_df[['Sale_Date', 'Predicted_Sales', 'Lower', 'Upper']].style.format(
+                {'Predicted_Sales': '${:,.2f}', 'Lower': '${:,.2f}', 'Upper': '${:,.2f}'}), 
+                       use_container_width=True, height=300)
+
+    with tabs[2]:
+        st.markdown("### 📦 Scoring d'un Carnet de Commandes")
+        st.caption(
+            f"Colonnes requises : {', '.join(REQUIRED_COLUMNS)}. "
+            f"Colonnes catégorielles utilisées si présentes : {', '.join(ENCODED_COLUMNS)}."
+        )
+        
+        col_upload, col_chunk = st.columns([3, 1])
+        with col_upload:
+            uploaded_file = st.file_uploader("Fichier de transactions (CSV ou Parquet)", type=['csv', 'parquet'])
+        with col_chunk:
+            chunk_rows = st.select_slider("Lignes par bloc", options=[10_000, 50_000, 100_000, 250_000],
+                                          value=DEFAULT_CHUNK_ROWS, format_func=lambda v: f"{v:,}")
+        
+        if uploaded_file is not None and st.button("🚀 Lancer le scoring", type="primary"):
+            try:
+                with profiler.stage('model_load', 'model', model=model_name):
+                    model = model_registry.get(model_name)
+                    feature_pipeline = load_feature_pipeline(model_registry)
                 
-                fig_forecast.update_layout(
-                    title=f"Prévision des Ventes - {forecast_days} prochains jours", 
-                    hovermode="x unified", 
-                    height=500
+                progress_bar = st.progress(0.0, text="Scoring en cours...")
+                start_time = time.time()
+                with profiler.stage('batch_score', 'model', model=model_name):
+                    result_path, scored_rows = score_file(
+                        uploaded_file, uploaded_file.name, model, feature_pipeline, cum_offsets,
+                        chunk_rows=chunk_rows,
+                        progress=lambda fraction, rows: progress_bar.progress(fraction, text=f"{rows:,} lignes scorées")
+                    )
+                previous = st.session_state.get('batch_scoring')
+                if previous:
+                    Path(previous['path']).unlink(missing_ok=True)
+                st.session_state['batch_scoring'] = {
+                    'path': result_path, 'rows': scored_rows, 'name': uploaded_file.name,
+                    'seconds': time.time() - start_time
+                }
+            except Exception as e:
+                st.error(f"Erreur lors du scoring: {str(e)}")
+        
+        batch_result = st.session_state.get('batch_scoring')
+        if batch_result and Path(batch_result['path']).exists():
+            st.success(f"✅ {batch_result['rows']:,} transactions scorées en {batch_result['seconds']:.1f} s")
+            st.dataframe(pd.read_csv(batch_result['path'], nrows=100), use_container_width=True, height=300)
+            with open(batch_result['path'], 'rb') as result_file:
+                st.download_button(
+                    label="📥 Télécharger les prédictions (CSV)",
+                    data=result_file,
+                    file_name=f"predictions_{Path(batch_result['name']).stem}.csv",
+                    mime="text/csv"
                 )
-                st.plotly_chart(fig_forecast, use_container_width=True)
-                
-                # Afficher le tableau avec scroll si beaucoup de jours
-                st.markdown("#### 📋 Détail des Prévisions")
-                st.dataframe(future_df[['Sale_Date', 'Predicted_Sales']].style.format({'Predicted_Sales': '${:,.2f}'}), 
-                           use_container_width=True, height=300)
 
 # =============================================================================
 # PAGE 6: RAPPORTS ET DONNÉES
@@ -1027,36 +1520,90 @@ elif "Machine Learning" in nav_selection:
 elif "Rapports & Données" in nav_selection:
     st.subheader("📑 Gestion des Données")
     
+    df_filtered = filtered_view.frame()
     with st.expander("Visualiser les données brutes", expanded=True):
         st.dataframe(df_filtered, use_container_width=True, height=400)
+
+    footprint = read_footprint()
+    if footprint:
+        st.caption(
+            f"Empreinte mémoire du jeu de données ({footprint['rows']:,} lignes) : "
+            f"{footprint['raw_bytes']/1024**2:,.1f} Mo brut → {footprint['compact_bytes']/1024**2:,.1f} Mo compact (mappé en mémoire)"
+        )
     
-    col1, col2 = st.columns(2)
+    col1, col2 = st.columns([1, 2])
     with col1:
-        st.download_button(
-            label="📥 Télécharger CSV (Filtré)",
-            data=df_filtered.to_csv(index=False).encode('utf-8'),
-            file_name='nexus_export_data.csv',
-            mime='text/csv',
-            type='primary'
-        )
+        export_format = st.selectbox("Format d'export", available_formats(),
+                                     format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
     with col2:
+        # Fichier généré uniquement au clic, par blocs, dans un fichier temporaire remis tel quel au bouton
+        st.markdown("<br>", unsafe_allow_html=True)
         st.download_button(
-            label="📄 Générer Rapport PDF (Simulé)",
-            data=b"PDF Content",
-            file_name='rapport_mensuel.pdf',
-            disabled=True,
-            help="Fonctionnalité disponible dans la version Enterprise"
+            label=f"📥 Télécharger {EXPORT_FORMATS[export_format][0]} (Filtré)",
+            data=lambda view=filtered_view, fmt=export_format: export_reader(view, fmt),
+            file_name=export_name('nexus_export_data', export_format),
+            mime=EXPORT_FORMATS[export_format][2],
+            type='primary'
         )
+
+    # Section Rapports PDF : KPIs, évolution, Pareto et prévision de la sélection
+    st.markdown("### 📄 Rapports PDF")
+    if not MATPLOTLIB_AVAILABLE:
+        st.warning("⚠️ matplotlib est requis pour générer les rapports PDF.")
+    else:
+        REPORT_SCOPES = {"Sélection courante": None, "Un rapport par région": 'Region', "Un rapport par commercial": 'Sales_Rep'}
+        col_scope, col_button = st.columns([2, 1])
+        with col_scope:
+            report_scope = st.selectbox("Périmètre du rapport", list(REPORT_SCOPES))
+        with col_button:
+            st.markdown("<br>", unsafe_allow_html=True)
+            generate_report = st.button("📄 Générer le rapport PDF", type="primary")
+        
+        report_dimension = REPORT_SCOPES[report_scope]
+        report_jobs = get_report_jobs()
+        report_key = fingerprint('report', report_dimension, filter_fingerprint(selections, date_range, current_version))
+        if report_dimension is None:
+            report_file = report_name(f"rapport_ventes_{date_range[0]:%Y%m%d}_{date_range[1]:%Y%m%d}")
+            report_mime = 'application/pdf'
+            def build(cube=sales_cube, selections=selections, date_range=date_range, version=current_version):
+                return build_report(cube, selections, date_range, filter_key=filter_fingerprint(selections, date_range, version),
+                                    chart_cache=get_report_cache())
+        else:
+            report_file = f"rapports_{report_dimension}.zip"
+            report_mime = 'application/zip'
+            def build(cube=sales_cube, dimension=report_dimension, selections=selections, date_range=date_range, version=current_version):
+                # Lot généré en parallèle dans un dossier temporaire, puis archivé
+                with tempfile.TemporaryDirectory(prefix='nexus_reports_') as output_dir:
+                    paths = batch_reports(cube, dimension, batch_values(cube, dimension, selections), selections,
+                                          date_range, version, output_dir)
+                    return zip_reports(paths)
         
-    # Section Logs système
+        if generate_report or report_key in report_jobs or report_jobs.is_pending(report_key):
+            try:
+                report_pdf = report_jobs.get_or_submit(report_key, build)
+            except Exception as e:
+                report_pdf = None
+                st.error(f"Erreur lors de la génération du rapport: {str(e)}")
+            if report_pdf is not None:
+                st.download_button(
+                    label=f"📥 Télécharger {report_file}",
+                    data=report_pdf,
+                    file_name=report_file,
+                    mime=report_mime
+                )
+            elif report_jobs.is_pending(report_key):
+                st.info("⏳ Génération du rapport en arrière-plan... Actualisez dans quelques secondes.")
+                st.button("🔄 Actualiser", key='refresh_report')
+        
+    # Section Logs système : derniers reruns instrumentés (toutes sessions)
     st.markdown("### 🛠️ Logs Système")
-    logs = pd.DataFrame({
-        'Timestamp': [datetime.now() - timedelta(minutes=i*15) for i in range(5)],
-        'Event': ['Data Refresh', 'Model Inference', 'User Login', 'Export CSV', 'System Check'],
-        'Status': ['Success', 'Success', 'Success', 'Warning', 'Success'],
-        'User': ['System', 'API', 'Admin', 'Admin', 'System']
-    })
-    st.table(logs)
+    logs = summary_rows(get_profile_log().recent(50))
+    if logs:
+        st.dataframe(pd.DataFrame(logs), use_container_width=True, hide_index=True)
+    else:
+        st.info("Aucune mesure enregistrée : lancez le dashboard avec NEXUS_PROFILE=1 ou ouvrez-le avec ?profile=1.")
+
+profiler.end(page_stage)
 
 # -----------------------------------------------------------------------------
 # FOOTER
@@ -1066,4 +1613,20 @@ st.markdown("""
         © 2025 Nexus Analytics Corporation. All rights reserved.<br>
         Designed by Kenfack Karled using Streamlit & Plotly.
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Bilan du rerun instrumenté : panneau de la sidebar et export JSON lines
+profile_record = profiler.finish()
+if profile_record:
+    get_profile_log().append(profile_record)
+    with st.sidebar.expander(f"⏱️ Performance ({profile_record['total_ms']:,.0f} ms)"):
+        st.dataframe(pd.DataFrame([
+            {
+                'Étape': '  ' * stage['depth'] + stage['name'],
+                'ms': round(stage.get('ms', 0), 1),
+                'Δ RSS (Mo)': round(stage.get('rss_delta_mb', 0), 1),
+                'Figure (Ko)': round(stage['payload_kb'], 1) if 'payload_kb' in stage else None,
+            }
+            for stage in profile_record['stages']
+        ]), use_container_width=True, hide_index=True)
+        st.caption(f"RSS : {profile_record['rss_mb']:,.0f} Mo ({profile_record['rss_delta_mb']:+,.1f} Mo sur le rerun)")
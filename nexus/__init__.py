@@ -0,0 +1,4 @@
+"""
+Nexus Analytics Pro - briques de calcul partagées entre le dashboard
+Streamlit (app.py) et le notebook d'analyse (main.ipynb).
+"""
@@ -0,0 +1,77 @@
+"""
+Scoring par lot d'un fichier de transactions (CSV ou Parquet).
+
+Le fichier est lu et scoré par blocs de taille fixe : la mémoire utilisée dépend de la taille
+d'un bloc, pas de celle du fichier. Les prédictions sont écrites au fil de l'eau dans un
+fichier CSV temporaire, proposé ensuite au téléchargement.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from nexus.features import point_totals
+
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def iter_chunks(file, name, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Itère sur les blocs (DataFrame, progression entre 0 et 1) d'un fichier CSV ou Parquet.
+    `file` est un chemin ou un objet fichier (ex. fichier téléversé dans Streamlit).
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as handle:
+            yield from iter_chunks(handle, name, chunk_rows)
+        return
+
+    if str(name).lower().endswith('.parquet'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow est requis pour lire un fichier Parquet")
+        parquet = pq.ParquetFile(file)
+        total, done = parquet.metadata.num_rows, 0
+        for batch in parquet.iter_batches(batch_size=chunk_rows):
+            done += batch.num_rows
+            yield batch.to_pandas(), done / max(total, 1)
+        return
+
+    # Progression d'un CSV : position de lecture dans le fichier
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    for chunk in pd.read_csv(file, chunksize=chunk_rows):
+        yield chunk, min(file.tell() / size, 1.0) if size else 1.0
+
+
+def score_file(file, name, model, pipeline, cum_offsets=None,
+               chunk_rows=DEFAULT_CHUNK_ROWS, progress=None, output_dir=None):
+    """
+    Score tout le fichier bloc par bloc et écrit le résultat (colonnes d'origine +
+    Predicted_Sales) dans un CSV temporaire. Retourne (chemin, nombre de lignes).
+    `progress(fraction, lignes)` est appelé après chaque bloc.
+    Les ventes cumulées par point de vente se poursuivent d'un bloc à l'autre, à partir
+    de `cum_offsets` (par défaut, celles connues du pipeline à l'entraînement).
+    """
+    offsets = pd.Series(cum_offsets if cum_offsets is not None else pipeline.cum_offsets, dtype=np.float64)
+    fd, path = tempfile.mkstemp(prefix='nexus_scoring_', suffix='.csv', dir=output_dir)
+    rows = 0
+    try:
+        with os.fdopen(fd, 'w', newline='') as out:
+            for chunk, fraction in iter_chunks(file, name, chunk_rows):
+                chunk = chunk.assign(Predicted_Sales=pipeline.predict(model, chunk, offsets.to_dict()))
+                if 'Cum_Sales_By_Point' not in chunk.columns:
+                    offsets = offsets.add(pd.Series(point_totals(chunk), dtype=np.float64), fill_value=0)
+                chunk.to_csv(out, header=rows == 0, index=False)
+                rows += len(chunk)
+                if progress is not None:
+                    progress(fraction, rows)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path, rows
@@ -0,0 +1,263 @@
+"""
+Banc d'essai des pages du dashboard, sans navigateur.
+
+Pour chaque taille de jeu (ventes synthétiques nettoyées, écrites une fois en store Parquet dans
+un espace de travail dédié), chaque scénario est joué dans un processus neuf par l'AppTest de
+Streamlit : premier affichage de la page (froid), puis `repeat` reruns avec un changement de
+filtre (Région) à chaque fois. Sont relevés par scénario :
+    - latence de bout en bout du rerun (p50 / p90 / p99) et durée mesurée côté app (profiler) ;
+    - pic de mémoire résidente du processus ;
+    - taille des figures Plotly envoyées au navigateur (spec JSON rendue).
+Les résultats sont écrits en JSON et comparés à une référence (`--baseline`), que
+`--save-baseline` remplace pour suivre les versions suivantes. Un scénario en erreur (modèle
+impossible à charger...) ne mesure que le chemin d'erreur : il est écarté de la référence et listé
+dans sa section `excluded`.
+
+    python -m nexus.benchmark --rows 10000 1000000 10000000 --repeat 5
+    python -m nexus.benchmark --rows 10000 --scenarios accueil simulateur --save-baseline
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from nexus.profiling import PeakMemory, rss
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'app.py'
+MODELS_PATH = APP_PATH.parent / 'output' / 'models'
+BENCH_DIR = Path('output/benchmarks')
+RESULTS_PATH = BENCH_DIR / 'latest.json'
+BASELINE_PATH = BENCH_DIR / 'baseline.json'
+DEFAULT_ROWS = (10_000, 1_000_000, 10_000_000)
+DEFAULT_REPEAT = 5
+PERCENTILES = (50, 90, 99)
+# Au-delà de ce rapport à la référence (p50), le scénario est signalé comme régression
+REGRESSION_RATIO = 1.2
+
+
+def _set(at, kind, label, value):
+    """Fixe la valeur du widget `kind` (radio, selectbox...) portant le libellé `label`"""
+    widget = next(w for w in getattr(at, kind) if w.label == label)
+    widget.set_value(value)
+
+
+def _click(at, label):
+    """Clique le bouton dont le libellé contient `label` (absent si le modèle n'a pas pu être chargé)"""
+    for button in at.button:
+        if label in button.label:
+            button.click()
+            return
+
+
+# Scénarios : (page de la navigation, préparation jouée une fois avant les mesures)
+SCENARIOS = {
+    'accueil': ("🏠 Accueil", None),
+    'tableau_de_bord': ("📊 Tableau de Bord", None),
+    'analyse': ("📉 Analyse Détaillée", None),
+    'analyse_rapide': ("📉 Analyse Détaillée", lambda at: _set(at, 'toggle', "⚡ Mode rapide", True)),
+    'geographie': ("🗺️ Géographie & Segments", None),
+    'simulateur': ("🔮 Simulateur IA", None),
+    'simulateur_monte_carlo': ("🔮 Simulateur IA", lambda at: _set(at, 'radio', "Mode", "Monte Carlo")),
+    'simulateur_segments': ("🔮 Simulateur IA", lambda at: _set(at, 'radio', "Mode", "Par segment")),
+    'prediction': ("🤖 Machine Learning", lambda at: _click(at, "Prédire")),
+    'prevision': ("🤖 Machine Learning", lambda at: _click(at, "Générer les prévisions")),
+    'rapports': ("📑 Rapports & Données", None),
+}
+
+
+def prepare_dataset(rows, bench_dir=BENCH_DIR, seed=42):
+    """
+    Espace de travail d'une taille de jeu : store Parquet synthétique, frame compact déjà construit
+    (comme sur un serveur en régime établi) et lien vers les modèles du projet. Réutilisé s'il existe.
+    """
+    from nexus.frame import load_compact_sales
+    from nexus.store import STORE_PATH, write_store_chunks
+    from nexus.synthetic import iter_cleaned_sales
+
+    workspace = (Path(bench_dir) / 'data' / f"{rows}").resolve()
+    store_path = workspace / STORE_PATH
+    if not store_path.exists():
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        write_store_chunks(iter_cleaned_sales(rows, seed=seed), store_path)
+    models_link = workspace / 'output' / 'models'
+    if not models_link.exists() and MODELS_PATH.exists():
+        models_link.symlink_to(MODELS_PATH, target_is_directory=True)
+
+    cwd = os.getcwd()
+    os.chdir(workspace)
+    try:
+        load_compact_sales([])
+    finally:
+        os.chdir(cwd)
+    return workspace
+
+
+def _payload_bytes(at):
+    """Taille des specs Plotly rendues (JSON envoyé au navigateur)"""
+    return sum(len(chart.proto.spec) for chart in at.get('plotly_chart'))
+
+
+def _last_profile(log_path):
+    if not log_path.exists():
+        return None
+    with open(log_path) as f:
+        lines = f.read().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+
+def run_scenario(workspace, name, repeat=DEFAULT_REPEAT, timeout=600):
+    """Joue un scénario dans l'espace de travail (processus courant) et retourne ses mesures"""
+    from streamlit.testing.v1 import AppTest
+
+    page, setup = SCENARIOS[name]
+    workspace = Path(workspace)
+    log_path = workspace / 'perf.jsonl'
+    log_path.unlink(missing_ok=True)
+    os.chdir(workspace)
+    os.environ.update({'NEXUS_PROFILE': '1', 'NEXUS_PROFILE_LOG': str(log_path), 'NEXUS_FORECAST_CACHE_DIR': ''})
+
+    latencies, app_ms, payloads, errors = [], [], [], []
+    with PeakMemory() as peak:
+        start_rss = rss()
+        at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+        start = time.perf_counter()
+        at.run()
+        at.sidebar.radio[0].set_value(page)
+        at.run()
+        if setup is not None:
+            setup(at)
+            at.run()
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        regions = list(at.sidebar.multiselect[0].options)
+        for i in range(repeat):
+            # Alterne toutes les régions / toutes sauf une : chaque rerun recalcule la sélection
+            at.sidebar.multiselect[0].set_value(regions if i % 2 else regions[:-1] or regions)
+            if name == 'prediction':
+                setup(at)
+            start = time.perf_counter()
+            at.run()
+            latencies.append((time.perf_counter() - start) * 1000)
+            payloads.append(_payload_bytes(at))
+            profile = _last_profile(log_path)
+            if profile is not None:
+                app_ms.append(profile['total_ms'])
+        errors = [str(e.value) for e in at.exception] + [e.value for e in at.error]
+
+    slowest = []
+    if profile is not None:
+        stages = sorted(profile['stages'], key=lambda s: s.get('ms', 0), reverse=True)
+        slowest = [{'name': s['name'], 'ms': round(s.get('ms', 0), 1)} for s in stages if s['category'] != 'page'][:3]
+    return {
+        'page': page,
+        'cold_ms': round(cold_ms, 1),
+        **{f"p{q}_ms": round(float(np.percentile(latencies, q)), 1) for q in PERCENTILES},
+        'app_p50_ms': round(float(np.percentile(app_ms, 50)), 1) if app_ms else None,
+        'peak_rss_mb': round(start_rss / 1024**2 + peak.peak_mb, 1),
+        'payload_kb': round(max(payloads) / 1024, 1),
+        'slowest_stages': slowest,
+        'errors': errors[:3],
+    }
+
+
+def _isolated(workspace, name, repeat):
+    """Scénario dans un processus neuf : caches et mémoire ne dépendent pas des scénarios précédents"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_scenario, str(workspace), name, repeat).result()
+
+
+def run_benchmark(rows=DEFAULT_ROWS, scenarios=None, repeat=DEFAULT_REPEAT, bench_dir=BENCH_DIR, progress=print):
+    """Prépare chaque taille de jeu puis joue les scénarios un par un (jamais en parallèle)"""
+    scenarios = list(scenarios or SCENARIOS)
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'repeat': repeat,
+        'runs': {},
+    }
+    for n_rows in rows:
+        start = time.perf_counter()
+        workspace = prepare_dataset(n_rows, bench_dir)
+        progress(f"{n_rows:,} ventes : jeu prêt en {time.perf_counter() - start:.1f} s")
+        runs = results['runs'].setdefault(str(n_rows), {})
+        for name in scenarios:
+            runs[name] = _isolated(workspace, name, repeat)
+            progress(format_row(n_rows, name, runs[name]))
+    return results
+
+
+def format_row(n_rows, name, run, reference=None):
+    line = (f"{n_rows:>11,}  {name:<24} froid {run['cold_ms']:>9,.0f} ms  p50 {run['p50_ms']:>8,.0f}  "
+            f"p90 {run['p90_ms']:>8,.0f}  p99 {run['p99_ms']:>8,.0f} ms  RSS {run['peak_rss_mb']:>7,.0f} Mo  "
+            f"figures {run['payload_kb']:>7,.1f} Ko")
+    if reference is not None:
+        ratio = run['p50_ms'] / reference['p50_ms'] if reference['p50_ms'] else float('nan')
+        line += f"  ×{ratio:.2f} réf." + ("  ⚠️ régression" if ratio > REGRESSION_RATIO else "")
+    if run['errors']:
+        line += f"  erreurs : {run['errors'][0][:60]}"
+    return line
+
+
+def compare(results, baseline):
+    """Lignes de rapport avec, quand elle existe, la variation de p50 par rapport à la référence"""
+    lines = []
+    for n_rows, runs in results['runs'].items():
+        reference_runs = baseline.get('runs', {}).get(n_rows, {}) if baseline else {}
+        for name, run in runs.items():
+            lines.append(format_row(int(n_rows), name, run, reference_runs.get(name)))
+    return lines
+
+
+def baseline_from(results):
+    """Résultats à enregistrer comme référence : les scénarios en erreur passent dans `excluded`"""
+    baseline = {**results, 'runs': {}, 'excluded': {}}
+    for n_rows, runs in results['runs'].items():
+        baseline['runs'][n_rows] = {name: run for name, run in runs.items() if not run['errors']}
+        excluded = {name: run['errors'][0] for name, run in runs.items() if run['errors']}
+        if excluded:
+            baseline['excluded'][n_rows] = excluded
+    return baseline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des pages du dashboard (AppTest, sans navigateur)")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS), help="tailles des jeux synthétiques")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=None)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="reruns mesurés par scénario")
+    parser.add_argument('--bench-dir', default=str(BENCH_DIR), help="jeux synthétiques générés (réutilisés)")
+    parser.add_argument('--output', default=str(RESULTS_PATH))
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help="résultats de référence à comparer")
+    parser.add_argument('--save-baseline', action='store_true', help="enregistrer ces résultats comme référence")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.rows, args.scenarios, args.repeat, args.bench_dir)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    print(f"\nRésultats écrits dans {output}")
+    if baseline:
+        print(f"Comparaison avec la référence {baseline_path} ({baseline['timestamp']}) :")
+        for line in compare(results, baseline):
+            print(line)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline = baseline_from(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False))
+        print(f"Référence enregistrée dans {baseline_path}")
+        for n_rows, excluded in baseline['excluded'].items():
+            print(f"{int(n_rows):>11,}  exclus (erreur) : {', '.join(excluded)}")
+
+
+if __name__ == '__main__':
+    main()
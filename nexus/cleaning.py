@@ -0,0 +1,205 @@
+"""
+Nettoyage et enrichissement des ventes brutes, selon les règles du notebook
+(sections « Nettoyage jeu de données » et « Feature Engineering »).
+
+Toutes les opérations sont vectorisées ; `cum_offsets` permet de poursuivre les ventes
+cumulées par point de vente d'un lot de données au suivant. `CleaningState` conserve ce qu'il
+faut de l'historique (empreintes des lignes, cumuls, modalités) pour nettoyer un nouveau lot
+sans relire les ventes déjà traitées.
+"""
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from nexus.features import encode, encoder_categories, lookup, point_totals, sales_points
+
+RAW_COLUMNS = [
+    'Product_ID', 'Sale_Date', 'Sales_Rep', 'Region', 'Sales_Amount', 'Quantity_Sold',
+    'Product_Category', 'Unit_Cost', 'Unit_Price', 'Customer_Type', 'Discount',
+    'Payment_Method', 'Sales_Channel', 'Region_and_Sales_Rep'
+]
+NON_NEGATIVE_COLUMNS = ['Sales_Amount', 'Quantity_Sold', 'Unit_Cost', 'Unit_Price', 'Discount']
+# Ordre des colonnes encodées dans le CSV nettoyé du notebook
+CLEANED_ENCODED_COLUMNS = [
+    'Sales_Rep', 'Region', 'Product_Category', 'Customer_Type',
+    'Payment_Method', 'Sales_Channel', 'Region_and_Sales_Rep'
+]
+
+
+def clean_sales(df, categories=None, cum_offsets=None, drop_duplicates=True):
+    """
+    Applique le nettoyage du notebook : doublons, valeurs négatives, remise ≤ 1, puis ajoute
+    Calculated_Sales, Total_Cost, Profit, Profit_Margin, Cum_Sales_By_Point et les colonnes *_encoded.
+    categories : modalités triées par colonne (codes de LabelEncoder), déduites de `df` par défaut.
+    cum_offsets : ventes déjà cumulées par point de vente avant ce lot.
+    """
+    if drop_duplicates:
+        df = df.drop_duplicates()
+    df = df.copy()
+    df['Sale_Date'] = pd.to_datetime(df['Sale_Date'])
+
+    for col in NON_NEGATIVE_COLUMNS:
+        df[col] = df[col].clip(lower=0)
+    df['Discount'] = df['Discount'].clip(upper=1)
+
+    if 'Region_and_Sales_Rep' not in df.columns:
+        df['Region_and_Sales_Rep'] = sales_points(df)
+
+    df['Calculated_Sales'] = df['Quantity_Sold'] * df['Unit_Price'] * (1 - df['Discount'])
+    df['Total_Cost'] = df['Unit_Cost'] * df['Quantity_Sold']
+    df['Profit'] = df['Sales_Amount'] - df['Total_Cost']
+    df['Profit_Margin'] = df['Profit'] / df['Sales_Amount'].replace(0, np.nan)
+
+    cumulative = df.groupby('Region_and_Sales_Rep', observed=True, sort=False)['Sales_Amount'].cumsum()
+    if cum_offsets:
+        cumulative = cumulative + lookup(df['Region_and_Sales_Rep'], cum_offsets)
+    df['Cum_Sales_By_Point'] = cumulative
+
+    categories = categories or encoder_categories(df, CLEANED_ENCODED_COLUMNS)
+    for col in CLEANED_ENCODED_COLUMNS:
+        df[f"{col}_encoded"] = encode(df[col], categories[col])
+    return df
+
+
+def row_hashes(df):
+    """Empreinte 64 bits de chaque vente brute (indépendante des types : catégorielle ou texte, int ou float)"""
+    data = {}
+    for col in RAW_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if col == 'Sale_Date':
+            values = pd.to_datetime(values).astype('datetime64[ns]')
+        elif pd.api.types.is_numeric_dtype(values):
+            values = values.astype(np.float64)
+        data[col] = values
+    return pd.util.hash_pandas_object(pd.DataFrame(data), index=False).to_numpy()
+
+
+def clean_chunk(df, categories):
+    """
+    Partie parallélisable du nettoyage d'un lot : doublons internes au lot, nettoyage,
+    dérivations et encodage. Retourne (ventes nettoyées, empreintes des lignes brutes conservées) ;
+    Cum_Sales_By_Point y est cumulé depuis le début du lot.
+    """
+    hashes = row_hashes(df)
+    first = np.zeros(len(hashes), dtype=bool)
+    first[np.unique(hashes, return_index=True)[1]] = True
+    if not first.all():
+        df, hashes = df[first], hashes[first]
+    if 'Region_and_Sales_Rep' not in df.columns:
+        df = df.assign(Region_and_Sales_Rep=sales_points(df))
+    return clean_sales(df, categories, drop_duplicates=False), hashes
+
+
+class CleaningState:
+    """
+    État du nettoyage incrémental : empreintes des ventes déjà vues (dédoublonnage d'un lot à
+    l'autre), ventes cumulées par point de vente et modalités encodées.
+    Les nouvelles modalités sont ajoutées en fin de liste : les codes existants ne changent pas.
+
+    Les empreintes (8 octets par vente distincte) sont rangées en suites triées dont chacune fait
+    plus du double de la suivante : un lot de k ventes ne fusionne que des suites de taille
+    comparable à la sienne (coût amorti O(k log n), pas de copie de tout l'historique à chaque
+    lot) et une recherche parcourt au plus log2(n) suites.
+    """
+
+    def __init__(self, seen=None, cum_offsets=None, categories=None):
+        seen = np.unique(np.asarray(seen if seen is not None else [], dtype=np.uint64))
+        self.runs = [seen] if len(seen) else []
+        self.cum_offsets = dict(cum_offsets or {})
+        self.categories = {col: list(values) for col, values in (categories or {}).items()}
+        self.rows = len(seen)
+
+    def __setstate__(self, state):
+        # États enregistrés avant le découpage en suites : une seule suite triée
+        if 'seen' in state:
+            seen = state.pop('seen')
+            state['runs'] = [seen] if len(seen) else []
+        self.__dict__.update(state)
+
+    @property
+    def seen(self):
+        """Empreintes des ventes déjà vues, triées"""
+        if not self.runs:
+            return np.array([], dtype=np.uint64)
+        return np.sort(np.concatenate(self.runs), kind='stable')
+
+    @classmethod
+    def from_frame(cls, df):
+        """État correspondant à des ventes déjà nettoyées (ex. le store existant)"""
+        return cls(np.unique(row_hashes(df)), point_totals(df), encoder_categories(df, CLEANED_ENCODED_COLUMNS))
+
+    def is_new(self, hashes):
+        """Masque des lignes inédites : ni déjà vues, ni doublon d'une ligne précédente du lot"""
+        # Recherches faites sur les empreintes triées du lot : accès mémoire croissants dans chaque suite
+        order = np.argsort(hashes, kind='stable')
+        ordered = hashes[order]
+        known = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            positions = np.searchsorted(run, ordered)
+            positions[positions == len(run)] = 0
+            known |= run[positions] == ordered
+        # Première occurrence de chaque empreinte dans le lot (tri stable : ordre d'arrivée)
+        first = np.r_[True, ordered[1:] != ordered[:-1]] if len(ordered) else np.zeros(0, dtype=bool)
+        new = np.zeros(len(hashes), dtype=bool)
+        new[order] = first & ~known
+        return new
+
+    def extend_categories(self, df):
+        """Ajoute les modalités inconnues de `df` (en fin de liste) et retourne les modalités"""
+        for col in CLEANED_ENCODED_COLUMNS:
+            if col not in df.columns:
+                continue
+            known = self.categories.setdefault(col, [])
+            values = df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].dropna().unique()
+            known_set = set(known)
+            known.extend(sorted(str(v) for v in values if str(v) not in known_set))
+        return self.categories
+
+    def apply(self, df):
+        """Nettoie un lot de ventes brutes dans la continuité de l'historique et met l'état à jour"""
+        if 'Region_and_Sales_Rep' not in df.columns:
+            df = df.assign(Region_and_Sales_Rep=sales_points(df))
+        return self.merge(*clean_chunk(df, self.extend_categories(df)))
+
+    def merge(self, cleaned, hashes):
+        """
+        Partie séquentielle du nettoyage d'un lot déjà passé par `clean_chunk` : écarte les
+        ventes vues dans un lot précédent et poursuit les ventes cumulées par point de vente.
+        """
+        keep = self.is_new(hashes)
+        if not keep.all():
+            cleaned, hashes = cleaned[keep], hashes[keep]
+            cleaned['Cum_Sales_By_Point'] = cleaned.groupby('Region_and_Sales_Rep', observed=True, sort=False)['Sales_Amount'].cumsum()
+        if self.cum_offsets:
+            cleaned['Cum_Sales_By_Point'] += lookup(cleaned['Region_and_Sales_Rep'], self.cum_offsets)
+        for point, total in point_totals(cleaned).items():
+            self.cum_offsets[point] = self.cum_offsets.get(point, 0.0) + total
+        self._add(hashes)
+        return cleaned
+
+    def _add(self, hashes):
+        """Ajoute les empreintes inédites d'un lot, en fusionnant les suites de taille comparable"""
+        if len(hashes) == 0:
+            return
+        run = np.sort(hashes)
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            # Deux suites triées : le tri stable (timsort) les fusionne en temps linéaire
+            run = np.concatenate([self.runs.pop(), run])
+            run.sort(kind='stable')
+        self.runs.append(run)
+        self.rows += len(hashes)
+
+    def save(self, path):
+        path = Path(path)
+        tmp_path = path.with_suffix('.tmp')
+        joblib.dump(self, tmp_path)
+        tmp_path.replace(path)
+        return path
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
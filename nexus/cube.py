@@ -0,0 +1,122 @@
+"""
+Cube d'agrégats pré-calculés pour les KPIs et les regroupements du dashboard.
+
+Chaque cellule du cube correspond à une combinaison
+(jour, Region, Product_Category, Sales_Rep, Customer_Type, Sales_Channel)
+et porte, pour chaque mesure, la somme, la somme des carrés et le nombre de ventes.
+Les pages interrogent le cube au lieu des transactions : le coût d'un rerun dépend
+du nombre de cellules, pas du nombre de lignes.
+"""
+import numpy as np
+import pandas as pd
+
+from nexus.index import FilterIndex
+
+CUBE_DIMENSIONS = ['Sale_Date', 'Region', 'Product_Category', 'Sales_Rep', 'Customer_Type', 'Sales_Channel']
+# Dimension dérivée (fonction de Region et Sales_Rep) : n'ajoute aucune cellule
+DERIVED_DIMENSIONS = ['Region_and_Sales_Rep']
+CUBE_MEASURES = ['Sales_Amount', 'Profit', 'Quantity_Sold']
+CUBE_COLUMNS = CUBE_DIMENSIONS + DERIVED_DIMENSIONS + CUBE_MEASURES
+
+
+def aggregate_cells(df, dimensions, measures):
+    """Agrège des transactions en cellules (somme, somme des carrés, nombre)"""
+    data = pd.DataFrame({dim: df[dim] for dim in dimensions})
+    if 'Sale_Date' in data.columns:
+        data['Sale_Date'] = pd.to_datetime(data['Sale_Date']).dt.normalize()
+    for m in measures:
+        values = df[m].to_numpy(dtype=np.float64)
+        data[f"{m}_sum"] = values
+        data[f"{m}_sumsq"] = values * values
+    data['count'] = 1
+    cells = data.groupby(dimensions, observed=True, sort=False).sum().reset_index()
+    return cells
+
+
+class SalesCube:
+    """Cube matérialisé : cellules agrégées + index bitmap des dimensions filtrables"""
+
+    def __init__(self, cells, dimensions, measures):
+        if 'Sale_Date' in cells.columns:
+            cells = cells.sort_values('Sale_Date', kind='stable', ignore_index=True)
+        self.cells = cells
+        self.dimensions = dimensions
+        self.measures = measures
+        self.index = FilterIndex(cells)
+
+    @classmethod
+    def build(cls, df, dimensions=None, measures=None):
+        """Construit le cube à partir des transactions"""
+        dimensions = [d for d in (dimensions or CUBE_DIMENSIONS + DERIVED_DIMENSIONS) if d in df.columns]
+        measures = [m for m in (measures or CUBE_MEASURES) if m in df.columns]
+        return cls(aggregate_cells(df, dimensions, measures), dimensions, measures)
+
+    def append(self, df):
+        """
+        Nouveau cube intégrant des transactions supplémentaires : seules les nouvelles ventes
+        sont agrégées, puis fusionnées avec les cellules existantes (regroupement limité aux
+        cellules quand des dates se recouvrent).
+        """
+        new_cells = aggregate_cells(df, self.dimensions, self.measures)
+        if new_cells.empty:
+            return self
+        cells = pd.concat([self.cells, new_cells], ignore_index=True)
+        if 'Sale_Date' not in self.dimensions or new_cells['Sale_Date'].min() <= self.cells['Sale_Date'].max():
+            cells = cells.groupby(self.dimensions, observed=True, sort=False).sum().reset_index()
+        # Les modalités nouvelles font perdre le type catégoriel lors de la concaténation
+        for dim in self.dimensions:
+            if dim != 'Sale_Date' and not isinstance(cells[dim].dtype, pd.CategoricalDtype):
+                cells[dim] = cells[dim].astype('category')
+        return SalesCube(cells, self.dimensions, self.measures)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def select(self, selections=None, ranges=None):
+        """Cellules correspondant au filtre de la barre latérale"""
+        rows = self.index.select(selections, ranges)
+        return CubeSlice(self.cells if rows is None else self.cells.take(rows), self.measures)
+
+
+class CubeSlice:
+    """Sous-ensemble de cellules du cube, interrogé par regroupements"""
+
+    def __init__(self, cells, measures):
+        self.cells = cells
+        self.measures = measures
+
+    @property
+    def empty(self):
+        return self.count == 0
+
+    @property
+    def count(self):
+        return int(self.cells['count'].sum())
+
+    def total(self, measure):
+        return float(self.cells[f"{measure}_sum"].sum())
+
+    def mean(self, measure):
+        count = self.count
+        return self.total(measure) / count if count else np.nan
+
+    def std(self, measure):
+        """Écart-type (échantillon) reconstruit à partir des sommes et sommes des carrés"""
+        count = self.count
+        if count < 2:
+            return np.nan
+        total = self.total(measure)
+        sumsq = float(self.cells[f"{measure}_sumsq"].sum())
+        variance = (sumsq - total * total / count) / (count - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def rollup(self, by, measures=None):
+        """
+        Regroupe les cellules selon `by` et renvoie un DataFrame avec une colonne
+        par mesure (somme), plus `count`.
+        """
+        measures = measures or self.measures
+        by = [by] if isinstance(by, str) else list(by)
+        sum_cols = [f"{m}_sum" for m in measures] + ['count']
+        result = self.cells.groupby(by, observed=True)[sum_cols].sum().reset_index()
+        return result.rename(columns={f"{m}_sum": m for m in measures})
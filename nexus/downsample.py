@@ -0,0 +1,98 @@
+"""
+Réduction côté serveur des séries envoyées au navigateur.
+
+Un graphique ne peut pas afficher plus de points que de pixels : les séries temporelles sont
+décimées à la largeur du graphique (LTTB ou min/max par intervalle), et les nuages de points
+volumineux sont remplacés par une grille de densité. La taille du JSON Plotly ne dépend plus
+du nombre de lignes.
+"""
+import numpy as np
+
+# Largeur (px) supposée d'un graphique pleine largeur en mise en page "wide"
+CHART_WIDTH_PX = 1400
+# Au-delà de ce nombre de points, un nuage de points devient une grille de densité
+SCATTER_MAX_POINTS = 5000
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices retenus par Largest-Triangle-Three-Buckets : conserve la forme visuelle de la
+    courbe (pics compris) avec `n_out` points. Les sommets moyens de tous les intervalles sont
+    calculés en une passe ; seul le sommet retenu dans l'intervalle précédent est séquentiel,
+    l'aire de chaque intervalle est une forme linéaire évaluée d'un bloc sur ses points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Sommet "moyen" de l'intervalle suivant chaque intervalle (le dernier point pour le dernier)
+    lengths = np.diff(np.append(edges, n))
+    next_x = np.add.reduceat(x, edges)[1:] / lengths[1:]
+    next_y = np.add.reduceat(y, edges)[1:] / lengths[1:]
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i, (start, stop) in enumerate(zip(edges[:-1].tolist(), edges[1:].tolist())):
+        px, py = x[previous], y[previous]
+        # Aire du triangle (sommet retenu, point, sommet moyen suivant) : |a·y + b·x + c|
+        a, b = px - next_x[i], next_y[i] - py
+        area = np.abs(a * y[start:stop] + b * x[start:stop] - (a * py + b * px))
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Indices du minimum et du maximum de chaque intervalle (n_out / 2 intervalles), entièrement vectorisé"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = max(n_out // 2, 1)
+    y = _as_float(y)
+    starts = np.arange(n_buckets) * n // n_buckets
+    bucket = np.repeat(np.arange(n_buckets), np.diff(np.append(starts, n)))
+    selected = []
+    for reduce in (np.minimum, np.maximum):
+        # Première position de chaque intervalle où la valeur atteint l'extremum
+        hits = np.flatnonzero(y == reduce.reduceat(y, starts)[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        selected.append(hits[first])
+    return np.unique(np.concatenate(selected))
+
+
+def downsample(frame, x, y, width_px=CHART_WIDTH_PX, method='lttb'):
+    """
+    Lignes de `frame` (triées selon `x`) à tracer pour la colonne `y` sur un graphique de
+    `width_px` pixels. Retourne `frame` tel quel s'il tient déjà dans la largeur.
+    """
+    if len(frame) <= width_px:
+        return frame
+    frame = frame[frame[y].notna()]
+    frame = frame.sort_values(x) if not frame[x].is_monotonic_increasing else frame
+    if method == 'minmax':
+        rows = minmax_indices(frame[y].to_numpy(), width_px)
+    else:
+        rows = lttb_indices(frame[x].to_numpy(), frame[y].to_numpy(), width_px)
+    return frame.iloc[rows]
+
+
+def density_grid(x, y, bins=(120, 80)):
+    """
+    Grille de densité d'un nuage de points : (centres x, centres y, effectifs[y, x]).
+    Les cellules vides valent NaN pour rester transparentes.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[finite], y[finite], bins=bins)
+    counts = counts.T
+    counts[counts == 0] = np.nan
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts
+
@@ -0,0 +1,122 @@
+"""
+Simulation prix / volume / remise / coûts par segment, à la maille de la transaction.
+
+Chaque vente est reprojetée à partir de Unit_Price, Unit_Cost, Quantity_Sold et Discount :
+    chiffre d'affaires = Q × (1 + v_s) × P × (1 + p) × (1 - clip(D + d, 0, 1))
+    coûts              = Q × (1 + v_s) × C × (1 + c)
+avec v_s = variation de volume + p × élasticité du segment (Product_Category × Customer_Type).
+
+Les facteurs étant constants dans un segment, les sommes se calculent à partir de tableaux
+préparés une fois par état des filtres : ventes triées par (segment, remise) et sommes cumulées
+de Q×P et Q×P×D. Un déplacement de curseur ne coûte alors qu'une recherche dichotomique par
+segment (remises plafonnées comprises), quel que soit le nombre de transactions.
+"""
+import numpy as np
+import pandas as pd
+
+ELASTICITY_DIMENSIONS = ['Product_Category', 'Customer_Type']
+ELASTICITY_COLUMNS = ELASTICITY_DIMENSIONS + ['Unit_Price', 'Unit_Cost', 'Quantity_Sold', 'Discount']
+WATERFALL_STEPS = ['Effet prix', 'Effet volume', 'Effet remise', 'Effet coûts']
+# Écart entre segments dans la clé de tri (segment × 4 + remise) : les remises restent dans [0, 1]
+_SEGMENT_STRIDE = 4.0
+
+
+class ElasticityModel:
+    """Tableaux groupés par segment d'un état des filtres, réutilisés à chaque mouvement de curseur"""
+
+    def __init__(self, segments, keys, cum_gross, cum_discounted, quantity, cost):
+        self.segments = segments
+        self.keys = keys
+        self.cum_gross = cum_gross
+        self.cum_discounted = cum_discounted
+        self.quantity = quantity
+        self.cost = cost
+        starts = np.searchsorted(keys, np.arange(len(segments)) * _SEGMENT_STRIDE - 1)
+        self._bounds = np.append(starts, len(keys))
+
+    @classmethod
+    def build(cls, df, by=ELASTICITY_DIMENSIONS):
+        """Prépare les tableaux à partir des transactions filtrées (DataFrame ou FilteredView)"""
+        codes = []
+        for dim in by:
+            values = pd.Categorical(df[dim])
+            codes.append((values.codes, values.categories))
+        quantity = np.asarray(df['Quantity_Sold'], dtype=np.float64)
+        gross = quantity * np.asarray(df['Unit_Price'], dtype=np.float64)
+        discount = np.clip(np.nan_to_num(np.asarray(df['Discount'], dtype=np.float64)), 0, 1)
+        cost = quantity * np.asarray(df['Unit_Cost'], dtype=np.float64)
+
+        # Code de segment = combinaison des codes des dimensions (segments vides écartés)
+        segment_id = np.zeros(len(gross), dtype=np.int64)
+        for dim_codes, categories in codes:
+            segment_id = segment_id * len(categories) + dim_codes
+        present, segment_code = np.unique(segment_id, return_inverse=True)
+        labels = {}
+        remaining = present
+        for dim, (_, categories) in reversed(list(zip(by, codes))):
+            labels[dim] = np.asarray(categories)[remaining % len(categories)]
+            remaining = remaining // len(categories)
+        segments = pd.DataFrame({dim: labels[dim] for dim in by})
+
+        keys = segment_code * _SEGMENT_STRIDE + discount
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        weights = gross[order]
+        cum_gross = np.concatenate([[0.0], np.cumsum(weights)])
+        cum_discounted = np.concatenate([[0.0], np.cumsum(weights * discount[order])])
+        n_segments = len(segments)
+        return cls(
+            segments, keys, cum_gross, cum_discounted,
+            np.bincount(segment_code, weights=quantity, minlength=n_segments),
+            np.bincount(segment_code, weights=cost, minlength=n_segments),
+        )
+
+    def _discounted(self, discount_change):
+        """Somme par segment de Q×P×clip(D + d, 0, 1)"""
+        start, stop = self._bounds[:-1], self._bounds[1:]
+        base = np.arange(len(self.segments)) * _SEGMENT_STRIDE
+        # D + d <= 0 -> remise nulle ; D + d >= 1 -> remise totale
+        low = np.searchsorted(self.keys, base + np.clip(-discount_change, -0.5, 1.5), side='right')
+        high = np.searchsorted(self.keys, base + np.clip(1 - discount_change, -0.5, 1.5), side='left')
+        low, high = np.clip(low, start, stop), np.clip(high, start, stop)
+        middle = (self.cum_discounted[high] - self.cum_discounted[low]) + \
+            discount_change * (self.cum_gross[high] - self.cum_gross[low])
+        return middle + (self.cum_gross[stop] - self.cum_gross[high])
+
+    def project(self, price_change=0.0, volume_change=0.0, cost_change=0.0, discount_change=0.0, elasticities=-1.5):
+        """
+        Projection par segment (variations en %, remise en points de %). `elasticities` : valeur
+        unique ou une par segment (ordre de `segments`). Retourne un DataFrame avec chiffre
+        d'affaires, coûts et profit de base et projetés, et les effets du waterfall.
+        """
+        price, volume, cost = price_change / 100, volume_change / 100, cost_change / 100
+        elasticities = np.broadcast_to(np.asarray(elasticities, dtype=np.float64), (len(self.segments),))
+        volume_factor = np.maximum(1 + volume + price * elasticities, 0.0)
+
+        gross = self.cum_gross[self._bounds[1:]] - self.cum_gross[self._bounds[:-1]]
+        base_revenue = gross - self._discounted(0.0)
+        new_revenue_before_price = gross - self._discounted(discount_change / 100)
+
+        result = self.segments.copy()
+        result['Elasticity'] = elasticities
+        result['Base_Revenue'] = base_revenue
+        result['Base_Cost'] = self.cost
+        result['Base_Profit'] = base_revenue - self.cost
+        result['Revenue'] = volume_factor * (1 + price) * new_revenue_before_price
+        result['Cost'] = volume_factor * (1 + cost) * self.cost
+        result['Profit'] = result['Revenue'] - result['Cost']
+        result['Quantity'] = volume_factor * self.quantity
+        # Décomposition séquentielle : prix, puis volume, puis remise, puis coûts
+        result['Effet prix'] = base_revenue * price
+        result['Effet volume'] = (volume_factor - 1) * (base_revenue * (1 + price) - self.cost)
+        result['Effet remise'] = volume_factor * (1 + price) * (new_revenue_before_price - base_revenue)
+        result['Effet coûts'] = -volume_factor * self.cost * cost
+        return result
+
+
+def waterfall(projection):
+    """Étapes (libellé, montant) du waterfall de profit pour un ensemble de segments"""
+    steps = [('Profit de base', projection['Base_Profit'].sum())]
+    steps += [(step, projection[step].sum()) for step in WATERFALL_STEPS]
+    steps.append(('Nouveau profit', projection['Profit'].sum()))
+    return steps
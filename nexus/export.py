@@ -0,0 +1,192 @@
+"""
+Export des ventes filtrées (CSV, CSV gzip, Parquet, Excel), généré à la demande et par blocs.
+
+Les lignes sélectionnées sont extraites du frame par blocs de `chunk_rows` et écrites au fil de
+l'eau dans un fichier temporaire : ni le DataFrame filtré complet ni la chaîne CSV entière ne
+sont construits, la mémoire de génération est bornée par un bloc. Les colonnes float32 du frame
+compact sont ramenées à leurs valeurs décimales d'origine : l'export est identique à celui des
+ventes non compactées.
+
+Le dashboard remet au bouton de téléchargement le fichier lui-même (`export_reader`), pas son
+contenu. Streamlit lit toutefois ce fichier en une fois pour le servir : la taille servie reste
+en mémoire dans Streamlit le temps du téléchargement.
+"""
+import gzip
+import io
+import os
+import tempfile
+
+import numpy as np
+
+from nexus.frame import decimal_values
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+DEFAULT_CHUNK_ROWS = 100_000
+SPOOL_MAX_BYTES = 32 * 1024**2
+# Une feuille Excel contient au plus 1 048 576 lignes, en-tête compris
+EXCEL_MAX_ROWS = 1_048_575
+EXCEL_SHEET_NAME = 'Ventes'
+
+# Format -> (libellé, extension, type MIME)
+EXPORT_FORMATS = {
+    'csv': ("CSV", '.csv', 'text/csv'),
+    'csv.gz': ("CSV compressé (gzip)", '.csv.gz', 'application/gzip'),
+    'parquet': ("Parquet", '.parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ("Excel", '.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def available_formats():
+    """Formats utilisables avec les dépendances installées"""
+    missing = {'parquet': not PYARROW_AVAILABLE, 'xlsx': not XLSXWRITER_AVAILABLE}
+    return [fmt for fmt in EXPORT_FORMATS if not missing.get(fmt)]
+
+
+def iter_frames(view, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Blocs de lignes d'un DataFrame ou d'une FilteredView, sans matérialiser la sélection entière"""
+    df, rows = (view.df, view.rows) if hasattr(view, 'rows') else (view, None)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    n_rows = len(df) if rows is None else len(rows)
+    if n_rows == 0:
+        # Sélection vide : un bloc vide, pour écrire tout de même l'en-tête / le schéma
+        yield df.iloc[:0]
+    for start in range(0, n_rows, chunk_rows):
+        if rows is None:
+            yield df.iloc[start:start + chunk_rows]
+        else:
+            yield df.take(rows[start:start + chunk_rows])
+
+
+def _exact(chunk):
+    """Bloc à exporter : colonnes float32 (frame compact) ramenées à leurs valeurs décimales, en float64"""
+    compacted = [col for col in chunk.columns if chunk[col].dtype == np.float32]
+    if not compacted:
+        return chunk
+    return chunk.assign(**{col: decimal_values(chunk[col].to_numpy()) for col in compacted})
+
+
+def _write_csv(chunks, out):
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(text, header=i == 0, index=False)
+    finally:
+        # Le flux binaire reste ouvert : il est relu puis fermé par l'appelant
+        text.flush()
+        text.detach()
+
+
+def _write_csv_gz(chunks, out):
+    with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6) as compressed:
+        _write_csv(chunks, compressed)
+
+
+def _write_parquet(chunks, out):
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow est requis pour l'export Parquet")
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression='zstd')
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _excel_rows(chunk):
+    """Lignes d'un bloc en valeurs Python (NaN -> cellule vide, catégorielles -> texte)"""
+    values = chunk.astype(object)
+    return values.where(chunk.notna().to_numpy(), None).itertuples(index=False, name=None)
+
+
+def _write_xlsx(chunks, out):
+    if not XLSXWRITER_AVAILABLE:
+        raise ImportError("xlsxwriter est requis pour l'export Excel")
+    # constant_memory : chaque ligne est écrite sur disque dès qu'elle est complète
+    workbook = xlsxwriter.Workbook(out, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+    header = workbook.add_format({'bold': True})
+    sheet, row = None, EXCEL_MAX_ROWS
+    for chunk in chunks:
+        for values in _excel_rows(chunk):
+            if row >= EXCEL_MAX_ROWS:
+                # Au-delà de la limite d'Excel, les lignes continuent sur une nouvelle feuille
+                n_sheets = len(workbook.worksheets())
+                sheet = workbook.add_worksheet(EXCEL_SHEET_NAME if n_sheets == 0 else f"{EXCEL_SHEET_NAME} ({n_sheets + 1})")
+                sheet.write_row(0, 0, list(chunk.columns), header)
+                sheet.freeze_panes(1, 0)
+                row = 0
+            row += 1
+            sheet.write_row(row, 0, values)
+    if sheet is None:
+        workbook.add_worksheet(EXCEL_SHEET_NAME)
+    workbook.close()
+
+
+WRITERS = {'csv': _write_csv, 'csv.gz': _write_csv_gz, 'parquet': _write_parquet, 'xlsx': _write_xlsx}
+
+
+def export_file(view, fmt='csv', columns=None, chunk_rows=DEFAULT_CHUNK_ROWS, spool_max_bytes=SPOOL_MAX_BYTES):
+    """
+    Écrit la sélection au format `fmt` dans un fichier temporaire spoolé, rembobiné.
+    Le fichier est supprimé à sa fermeture.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    out = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes, prefix='nexus_export_')
+    try:
+        WRITERS[fmt]((_exact(chunk) for chunk in iter_frames(view, columns, chunk_rows)), out)
+    except Exception:
+        out.close()
+        raise
+    out.seek(0)
+    return out
+
+
+def export_reader(view, fmt='csv', columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Export écrit sur disque par blocs, rouvert en lecture (`io.BufferedReader`, accepté par
+    `st.download_button`). Le fichier n'a plus de nom dès son ouverture : il disparaît à la
+    fermeture du lecteur (sous Windows, il reste dans le dossier temporaire).
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    fd, path = tempfile.mkstemp(prefix='nexus_export_', suffix=EXPORT_FORMATS[fmt][1])
+    try:
+        with open(fd, 'wb') as out:
+            WRITERS[fmt]((_exact(chunk) for chunk in iter_frames(view, columns, chunk_rows)), out)
+        reader = open(path, 'rb')
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return reader
+
+
+def export_bytes(view, fmt='csv', columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Contenu de l'export en mémoire (petites sélections, tests) ; le fichier temporaire est
+    supprimé aussitôt.
+    """
+    with export_file(view, fmt, columns, chunk_rows) as out:
+        return out.read()
+
+
+def export_name(stem, fmt):
+    return f"{stem}{EXPORT_FORMATS[fmt][1]}"
@@ -0,0 +1,192 @@
+"""
+Construction vectorisée des features du modèle de ventes.
+
+Reproduit les features du notebook (section « Préparation des features pour la modélisation ») :
+features calendaires, coûts et profit dérivés, ventes cumulées par point de vente et encodage
+des catégorielles dans l'ordre de `LabelEncoder` (valeurs triées). Aucune boucle par ligne :
+le même code sert pour une transaction ou pour un carnet de commandes complet.
+
+`FeaturePipeline` regroupe tout ce qui est appris à l'entraînement (modalités encodées,
+médianes de remplacement, scaler, ordre des colonnes, ventes cumulées par point de vente).
+Il est ajusté par le notebook, sauvegardé à côté du modèle et réutilisé tel quel par le dashboard.
+"""
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+NUMERICAL_FEATURES = [
+    'Quantity_Sold', 'Unit_Cost', 'Unit_Price', 'Discount',
+    'Year', 'Month', 'Day', 'DayOfWeek', 'DayOfYear', 'Week',
+    'Total_Cost', 'Profit', 'Profit_Margin', 'Cum_Sales_By_Point'
+]
+ENCODED_COLUMNS = [
+    'Region', 'Sales_Rep', 'Product_Category', 'Customer_Type',
+    'Payment_Method', 'Sales_Channel', 'Region_and_Sales_Rep'
+]
+ENCODED_FEATURES = [f"{col}_encoded" for col in ENCODED_COLUMNS]
+MODEL_FEATURES = NUMERICAL_FEATURES + ENCODED_FEATURES
+
+# Colonnes minimales d'une transaction à scorer
+REQUIRED_COLUMNS = ['Sale_Date', 'Quantity_Sold', 'Unit_Price', 'Unit_Cost', 'Discount']
+
+
+def encoder_categories(df, columns=ENCODED_COLUMNS):
+    """Valeurs triées de chaque colonne catégorielle (ordre des codes de LabelEncoder)"""
+    categories = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        values = df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].dropna().unique()
+        categories[col] = sorted(map(str, values))
+    return categories
+
+
+def encode(values, categories):
+    """Code de chaque valeur dans `categories` (triées), -1 pour une valeur inconnue"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Recodage des seules modalités, puis report sur les codes (pas de conversion ligne à ligne)
+        lookup = pd.Index(categories).get_indexer(values.cat.categories.astype(str))
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, lookup[codes], -1).astype(np.int64)
+    return pd.Categorical(values.astype(str), categories=categories).codes.astype(np.int64)
+
+
+def lookup(values, mapping):
+    """Valeur de `mapping` pour chaque élément de `values` (0 si absente), en float64"""
+    mapping = pd.Series(mapping, dtype=np.float64)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        per_category = mapping.reindex(values.cat.categories.astype(str)).fillna(0).to_numpy()
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, per_category[codes], 0.0)
+    return values.astype(str).map(mapping).fillna(0).to_numpy(dtype=np.float64)
+
+
+def line_sales(df):
+    """Montant de chaque vente : Sales_Amount s'il est connu, sinon quantité × prix × (1 - remise)"""
+    if 'Sales_Amount' in df.columns:
+        return df['Sales_Amount'].astype(np.float64)
+    return df['Quantity_Sold'] * df['Unit_Price'] * (1 - df['Discount'])
+
+
+def sales_points(df):
+    """Point de vente de chaque ligne (Region_and_Sales_Rep, reconstitué si absent) ou None"""
+    if 'Region_and_Sales_Rep' in df.columns:
+        return df['Region_and_Sales_Rep']
+    if {'Region', 'Sales_Rep'} <= set(df.columns):
+        return df['Region'].astype(str) + '-' + df['Sales_Rep'].astype(str)
+    return None
+
+
+def point_totals(df):
+    """Ventes totales par point de vente (Region_and_Sales_Rep)"""
+    points = sales_points(df)
+    if points is None:
+        return {}
+    return line_sales(df).groupby(points.astype(str)).sum().to_dict()
+
+
+def build_features(df, categories, cum_offsets=None, fill_values=None):
+    """
+    Construit la matrice de features du modèle (colonnes dans l'ordre MODEL_FEATURES).
+    cum_offsets : ventes cumulées connues par point de vente, ajoutées à Cum_Sales_By_Point
+    quand la colonne est absente (transactions postérieures à l'historique).
+    fill_values : valeurs de remplacement des manquants par feature (0 par défaut).
+    """
+    X = raw_features(df, categories, cum_offsets)
+    if fill_values is not None:
+        X = X.fillna(fill_values)
+    return X.fillna(0)
+
+
+def raw_features(df, categories, cum_offsets=None):
+    """Features du modèle avant remplacement des manquants (valeurs infinies -> NaN)"""
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+
+    dates = pd.to_datetime(df['Sale_Date'])
+    X = pd.DataFrame(index=df.index)
+    for col in ['Quantity_Sold', 'Unit_Cost', 'Unit_Price', 'Discount']:
+        X[col] = df[col].astype(np.float64)
+    X['Year'] = dates.dt.year
+    X['Month'] = dates.dt.month
+    X['Day'] = dates.dt.day
+    X['DayOfWeek'] = dates.dt.dayofweek
+    X['DayOfYear'] = dates.dt.dayofyear
+    X['Week'] = dates.dt.isocalendar().week.astype(np.int64)
+
+    X['Total_Cost'] = df['Total_Cost'] if 'Total_Cost' in df.columns else X['Unit_Cost'] * X['Quantity_Sold']
+    points = sales_points(df)
+    if points is not None and 'Region_and_Sales_Rep' not in df.columns:
+        df = df.assign(Region_and_Sales_Rep=points)
+    revenue = line_sales(df)
+    X['Profit'] = df['Profit'] if 'Profit' in df.columns else revenue - X['Total_Cost']
+    if 'Profit_Margin' in df.columns:
+        X['Profit_Margin'] = df['Profit_Margin']
+    else:
+        X['Profit_Margin'] = X['Profit'] / revenue.replace(0, np.nan)
+
+    if 'Cum_Sales_By_Point' in df.columns:
+        X['Cum_Sales_By_Point'] = df['Cum_Sales_By_Point']
+    elif points is not None:
+        cumulative = revenue.groupby(points, observed=True, sort=False).cumsum()
+        if cum_offsets is not None:
+            cumulative = cumulative + lookup(points, cum_offsets)
+        X['Cum_Sales_By_Point'] = cumulative
+    else:
+        X['Cum_Sales_By_Point'] = 0.0
+
+    for col, feature in zip(ENCODED_COLUMNS, ENCODED_FEATURES):
+        if col in df.columns and col in categories:
+            X[feature] = encode(df[col], categories[col])
+        else:
+            X[feature] = -1
+
+    X = X[MODEL_FEATURES].astype(np.float64)
+    return X.replace([np.inf, -np.inf], np.nan)
+
+
+class FeaturePipeline:
+    """Transformation ajustée transactions -> matrice du modèle, identique à l'entraînement et à l'inférence"""
+
+    def __init__(self, categories, scaler=None, fill_values=None, cum_offsets=None):
+        self.categories = categories
+        self.scaler = scaler
+        self.fill_values = fill_values
+        self.cum_offsets = cum_offsets or {}
+        self.features = list(MODEL_FEATURES)
+        self.numerical_features = list(NUMERICAL_FEATURES)
+
+    @classmethod
+    def fit(cls, df, scale_rows=None):
+        """
+        Ajuste le pipeline comme le notebook : encodeurs et médianes sur tout `df`,
+        scaler sur les lignes d'entraînement `scale_rows` (masque booléen, toutes par défaut).
+        """
+        categories = encoder_categories(df)
+        X = raw_features(df, categories)
+        fill_values = X.median()
+        X = X.fillna(fill_values)
+        scaler = StandardScaler().fit(X.loc[scale_rows if scale_rows is not None else X.index, NUMERICAL_FEATURES])
+        return cls(categories, scaler, fill_values, point_totals(df))
+
+    def transform(self, df, cum_offsets=None, scale=True):
+        """Matrice de features (DataFrame, colonnes dans l'ordre du modèle), mise à l'échelle"""
+        offsets = self.cum_offsets if cum_offsets is None else cum_offsets
+        X = build_features(df, self.categories, offsets, self.fill_values)
+        if scale and self.scaler is not None:
+            X[self.numerical_features] = self.scaler.transform(X[self.numerical_features])
+        return X[self.features]
+
+    def predict(self, model, df, cum_offsets=None):
+        """Prédictions du modèle pour une ou plusieurs transactions, en un seul appel"""
+        return np.asarray(model.predict(self.transform(df, cum_offsets)), dtype=np.float64)
+
+    def save(self, path):
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
@@ -0,0 +1,69 @@
+"""
+Encodage compact des figures Plotly mises en cache par le dashboard.
+
+Une figure est mise en cache sous forme d'objet `go.Figure` reconstruit depuis son dict compact,
+identifiée par (graphique, empreinte des filtres, version des données) : un rerun qui ne change
+pas ces paramètres ne reconstruit ni ne revalide la figure. `st.plotly_chart` revalide un dict à
+chaque affichage mais reprend tel quel un objet Figure, qu'il ne fait que sérialiser.
+Plotly transmet déjà les tableaux NumPy en tableaux typés base64 ; les grands tableaux de
+flottants sont en plus ramenés en float32, ce qui divise par deux leur poids dans le cache comme
+dans le JSON envoyé au navigateur.
+"""
+import base64
+
+import numpy as np
+import plotly.graph_objects as go
+
+# En dessous de cette taille, les tableaux restent en float64 (courbes décimées, petits agrégats)
+COMPACT_MIN_SIZE = 2_000
+
+
+def _is_typed_array(value):
+    return isinstance(value, dict) and 'bdata' in value and 'dtype' in value
+
+
+def _compact_array(spec, min_size):
+    """Tableau typé base64 float64 -> float32 (au-delà de `min_size` valeurs)"""
+    if spec['dtype'] != 'f8':
+        return spec
+    values = np.frombuffer(base64.b64decode(spec['bdata']), dtype=np.float64)
+    if values.size < min_size:
+        return spec
+    # Au-delà de la plage float32, les valeurs resteraient infinies : pas de conversion
+    finite = values[np.isfinite(values)]
+    if finite.size and np.abs(finite).max() > np.finfo(np.float32).max:
+        return spec
+    return {**spec, 'dtype': 'f4', 'bdata': base64.b64encode(values.astype(np.float32)).decode('ascii')}
+
+
+def _compact(value, min_size):
+    if _is_typed_array(value):
+        return _compact_array(value, min_size)
+    if isinstance(value, np.ndarray) and value.dtype.kind == 'f' and value.ndim == 1 and value.size >= min_size:
+        return {'dtype': 'f4', 'bdata': base64.b64encode(value.astype(np.float32)).decode('ascii')}
+    if isinstance(value, dict):
+        return {key: _compact(item, min_size) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_compact(item, min_size) for item in value]
+    return value
+
+
+def compact_figure(fig, min_size=COMPACT_MIN_SIZE):
+    """Dict de la figure (validée une fois par Plotly), grands tableaux de flottants en float32"""
+    spec = fig.to_dict() if hasattr(fig, 'to_dict') else fig
+    return {key: _compact(value, min_size) for key, value in spec.items()}
+
+
+def cached_form(fig, min_size=COMPACT_MIN_SIZE):
+    """Figure à mettre en cache : validée une seule fois, ici, à partir de son dict compact"""
+    return go.Figure(compact_figure(fig, min_size))
+
+
+def figure_title(spec):
+    """Titre d'une figure (objet Plotly ou dict), ou type de sa première trace"""
+    if hasattr(spec, 'layout'):
+        return spec.layout.title.text or (spec.data[0].type if spec.data else 'figure')
+    title = spec.get('layout', {}).get('title', {})
+    title = title.get('text') if isinstance(title, dict) else title
+    data = spec.get('data') or [{}]
+    return title or data[0].get('type', 'figure')
@@ -0,0 +1,209 @@
+"""
+Prévision des ventes journalières.
+
+Deux familles de modèles :
+- les modèles de séries temporelles pré-entraînés par le notebook (ARIMA, Prophet),
+  servis par le registre de modèles (`nexus.registry`) et utilisés en inférence seule ;
+- le modèle GradientBoosting entraîné sur l'agrégat journalier de la sélection courante,
+  conservé dans un `ModelCache` : faire varier l'horizon ne relance que `predict`
+  sur les dates qui n'ont pas encore été prévues, jamais l'entraînement.
+
+Toutes les prévisions ont le même format : Sale_Date, Predicted_Sales, Lower, Upper.
+"""
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from sklearn.ensemble import GradientBoostingRegressor
+
+try:
+    import statsmodels  # noqa: F401
+    STATSMODELS_AVAILABLE = True
+except ImportError:
+    STATSMODELS_AVAILABLE = False
+
+try:
+    import prophet  # noqa: F401
+    PROPHET_AVAILABLE = True
+except ImportError:
+    PROPHET_AVAILABLE = False
+
+FORECAST_FEATURES = ['DayOfYear', 'Year', 'DayOfWeek']
+
+# Modèles pré-entraînés par le notebook : nom affiché -> nom dans le registre
+PRETRAINED_FORECASTERS = {
+    'ARIMA': 'arima_model',
+    'Prophet': 'prophet_model',
+}
+
+
+def calendar_features(dates):
+    """Features calendaires utilisées par le modèle de prévision"""
+    dates = pd.DatetimeIndex(dates)
+    return pd.DataFrame({
+        'DayOfYear': dates.dayofyear,
+        'Year': dates.year,
+        'DayOfWeek': dates.dayofweek,
+    })
+
+
+class DailyForecaster:
+    """Modèle de prévision entraîné + prévisions déjà calculées (réutilisées par horizon)"""
+
+    # Format persisté (cache disque des prévisions) : un fichier d'une autre version est reconstruit
+    VERSION = 2
+
+    def __init__(self, model, last_date, residual_std=0.0):
+        self.model = model
+        self.last_date = pd.Timestamp(last_date)
+        self.residual_std = residual_std
+        self.predictions = pd.Series(dtype='float64')
+        # Instance partagée entre les sessions (cache de modèles) : extension des prévisions exclusive
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = {key: value for key, value in self.__dict__.items() if key != '_lock'}
+        return {**state, 'version': self.VERSION}
+
+    def __setstate__(self, state):
+        version = state.pop('version', None)
+        if version != self.VERSION:
+            # ModelCache supprime l'entrée illisible et relance l'entraînement
+            raise ValueError(f"Prévisionniste persisté au format {version}, attendu {self.VERSION} : à reconstruire")
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fit(cls, daily, n_estimators=200, random_state=42):
+        """Entraîne le modèle sur un DataFrame journalier (Sale_Date, Sales_Amount)"""
+        model = GradientBoostingRegressor(n_estimators=n_estimators, random_state=random_state)
+        X = calendar_features(daily['Sale_Date'])
+        model.fit(X, daily['Sales_Amount'])
+        # Dispersion des résidus d'entraînement, utilisée pour l'intervalle de confiance
+        residuals = daily['Sales_Amount'].to_numpy() - model.predict(X)
+        residual_std = float(np.std(residuals, ddof=1)) if len(residuals) > 1 else 0.0
+        return cls(model, daily['Sale_Date'].max(), residual_std)
+
+    def forecast(self, horizon, level=0.95):
+        """Prévisions pour les `horizon` jours suivant la dernière date observée"""
+        with self._lock:
+            predictions = self.predictions
+            if horizon > len(predictions):
+                new_dates = pd.date_range(self.last_date + pd.Timedelta(days=len(predictions) + 1),
+                                          periods=horizon - len(predictions), freq='D')
+                new_pred = pd.Series(self.model.predict(calendar_features(new_dates)), index=new_dates)
+                predictions = pd.concat([predictions, new_pred]) if len(predictions) else new_pred
+                self.predictions = predictions
+        result = predictions.iloc[:horizon]
+        margin = norm.ppf(0.5 + level / 2) * self.residual_std
+        return pd.DataFrame({
+            'Sale_Date': result.index,
+            'Predicted_Sales': result.to_numpy(),
+            'Lower': result.to_numpy() - margin,
+            'Upper': result.to_numpy() + margin,
+        })
+
+
+class ArimaForecaster:
+    """
+    Modèle ARIMA pré-entraîné (statsmodels). Les ventes observées après la fin de
+    l'entraînement sont intégrées par filtrage (`extend`, paramètres figés), sans ré-estimation.
+    """
+
+    def __init__(self, results, last_date):
+        self.results = results
+        self.last_date = pd.Timestamp(last_date)
+        self._extended = (None, results)
+        # Instance partagée entre les sessions (registre de modèles) : extension et prévision exclusives
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key != '_lock'}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fit(cls, daily, order=(1, 1, 1)):
+        """Entraîne un ARIMA sur une série journalière (Series indexée par date)"""
+        from statsmodels.tsa.arima.model import ARIMA
+        daily = daily.asfreq('D', fill_value=0.0)
+        return cls(ARIMA(daily, order=order).fit(), daily.index[-1])
+
+    @classmethod
+    def from_results(cls, results):
+        """Résultats statsmodels persistés par le notebook : dernière date des valeurs ajustées"""
+        return cls(results, results.fittedvalues.index[-1])
+
+    def _results_for(self, history):
+        new_obs = history[history.index > self.last_date]
+        if new_obs.empty:
+            return self.results
+        dates = pd.date_range(self.last_date + pd.Timedelta(days=1), new_obs.index.max(), freq='D')
+        new_obs = new_obs.reindex(dates, fill_value=0.0)
+        key = (dates[-1], float(new_obs.sum()))
+        cached_key, cached_results = self._extended
+        if cached_key != key:
+            cached_results = self.results.extend(new_obs)
+            self._extended = (key, cached_results)
+        return cached_results
+
+    def forecast(self, history, horizon, level=0.95):
+        """Prévisions à `horizon` jours après la dernière date de `history` (Series journalière)"""
+        with self._lock:
+            frame = self._results_for(history).get_forecast(horizon).summary_frame(alpha=1 - level)
+        return pd.DataFrame({
+            'Sale_Date': frame.index,
+            'Predicted_Sales': frame['mean'].to_numpy(),
+            'Lower': frame['mean_ci_lower'].to_numpy(),
+            'Upper': frame['mean_ci_upper'].to_numpy(),
+        })
+
+
+class ProphetForecaster:
+    """Modèle Prophet pré-entraîné ; le niveau de l'intervalle est fixé à l'entraînement"""
+
+    def __init__(self, model):
+        self.model = model
+        self.last_date = pd.Timestamp(model.history_dates.max())
+
+    @property
+    def interval_width(self):
+        return self.model.interval_width
+
+    def forecast(self, history, horizon, level=None):
+        """Prévisions à `horizon` jours après la dernière date connue"""
+        start = max(self.last_date, pd.Timestamp(history.index.max())) + pd.Timedelta(days=1)
+        future = pd.DataFrame({'ds': pd.date_range(start, periods=horizon, freq='D')})
+        pred = self.model.predict(future)
+        return pd.DataFrame({
+            'Sale_Date': pred['ds'].to_numpy(),
+            'Predicted_Sales': pred['yhat'].to_numpy(),
+            'Lower': pred['yhat_lower'].to_numpy(),
+            'Upper': pred['yhat_upper'].to_numpy(),
+        })
+
+
+def load_arima(path):
+    """Charge le modèle ARIMA persisté par le notebook"""
+    if not STATSMODELS_AVAILABLE:
+        raise ImportError("statsmodels est requis pour le modèle ARIMA")
+    model = joblib.load(path)
+    return model if isinstance(model, ArimaForecaster) else ArimaForecaster.from_results(model)
+
+
+def load_prophet(path):
+    """Charge le modèle Prophet persisté par le notebook"""
+    if not PROPHET_AVAILABLE:
+        raise ImportError("prophet est requis pour le modèle Prophet")
+    return ProphetForecaster(joblib.load(path))
+
+
+# Chargeurs à déclarer dans le registre de modèles
+FORECASTER_LOADERS = {
+    'arima_model': load_arima,
+    'prophet_model': load_prophet,
+}
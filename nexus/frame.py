@@ -0,0 +1,167 @@
+"""
+Représentation compacte et partagée du tableau des ventes.
+
+Le DataFrame chargé depuis le store est compacté une seule fois (catégorielles,
+numériques réduits) puis écrit au format Arrow IPC non compressé. Chaque processus
+Streamlit ouvre ce fichier en mémoire mappée : les colonnes numériques et les dates
+sont des vues directes sur le fichier, de sorte que plusieurs workers d'une même
+machine partagent une seule copie physique (page cache de l'OS).
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from nexus.store import CATEGORICAL_COLS, DATA_DIR, STORE_PATH, data_version, load_sales, store_is_fresh
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+FRAME_PATH = DATA_DIR / 'cache' / 'sales_frame.arrow'
+# Version du format mappé : l'incrémenter force la reconstruction des fichiers existants
+FRAME_FORMAT = 3
+# Une colonne décimale passe en float32 si chaque valeur s'en déduit à nouveau (au plus 6 décimales)
+FLOAT32_MAX_DECIMALS = 6
+# Les premières valeurs suffisent souvent à écarter une colonne trop précise pour le float32
+_FLOAT32_PROBE_ROWS = 100_000
+
+
+def decimal_values(values, max_decimals=FLOAT32_MAX_DECIMALS):
+    """
+    float32 -> float64 : pour chaque valeur, le décimal le plus court (au plus `max_decimals`
+    décimales) qui redonne ce float32, soit la valeur d'origine d'une colonne compactée.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    wide = values.astype(np.float64)
+    result = wide.copy()
+    pending = np.flatnonzero(np.isfinite(wide))
+    for decimals in range(max_decimals + 1):
+        if len(pending) == 0:
+            break
+        rounded = np.round(wide[pending], decimals)
+        found = rounded.astype(np.float32) == values[pending]
+        result[pending[found]] = rounded[found]
+        pending = pending[~found]
+    return result
+
+
+def fits_float32(values):
+    """Vrai si le passage en float32 puis `decimal_values` restitue exactement chaque valeur"""
+    values = np.asarray(values, dtype=np.float64)
+    for sample in (values[:_FLOAT32_PROBE_ROWS], values):
+        if not np.array_equal(decimal_values(sample.astype(np.float32)), sample, equal_nan=True):
+            return False
+    return True
+
+
+def compact_frame(df):
+    """
+    Convertit les textes en catégorielles, réduit les numériques et trie par date. Une colonne de
+    flottants ne passe en float32 que si ses valeurs décimales y survivent (prix, montants à deux
+    décimales) ; les cumuls et ratios plus précis restent en float64.
+    """
+    if 'Sale_Date' in df.columns:
+        # Ordre chronologique : un filtre de dates devient une tranche contiguë de lignes
+        df = df.sort_values('Sale_Date', kind='stable')
+    compact = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for col in df.columns:
+        series = df[col].reset_index(drop=True)
+        if col in CATEGORICAL_COLS or series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            # Region_and_Sales_Rep : codes entiers + dictionnaire des points de vente
+            compact[col] = series.astype('category')
+        elif pd.api.types.is_float_dtype(series.dtype):
+            compact[col] = series.astype(np.float32 if fits_float32(series) else np.float64)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            compact[col] = pd.to_numeric(series, downcast='integer')
+        else:
+            compact[col] = series
+    return compact
+
+
+def memory_footprint(df):
+    """Empreinte mémoire (octets) du DataFrame, chaînes comprises"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def plain_footprint(df):
+    """Empreinte mémoire qu'aurait le DataFrame avec des chaînes Python et des float64"""
+    total = int(df.index.memory_usage(deep=True))
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            series = series.astype(np.float64 if pd.api.types.is_float_dtype(series.dtype) else np.int64)
+        total += int(series.memory_usage(deep=True, index=False))
+    return total
+
+
+def write_frame(df, frame_path=FRAME_PATH):
+    """Écrit le DataFrame compacté en Arrow IPC non compressé (mappable en mémoire)"""
+    frame_path = Path(frame_path)
+    frame_path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Écriture atomique : les workers déjà ouverts gardent leur mapping sur l'ancien fichier
+    tmp_path = frame_path.with_name(f"{frame_path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, frame_path)
+    return frame_path
+
+
+def open_frame(columns=None, frame_path=FRAME_PATH):
+    """Ouvre le fichier Arrow en mémoire mappée et ne matérialise que les colonnes demandées"""
+    source = pa.memory_map(str(frame_path), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    # split_blocks évite la consolidation pandas, qui copierait les colonnes mappées
+    return table.to_pandas(split_blocks=True)
+
+
+def frame_is_fresh(frame_path=FRAME_PATH, store_path=STORE_PATH):
+    """Vrai si le fichier mappé correspond à la version courante du store Parquet"""
+    frame_path, store_path = Path(frame_path), Path(store_path)
+    if not frame_path.exists():
+        return False
+    footprint = read_footprint(frame_path)
+    if not footprint or footprint.get('format') != FRAME_FORMAT:
+        return False
+    if not store_path.exists():
+        return True
+    # La version change dès qu'un fichier est ajouté au store (ingestion incrémentale)
+    return store_is_fresh(store_path=store_path) and footprint.get('data_version') == data_version(store_path=store_path)
+
+
+def load_compact_sales(columns=None, frame_path=FRAME_PATH):
+    """
+    Charge les ventes sous forme compacte et mappée en mémoire.
+    Le fichier Arrow est (re)construit depuis le store quand il manque ou est périmé.
+    """
+    if not PYARROW_AVAILABLE:
+        return compact_frame(load_sales(columns))
+    if not frame_is_fresh(frame_path):
+        raw = load_sales()
+        compact = compact_frame(raw)
+        write_frame(compact, frame_path)
+        # Rapport d'empreinte mémoire avant / après compaction
+        footprint = {'format': FRAME_FORMAT, 'rows': len(raw), 'raw_bytes': plain_footprint(raw), 'compact_bytes': memory_footprint(compact),
+                     'data_version': data_version()}
+        Path(frame_path).with_suffix('.json').write_text(json.dumps(footprint, indent=2))
+        del raw, compact
+    return open_frame(columns, frame_path)
+
+
+def read_footprint(frame_path=FRAME_PATH):
+    """Lit le rapport d'empreinte mémoire écrit lors de la construction du fichier mappé"""
+    path = Path(frame_path).with_suffix('.json')
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
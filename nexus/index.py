@@ -0,0 +1,157 @@
+"""
+Index de filtrage pour la barre latérale.
+
+L'index est construit une fois par jeu de données :
+- une bitmap compressée (1 bit par ligne) par valeur de chaque dimension catégorielle ;
+- un ordre trié pour chaque dimension d'intervalle (dates), résolu par recherche dichotomique.
+
+Un filtre se résout par OU des bitmaps d'une même dimension puis ET entre dimensions ;
+les pages reçoivent une vue légère (`FilteredView`) au lieu d'une copie du DataFrame.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FILTER_DIMENSIONS = ['Region', 'Product_Category', 'Sales_Channel', 'Customer_Type']
+RANGE_DIMENSIONS = ['Sale_Date']
+
+
+class FilterIndex:
+    """Bitmaps par valeur et intervalles triés, construits une seule fois par jeu de données"""
+
+    def __init__(self, df, dimensions=FILTER_DIMENSIONS, range_dimensions=RANGE_DIMENSIONS, cache_size=32):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        self.categories = {}
+        for dim in dimensions:
+            if dim not in df.columns:
+                continue
+            values = df[dim].astype('category')
+            codes = values.cat.codes.to_numpy()
+            self.categories[dim] = list(values.cat.categories)
+            self.bitmaps[dim] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(self.categories[dim])
+            }
+
+        self.ranges = {}
+        for dim in range_dimensions:
+            if dim not in df.columns:
+                continue
+            values = df[dim].to_numpy()
+            if pd.Index(values).is_monotonic_increasing:
+                order = None  # Déjà trié : un intervalle est une tranche contiguë de lignes
+                sorted_values = values
+            else:
+                order = np.argsort(values, kind='stable')
+                sorted_values = values[order]
+            self.ranges[dim] = (sorted_values, order)
+
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+
+    @property
+    def dimensions(self):
+        return list(self.bitmaps)
+
+    def values(self, dim):
+        """Valeurs possibles d'une dimension catégorielle"""
+        return self.categories[dim]
+
+    def bounds(self, dim):
+        """Bornes (min, max) d'une dimension d'intervalle"""
+        sorted_values = self.ranges[dim][0]
+        return sorted_values[0], sorted_values[-1]
+
+    def _range_bitmap(self, dim, low, high):
+        sorted_values, order = self.ranges[dim]
+        start = np.searchsorted(sorted_values, np.asarray(low, dtype=sorted_values.dtype), side='left')
+        stop = np.searchsorted(sorted_values, np.asarray(high, dtype=sorted_values.dtype), side='right')
+        mask = np.zeros(self.n_rows, dtype=bool)
+        if order is None:
+            mask[start:stop] = True
+        else:
+            mask[order[start:stop]] = True
+        return np.packbits(mask)
+
+    def select(self, selections=None, ranges=None):
+        """
+        Retourne les indices de lignes correspondant au filtre, ou None si tout est sélectionné.
+        selections : {dimension: valeurs retenues} ; ranges : {dimension: (borne basse, borne haute)}
+        """
+        selections = selections or {}
+        ranges = ranges or {}
+        key = (
+            tuple(sorted((dim, tuple(sorted(map(str, vals)))) for dim, vals in selections.items())),
+            tuple(sorted((dim, str(low), str(high)) for dim, (low, high) in ranges.items())),
+        )
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        result = None
+        for dim, selected in selections.items():
+            if dim not in self.bitmaps:
+                continue
+            selected = set(selected)
+            if selected.issuperset(self.categories[dim]):
+                continue  # Dimension non filtrante
+            dim_bitmap = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for value in selected:
+                if value in self.bitmaps[dim]:
+                    dim_bitmap |= self.bitmaps[dim][value]
+            result = dim_bitmap if result is None else result & dim_bitmap
+
+        for dim, (low, high) in ranges.items():
+            if dim not in self.ranges:
+                continue
+            range_min, range_max = self.bounds(dim)
+            if low <= range_min and high >= range_max:
+                continue
+            dim_bitmap = self._range_bitmap(dim, low, high)
+            result = dim_bitmap if result is None else result & dim_bitmap
+
+        rows = None
+        if result is not None:
+            rows = np.flatnonzero(np.unpackbits(result, count=self.n_rows))
+
+        self._cache[key] = rows
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return rows
+
+
+class FilteredView:
+    """Vue filtrée d'un DataFrame : seules les colonnes demandées sont extraites"""
+
+    def __init__(self, df, rows=None):
+        self.df = df
+        self.rows = rows
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.df) if self.rows is None else len(self.rows)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def columns(self):
+        return self.df.columns
+
+    def __getitem__(self, col):
+        if col not in self._columns:
+            series = self.df[col]
+            if self.rows is not None:
+                series = series.take(self.rows)
+            self._columns[col] = series
+        return self._columns[col]
+
+    def frame(self, columns=None):
+        """Matérialise les lignes filtrées pour les colonnes demandées uniquement"""
+        columns = list(self.df.columns) if columns is None else [col for col in columns if col in self.df.columns]
+        if self.rows is None:
+            return self.df[columns]
+        return self.df[columns].take(self.rows)
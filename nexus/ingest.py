@@ -0,0 +1,184 @@
+"""
+Ingestion incrémentale des nouvelles ventes.
+
+Les fichiers de ventes brutes (CSV ou Parquet, schéma de `sales_data.csv`) déposés dans
+`output/data/incoming/` sont nettoyés avec les règles du notebook dans la continuité de
+l'historique (doublons écartés d'un lot à l'autre, Cum_Sales_By_Point poursuivi par point de
+vente, codes des catégorielles inchangés), puis ajoutés au store Parquet sans le réécrire.
+Le dashboard met son cube d'agrégats à jour en n'agrégeant que les fichiers ajoutés.
+
+    python -m nexus.ingest            # traite les fichiers en attente puis s'arrête
+    python -m nexus.ingest --watch    # surveille le dossier de dépôt
+"""
+import argparse
+import hashlib
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from nexus.batch import iter_chunks
+from nexus.cleaning import RAW_COLUMNS, CleaningState
+from nexus.cube import CUBE_COLUMNS
+from nexus.store import DATA_DIR, STORE_PATH, append_store, load_sales, read_store_files, store_files
+
+DROP_DIR = DATA_DIR / 'incoming'
+STATE_PATH = DATA_DIR / 'ingest_state.joblib'
+INGEST_SUFFIXES = ('.csv', '.parquet')
+
+
+def file_digest(path, block_size=1024**2):
+    """Empreinte du contenu d'un fichier déposé (nomme les fichiers qu'il ajoute au store)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class Ingestor:
+    """Nettoie et ajoute au store les fichiers du dossier de dépôt, un fichier à la fois"""
+
+    def __init__(self, drop_dir=DROP_DIR, store_path=STORE_PATH, state_path=STATE_PATH):
+        self.drop_dir = Path(drop_dir)
+        self.store_path = Path(store_path)
+        self.state_path = Path(state_path)
+        self._state = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """État du nettoyage : relu depuis le disque, ou reconstitué une fois à partir du store"""
+        if self._state is None:
+            if self.state_path.exists():
+                self._state = CleaningState.load(self.state_path)
+            else:
+                self._state = CleaningState.from_frame(load_sales(RAW_COLUMNS, store_path=self.store_path))
+                self._state.save(self.state_path)
+        return self._state
+
+    def pending_files(self):
+        """Fichiers en attente, du plus ancien au plus récent"""
+        if not self.drop_dir.is_dir():
+            return []
+        files = [p for p in self.drop_dir.iterdir() if p.is_file() and p.suffix.lower() in INGEST_SUFFIXES]
+        return sorted(files, key=lambda p: (p.stat().st_mtime_ns, p.name))
+
+    def ingest_file(self, path):
+        """
+        Ingère un fichier : retourne le nombre de ventes ajoutées.
+        Le fichier est ensuite déplacé dans `processed/` (ou `rejected/` en cas d'erreur).
+        Les fichiers ajoutés au store sont nommés d'après le contenu du fichier déposé : après un
+        arrêt entre l'écriture des ventes et celle de l'état, la reprise remplace ces fichiers
+        au lieu d'en ajouter des doublons.
+        """
+        with self._lock:
+            try:
+                raw = pd.concat([chunk for chunk, _ in iter_chunks(path, path.name)], ignore_index=True)
+                missing = [col for col in RAW_COLUMNS if col not in raw.columns and col != 'Region_and_Sales_Rep']
+                if missing:
+                    raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+                cleaned = self.state.apply(raw[[col for col in RAW_COLUMNS if col in raw.columns]])
+                if len(cleaned):
+                    name = f"ingest-{file_digest(path)}-{path.stem}"
+                    # Fichiers d'une ingestion interrompue de ce même contenu : remplacés, pas dupliqués
+                    for stale in store_files(self.store_path):
+                        if stale.name.startswith(f"{name}-"):
+                            stale.unlink()
+                    append_store(cleaned, name, self.store_path)
+                # L'état n'est sauvegardé qu'une fois les ventes écrites dans le store
+                self.state.save(self.state_path)
+            except Exception:
+                # État en mémoire éventuellement modifié : relu depuis le disque au prochain fichier
+                self._state = None
+                self._archive(path, 'rejected')
+                raise
+            self._archive(path, 'processed')
+            return len(cleaned)
+
+    def _archive(self, path, folder):
+        target = self.drop_dir / folder
+        target.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), target / path.name)
+
+    def poll(self):
+        """Ingère tous les fichiers en attente -> {nom du fichier: ventes ajoutées ou erreur}"""
+        results = {}
+        for path in self.pending_files():
+            try:
+                results[path.name] = self.ingest_file(path)
+            except Exception as e:
+                results[path.name] = e
+        return results
+
+    def watch(self, interval=5.0, stop_event=None, callback=None):
+        """Surveille le dossier de dépôt jusqu'à `stop_event` ; `callback(résultats)` après chaque ingestion"""
+        self.drop_dir.mkdir(parents=True, exist_ok=True)
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            results = self.poll()
+            if results and callback is not None:
+                callback(results)
+            stop_event.wait(interval)
+
+
+class LiveCube:
+    """
+    Cube d'agrégats tenu à jour à partir des fichiers ajoutés au store : seuls les fichiers
+    inconnus sont lus (colonnes `columns`) et agrégés, les cellules existantes ne sont pas recalculées.
+    Convient à tout cube exposant `append` (SalesCube, MomentCube).
+    """
+
+    def __init__(self, cube, files=None, store_path=STORE_PATH, columns=CUBE_COLUMNS):
+        self.cube = cube
+        # None : cube construit hors store (données de démo), pas de mise à jour
+        self.files = None if files is None else set(files)
+        self.store_path = store_path
+        self.columns = columns
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Intègre les nouveaux fichiers du store et retourne le cube courant"""
+        if self.files is None:
+            return self.cube
+        with self._lock:
+            new_files = [path for path in store_files(self.store_path) if path not in self.files]
+            if new_files:
+                self.cube = self.cube.append(read_store_files(new_files, self.columns))
+                self.files.update(new_files)
+        return self.cube
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingère les ventes déposées dans le dossier d'entrée")
+    parser.add_argument('--drop-dir', default=str(DROP_DIR), help="dossier de dépôt des fichiers CSV/Parquet")
+    parser.add_argument('--watch', action='store_true', help="surveiller le dossier en continu")
+    parser.add_argument('--interval', type=float, default=5.0, help="intervalle de scrutation (s)")
+    args = parser.parse_args(argv)
+
+    ingestor = Ingestor(Path(args.drop_dir))
+
+    def report(results):
+        for name, result in results.items():
+            if isinstance(result, Exception):
+                print(f"{name} : rejeté ({result})")
+            else:
+                print(f"{name} : {result:,} ventes ajoutées")
+
+    if args.watch:
+        print(f"Surveillance de {ingestor.drop_dir} (Ctrl+C pour arrêter)")
+        try:
+            ingestor.watch(args.interval, callback=report)
+        except KeyboardInterrupt:
+            pass
+    else:
+        start_time = time.perf_counter()
+        results = ingestor.poll()
+        report(results)
+        print(f"{len(results)} fichier(s) traité(s) en {time.perf_counter() - start_time:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
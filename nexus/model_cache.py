@@ -0,0 +1,166 @@
+"""
+Cache de modèles entraînés, partagé par toutes les sessions d'un processus.
+
+Les entrées sont indexées par une empreinte (sélection des filtres + version des données),
+évincées selon l'ordre LRU dès que la taille totale dépasse le plafond mémoire, et
+éventuellement persistées sur disque pour survivre à un redémarrage du serveur.
+`get_or_submit` construit les entrées manquantes dans un thread de fond, hors du
+chemin de la requête.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import joblib
+
+
+def fingerprint(*parts):
+    """Empreinte stable (SHA-1 tronqué) d'un ensemble de paramètres sérialisables"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def filter_fingerprint(selections=None, date_range=None, version=None):
+    """Empreinte d'un état des filtres (sélections, période, version des données)"""
+    selections = {dim: sorted(map(str, values)) for dim, values in (selections or {}).items()}
+    return fingerprint(selections, date_range, version)
+
+
+class ModelCache:
+    """Cache LRU borné en octets, avec persistance disque optionnelle"""
+
+    def __init__(self, max_bytes=256 * 1024**2, persist_dir=None, max_disk_bytes=1024**3):
+        self.max_bytes = max_bytes
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # clé -> (objet, taille)
+        self._size = 0
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._pending = {}  # clé -> Future de construction en arrière-plan
+        self._errors = {}
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+        if self.persist_dir:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or bool(self.persist_dir and self._disk_path(key).exists())
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._size
+
+    def _disk_path(self, key):
+        return self.persist_dir / f"{key}.joblib"
+
+    def get(self, key):
+        """Retourne l'objet en cache (mémoire puis disque) ou None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            if self.persist_dir and self._disk_path(key).exists():
+                try:
+                    value = joblib.load(self._disk_path(key))
+                except Exception:
+                    self._disk_path(key).unlink(missing_ok=True)
+                else:
+                    self.hits += 1
+                    self._store(key, value)
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value, persist=True):
+        """Ajoute un objet, évince les moins récemment utilisés et le persiste au besoin"""
+        with self._lock:
+            self._store(key, value)
+            if persist and self.persist_dir:
+                tmp_path = self._disk_path(key).with_suffix(f".{os.getpid()}.tmp")
+                joblib.dump(value, tmp_path)
+                os.replace(tmp_path, self._disk_path(key))
+                self._trim_disk()
+
+    def get_or_create(self, key, factory):
+        """
+        Retourne l'objet en cache ou le construit via `factory`.
+        Un verrou par clé garantit qu'une même clé n'est construite qu'une fois,
+        même si plusieurs sessions la demandent simultanément.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                value = self._entries[key][0] if key in self._entries else None
+            if value is None:
+                value = factory()
+                self.put(key, value)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def get_or_submit(self, key, factory):
+        """
+        Retourne l'objet en cache, ou None après avoir lancé sa construction dans un
+        thread de fond (une seule construction à la fois). L'erreur éventuelle d'une
+        construction est relevée à l'appel suivant.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            if key in self._errors:
+                raise self._errors.pop(key)
+            if key not in self._pending:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-cache')
+                self._pending[key] = self._executor.submit(self._build, key, factory)
+        return None
+
+    def is_pending(self, key):
+        """Vrai si l'entrée est en cours de construction en arrière-plan"""
+        with self._lock:
+            return key in self._pending
+
+    def _build(self, key, factory):
+        try:
+            self.put(key, factory())
+        except Exception as e:
+            with self._lock:
+                self._errors[key] = e
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _store(self, key, value):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._size += size
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def _trim_disk(self):
+        files = sorted(self.persist_dir.glob('*.joblib'), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        while files and total > self.max_disk_bytes:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
@@ -0,0 +1,178 @@
+"""
+Statistiques suffisantes pour la matrice de corrélation.
+
+Pour chaque cellule (jour, Region, Product_Category, Sales_Channel, Customer_Type), soit la
+maille des filtres de la barre latérale, on conserve le nombre de ventes, la somme de chaque
+mesure et la somme des produits croisés de chaque paire de mesures. Ces quantités s'additionnent :
+la matrice de covariance (donc de corrélation) d'une sélection quelconque s'obtient en sommant
+les cellules retenues, sans relire les transactions. Les nouvelles ventes sont agrégées à part
+puis fusionnées avec les cellules existantes.
+
+Les valeurs sont décalées d'une constante par colonne (moyenne du premier chargement) avant
+le calcul des produits croisés, pour limiter les pertes de précision de la formule
+E[xy] - E[x]E[y] sur des millions de ventes.
+"""
+import numpy as np
+import pandas as pd
+
+from nexus.index import FILTER_DIMENSIONS, FilterIndex
+
+MOMENT_DIMENSIONS = ['Sale_Date'] + FILTER_DIMENSIONS
+# Colonnes numériques sans signification statistique : identifiants et codes des catégorielles
+EXCLUDED_COLUMNS = ['Product_ID']
+EXCLUDED_SUFFIXES = ('_encoded',)
+# Variance tenue pour nulle en deçà de cette fraction du moment d'ordre 2 autour du décalage :
+# pour une mesure constante, E[x²] - E[x]² ne s'annule qu'aux erreurs d'arrondi près
+ZERO_VARIANCE_RTOL = 1e-10
+
+
+def correlation_columns(df):
+    """Mesures numériques du jeu, hors identifiants et colonnes encodées"""
+    return [
+        col for col in df.select_dtypes(include=[np.number]).columns
+        if col not in EXCLUDED_COLUMNS and not col.endswith(EXCLUDED_SUFFIXES)
+    ]
+
+
+def _cells(keys):
+    """Numéro de cellule de chaque ligne et clés des cellules (ordre de première apparition)"""
+    grouped = keys.groupby(list(keys.columns), observed=True, sort=False)
+    return grouped.ngroup().to_numpy(), grouped.size().reset_index()[list(keys.columns)]
+
+
+def _aggregate(df, dimensions, columns, shift):
+    """Cellules (clés, nombres, sommes, produits croisés du triangle supérieur) d'un lot de ventes"""
+    keys = pd.DataFrame({dim: df[dim] for dim in dimensions})
+    if 'Sale_Date' in keys.columns:
+        keys['Sale_Date'] = pd.to_datetime(keys['Sale_Date']).dt.normalize()
+    codes, cells = _cells(keys)
+    n_cells = len(cells)
+    values = df[columns].to_numpy(dtype=np.float64) - shift
+    # Les ventes nettoyées sont complètes ; une valeur manquante éventuelle compte comme la valeur de décalage
+    values = np.nan_to_num(values, nan=0.0)
+
+    count = np.bincount(codes, minlength=n_cells).astype(np.float64)
+    sums = np.column_stack([np.bincount(codes, weights=values[:, i], minlength=n_cells) for i in range(len(columns))])
+    rows, cols = np.triu_indices(len(columns))
+    cross = np.column_stack([
+        np.bincount(codes, weights=values[:, i] * values[:, j], minlength=n_cells) for i, j in zip(rows, cols)
+    ])
+    return cells, count, sums, cross
+
+
+def _combine(keys, count, sums, cross):
+    """Regroupe les cellules de même clé (après concaténation de deux lots)"""
+    codes, cells = _cells(keys)
+    if len(cells) == len(keys):
+        return keys, count, sums, cross
+    n_cells = len(cells)
+
+    def add(array):
+        out = np.zeros((n_cells,) + array.shape[1:])
+        np.add.at(out, codes, array)
+        return out
+
+    return cells, add(count), add(sums), add(cross)
+
+
+class MomentCube:
+    """Nombre, sommes et produits croisés des mesures par cellule, filtrables comme le cube de ventes"""
+
+    def __init__(self, keys, count, sums, cross, columns, shift):
+        for dim in keys.columns:
+            if dim != 'Sale_Date':
+                keys[dim] = keys[dim].astype('category')
+        self.keys = keys
+        self.count = count
+        self.sums = sums
+        self.cross = cross
+        self.columns = list(columns)
+        self.shift = shift
+        self.index = FilterIndex(keys)
+
+    @classmethod
+    def build(cls, df, columns=None, dimensions=None):
+        """Statistiques par cellule des transactions `df`"""
+        columns = columns or correlation_columns(df)
+        dimensions = [d for d in (dimensions or MOMENT_DIMENSIONS) if d in df.columns]
+        shift = np.nan_to_num(df[columns].mean().to_numpy(dtype=np.float64))
+        return cls(*_aggregate(df, dimensions, columns, shift), columns, shift)
+
+    @property
+    def dimensions(self):
+        return list(self.keys.columns)
+
+    @property
+    def source_columns(self):
+        """Colonnes des transactions lues pour mettre le cube à jour"""
+        return self.dimensions + self.columns
+
+    def append(self, df):
+        """Nouveau cube intégrant des ventes supplémentaires : seules les nouvelles lignes sont parcourues"""
+        if len(df) == 0:
+            return self
+        keys, count, sums, cross = _aggregate(df, self.dimensions, self.columns, self.shift)
+        # Les catégorielles des deux lots n'ont pas forcément les mêmes modalités
+        all_keys = pd.concat([self.keys.astype({d: object for d in self.dimensions if d != 'Sale_Date'}),
+                              keys.astype({d: object for d in self.dimensions if d != 'Sale_Date'})],
+                             ignore_index=True)
+        combined = _combine(all_keys, np.concatenate([self.count, count]),
+                            np.concatenate([self.sums, sums]), np.concatenate([self.cross, cross]))
+        return MomentCube(*combined, self.columns, self.shift)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def select(self, selections=None, ranges=None):
+        """Statistiques agrégées des cellules correspondant au filtre de la barre latérale"""
+        rows = self.index.select(selections, ranges)
+        if rows is None:
+            return Moments(self.count.sum(), self.sums.sum(axis=0), self.cross.sum(axis=0), self.columns, self.shift)
+        return Moments(self.count[rows].sum(), self.sums[rows].sum(axis=0), self.cross[rows].sum(axis=0),
+                       self.columns, self.shift)
+
+
+class Moments:
+    """Statistiques suffisantes d'une sélection : moyennes, covariances et corrélations"""
+
+    def __init__(self, count, sums, cross, columns, shift):
+        self.count = float(count)
+        self.sums = sums
+        self.columns = columns
+        self.shift = shift
+        k = len(columns)
+        rows, cols = np.triu_indices(k)
+        self.cross = np.zeros((k, k))
+        self.cross[rows, cols] = cross
+        self.cross[cols, rows] = cross
+
+    def mean(self):
+        if self.count == 0:
+            return pd.Series(np.nan, index=self.columns)
+        return pd.Series(self.sums / self.count + self.shift, index=self.columns)
+
+    def constant(self):
+        """Mesures constantes sur la sélection (variance nulle aux erreurs d'arrondi près)"""
+        centered = np.diag(self.cross) - self.sums ** 2 / self.count
+        return centered <= ZERO_VARIANCE_RTOL * np.diag(self.cross)
+
+    def covariance(self):
+        """Matrice de covariance (échantillon, comme `DataFrame.cov`) ; nulle pour une mesure constante"""
+        if self.count < 2:
+            return pd.DataFrame(np.nan, index=self.columns, columns=self.columns)
+        centered = self.cross - np.outer(self.sums, self.sums) / self.count
+        constant = self.constant()
+        centered[constant, :] = 0.0
+        centered[:, constant] = 0.0
+        return pd.DataFrame(centered / (self.count - 1), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """Matrice de corrélation de Pearson (NaN pour une mesure constante, comme `DataFrame.corr`)"""
+        cov = self.covariance().to_numpy()
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[std == 0, :] = np.nan
+        corr[:, std == 0] = np.nan
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
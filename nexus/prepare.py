@@ -0,0 +1,166 @@
+"""
+Préparation hors mémoire des ventes brutes (étapes de nettoyage du notebook).
+
+Le fichier brut (CSV ou Parquet) est lu par blocs de taille fixe ; chaque bloc est nettoyé,
+enrichi et encodé dans un processus de travail (`clean_chunk`), pendant que le processus
+principal enchaîne les parties séquentielles : doublons d'un bloc à l'autre (empreintes des
+lignes), Cum_Sales_By_Point poursuivi par point de vente et écriture au fil de l'eau.
+Seuls quelques blocs sont en mémoire à la fois, plus 8 octets par vente distincte pour le
+dédoublonnage.
+
+    python -m nexus.prepare sales_data.csv --output output/data/cleaned_sales_data.csv --workers 4
+    python -m nexus.prepare raw_sales.parquet --output output/data/cleaned_sales_data.parquet
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from nexus.batch import iter_chunks
+from nexus.cleaning import CLEANED_ENCODED_COLUMNS, CleaningState, clean_chunk
+from nexus.features import sales_points
+
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+def scan_categories(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Modalités triées des colonnes encodées (codes de LabelEncoder sur tout le fichier),
+    en ne lisant que les colonnes catégorielles.
+    """
+    path = Path(path)
+    columns = CLEANED_ENCODED_COLUMNS
+    if path.suffix.lower() == '.parquet':
+        parquet = pq.ParquetFile(path)
+        columns = [col for col in columns if col in parquet.schema_arrow.names]
+        chunks = (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns))
+    else:
+        chunks = pd.read_csv(path, usecols=lambda col: col in columns, chunksize=chunk_rows, dtype=str)
+
+    values = {col: set() for col in columns}
+    for chunk in chunks:
+        if 'Region_and_Sales_Rep' not in chunk.columns:
+            chunk = chunk.assign(Region_and_Sales_Rep=sales_points(chunk))
+        for col in values:
+            if col in chunk.columns:
+                values[col].update(chunk[col].dropna().astype(str).unique())
+    return {col: sorted(found) for col, found in values.items() if found}
+
+
+def _bounded_map(executor, fn, items, window):
+    """Comme `executor.map`, mais avec au plus `window` tâches en cours (mémoire bornée)"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, *item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_cleaned_file(path, state=None, chunk_rows=DEFAULT_CHUNK_ROWS, executor=None, window=4, progress=None):
+    """
+    Blocs de ventes nettoyées d'un fichier brut, dans l'ordre du fichier.
+    state : CleaningState à poursuivre (historique déjà nettoyé) ; par défaut un état vide dont les
+    modalités sont lues en une première passe, comme le LabelEncoder du notebook.
+    executor : pool de processus pour `clean_chunk` (au plus `window` blocs en cours) ;
+    None = nettoyage dans le processus courant.
+    `progress(fraction, lignes)` est appelé après chaque bloc.
+    """
+    path = Path(path)
+    if state is None:
+        state = CleaningState(categories=scan_categories(path, chunk_rows))
+    fractions = deque()
+
+    def tasks():
+        for chunk, fraction in iter_chunks(path, path.name, chunk_rows):
+            if 'Region_and_Sales_Rep' not in chunk.columns:
+                chunk = chunk.assign(Region_and_Sales_Rep=sales_points(chunk))
+            categories = {col: list(values) for col, values in state.extend_categories(chunk).items()}
+            fractions.append(fraction)
+            yield chunk, categories
+
+    if executor is None:
+        results = (clean_chunk(*task) for task in tasks())
+    else:
+        results = _bounded_map(executor, clean_chunk, tasks(), window)
+    rows = 0
+    for cleaned, hashes in results:
+        cleaned = state.merge(cleaned, hashes)
+        rows += len(cleaned)
+        if progress is not None:
+            progress(fractions.popleft(), rows)
+        yield cleaned
+
+
+def _csv_text(chunk, header):
+    return chunk.to_csv(header=header, index=False)
+
+
+def write_cleaned(chunks, output, executor=None, window=4):
+    """
+    Écrit les blocs nettoyés : CSV (format du notebook) ou store Parquet partitionné (.parquet).
+    Avec `executor`, la mise en forme CSV (l'étape la plus coûteuse) est faite en parallèle.
+    """
+    output = Path(output)
+    if output.suffix.lower() == '.parquet':
+        from nexus.store import write_store_chunks
+        return write_store_chunks(chunks, output)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(output.name + '.tmp')
+    tasks = ((chunk, i == 0) for i, chunk in enumerate(chunks))
+    if executor is None:
+        texts = (_csv_text(*task) for task in tasks)
+    else:
+        texts = _bounded_map(executor, _csv_text, tasks, window)
+    with open(tmp_path, 'w', newline='') as out:
+        for text in texts:
+            out.write(text)
+    tmp_path.replace(output)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nettoie un fichier de ventes brutes par blocs (règles du notebook)")
+    parser.add_argument('input', help="ventes brutes (CSV ou Parquet, schéma de sales_data.csv)")
+    parser.add_argument('--output', default='output/data/cleaned_sales_data.csv',
+                        help="CSV nettoyé, ou store Parquet partitionné si l'extension est .parquet")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=None, help="processus de nettoyage (défaut : nombre de cœurs)")
+    parser.add_argument('--state', default=None,
+                        help="état du nettoyage à sauvegarder (ex. output/data/ingest_state.joblib pour l'ingestion)")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    state = CleaningState(categories=scan_categories(args.input, args.chunk_rows))
+    workers = args.workers or os.cpu_count() or 1
+
+    def report(fraction, rows):
+        print(f"\r{fraction:6.1%}  {rows:,} ventes", end='', flush=True)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # Le même pool nettoie les blocs et met en forme le CSV des blocs déjà traités
+        chunks = iter_cleaned_file(args.input, state, args.chunk_rows, executor, 2 * workers, progress=report)
+        path = write_cleaned(chunks, args.output, executor, 2 * workers)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    print(f"\n{state.rows:,} ventes nettoyées écrites dans {path} en {time.perf_counter() - start_time:.1f} s")
+    if args.state:
+        state.save(args.state)
+
+
+if __name__ == '__main__':
+    main()
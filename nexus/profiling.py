@@ -0,0 +1,166 @@
+"""
+Instrumentation des reruns du dashboard : durée et mémoire de chaque étape.
+
+Chaque rerun crée un `RerunProfiler` ; les étapes (chargement, filtrage, agrégations de la
+page, graphiques, modèles) sont mesurées par `stage()` ou `begin()` / `end()`. À la fin du
+rerun, l'enregistrement est ajouté à un historique en mémoire partagé par les sessions et
+écrit en JSON lines (une ligne par rerun) pour suivre les régressions en production.
+Désactivé, le profiler ne mesure rien et ne coûte qu'un appel de fonction par étape.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_ENV = 'NEXUS_PROFILE'
+PROFILE_LOG_ENV = 'NEXUS_PROFILE_LOG'
+PROFILE_LOG_PATH = Path('output/logs/perf.jsonl')
+HISTORY_SIZE = 200
+
+
+def rss():
+    """Mémoire résidente courante du processus (octets) ; à défaut, son maximum atteint"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakMemory:
+    """Pic de mémoire résidente (Mo) au-dessus du niveau d'entrée, échantillonné pendant le bloc"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+
+    def __enter__(self):
+        self._start = self._peak = rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, rss())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._peak = max(self._peak, rss())
+        self.peak_mb = (self._peak - self._start) / 1024**2
+        return False
+
+
+def profiling_enabled(query_value=None):
+    """Vrai si NEXUS_PROFILE=1 ou si la page est ouverte avec ?profile=1"""
+    values = (os.environ.get(PROFILE_ENV, ''), query_value or '')
+    return any(str(value).lower() in ('1', 'true', 'yes') for value in values)
+
+
+class RerunProfiler:
+    """Mesures d'un rerun : liste d'étapes (nom, catégorie, profondeur, durée, mémoire)"""
+
+    def __init__(self, enabled=False, session=None, page=None):
+        self.enabled = enabled
+        self.session = session
+        self.page = page
+        self.stages = []
+        self._depth = 0
+        self._start = time.perf_counter()
+        self._start_rss = rss() if enabled else 0
+
+    def begin(self, name, category='stage', **details):
+        """Ouvre une étape (à fermer par `end`) ; None si le profiler est désactivé"""
+        if not self.enabled:
+            return None
+        record = {'name': name, 'category': category, 'depth': self._depth, **details}
+        record['_start'] = time.perf_counter()
+        record['_rss'] = rss()
+        self._depth += 1
+        self.stages.append(record)
+        return record
+
+    def end(self, record, **details):
+        if record is None:
+            return
+        record['ms'] = (time.perf_counter() - record.pop('_start')) * 1000
+        record['rss_delta_mb'] = (rss() - record.pop('_rss')) / 1024**2
+        record.update(details)
+        self._depth -= 1
+
+    @contextmanager
+    def stage(self, name, category='stage', **details):
+        record = self.begin(name, category, **details)
+        try:
+            yield record
+        finally:
+            self.end(record)
+
+    def finish(self):
+        """Clôt le rerun et retourne son enregistrement (None si désactivé)"""
+        if not self.enabled:
+            return None
+        # Étapes laissées ouvertes (exception, st.stop) : fermées à la fin du rerun
+        for record in self.stages:
+            if '_start' in record:
+                self.end(record, incomplete=True)
+        return {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'session': self.session,
+            'page': self.page,
+            'total_ms': (time.perf_counter() - self._start) * 1000,
+            'rss_mb': rss() / 1024**2,
+            'rss_delta_mb': (rss() - self._start_rss) / 1024**2,
+            'stages': self.stages,
+        }
+
+
+class ProfileLog:
+    """Historique des reruns partagé par les sessions, exporté en JSON lines"""
+
+    def __init__(self, path=None, size=HISTORY_SIZE):
+        self.path = Path(path) if path else None
+        self.records = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record, default=str) + '\n')
+
+    def recent(self, n=50):
+        """Derniers reruns, du plus récent au plus ancien ; relus depuis le fichier si l'historique est vide"""
+        with self._lock:
+            records = list(self.records)
+        if not records and self.path is not None and self.path.exists():
+            with open(self.path) as f:
+                records = [json.loads(line) for line in deque(f, maxlen=n) if line.strip()]
+        return records[::-1][:n]
+
+
+def summary_rows(records):
+    """Une ligne par rerun : page, durée totale, étape la plus lente, variation mémoire"""
+    rows = []
+    for record in records:
+        slowest = max(record['stages'], key=lambda s: s.get('ms', 0), default=None)
+        rows.append({
+            'Timestamp': record['timestamp'],
+            'Page': record['page'],
+            'Durée (ms)': round(record['total_ms'], 1),
+            'Étape la plus lente': slowest['name'] if slowest else '',
+            'Étape (ms)': round(slowest.get('ms', 0), 1) if slowest else 0.0,
+            'RSS (Mo)': round(record['rss_mb'], 1),
+            'Δ RSS (Mo)': round(record['rss_delta_mb'], 1),
+            'Session': (record.get('session') or '')[:8],
+        })
+    return rows
@@ -0,0 +1,104 @@
+"""
+Registre des modèles persistés dans `output/models/`.
+
+Chaque artefact `*.joblib` est exposé par son nom de fichier sans extension
+(`best_model_gradientboosting`, `scaler`, `arima_model`...). Il est chargé une seule fois
+par processus, au premier accès, puis rechargé automatiquement si le fichier est remplacé
+(date de modification différente). Le préchargement optionnel se fait dans un thread de fond.
+"""
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+
+MODELS_DIR = Path('output/models')
+
+
+class ModelRegistry:
+    """Artefacts de `models_dir` chargés à la demande, partagés par toutes les sessions"""
+
+    def __init__(self, models_dir=MODELS_DIR, loaders=None):
+        self.models_dir = Path(models_dir)
+        self.loaders = dict(loaders or {})  # nom -> fonction(chemin) ; joblib.load par défaut
+        self._entries = {}  # nom -> (mtime_ns, modèle, erreur)
+        self._lock = threading.Lock()
+        self._name_locks = {}
+        self.loads = 0
+
+    def path(self, name):
+        return self.models_dir / f"{name}.joblib"
+
+    def names(self):
+        """Noms des artefacts présents sur disque"""
+        if not self.models_dir.is_dir():
+            return []
+        return sorted(p.stem for p in self.models_dir.glob('*.joblib'))
+
+    def __contains__(self, name):
+        return self.path(name).exists()
+
+    def get(self, name):
+        """
+        Retourne le modèle `name`, chargé au premier accès ou si le fichier a changé.
+        Une erreur de chargement est conservée jusqu'à la prochaine modification du fichier.
+        """
+        path = self.path(name)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Modèle introuvable : {path}") from None
+
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != mtime:
+            with self._lock:
+                name_lock = self._name_locks.setdefault(name, threading.Lock())
+            with name_lock:
+                entry = self._entries.get(name)
+                if entry is None or entry[0] != mtime:
+                    entry = self._load(name, path, mtime)
+                    self._entries[name] = entry
+        if entry[2] is not None:
+            raise entry[2]
+        return entry[1]
+
+    def _load(self, name, path, mtime):
+        loader = self.loaders.get(name, joblib.load)
+        try:
+            model = loader(path)
+        except Exception as e:
+            return (mtime, None, e)
+        self.loads += 1
+        return (mtime, model, None)
+
+    def preload(self, names=None, background=True):
+        """Charge à l'avance les artefacts (tous par défaut), dans un thread de fond si demandé"""
+        def run():
+            for name in names or self.names():
+                try:
+                    self.get(name)
+                except Exception:
+                    pass  # Erreur conservée et relevée au premier accès
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name='model-preload', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """État de chaque artefact : taille, date de modification, chargé ou non, erreur"""
+        rows = []
+        for name in self.names():
+            stat = self.path(name).stat()
+            entry = self._entries.get(name)
+            current = entry is not None and entry[0] == stat.st_mtime_ns
+            rows.append({
+                'Modèle': name,
+                'Taille (Ko)': round(stat.st_size / 1024, 1),
+                'Modifié le': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M'),
+                'Chargé': current and entry[2] is None,
+                'Erreur': str(entry[2]) if current and entry[2] is not None else '',
+            })
+        return rows
@@ -0,0 +1,280 @@
+"""
+Rapport PDF des ventes : indicateurs clés, évolution des ventes, Pareto des vendeurs et prévision.
+
+Les chiffres sont lus dans le cube d'agrégats. Les graphiques sont dessinés en PNG par matplotlib
+(API objet, sans pyplot : utilisable depuis un thread) et mis en cache par (graphique, empreinte
+des filtres) : un rapport redemandé pour la même sélection ne redessine ni ne réentraîne rien.
+Les rapports par Région ou par commercial sont générés en parallèle dans un pool de processus,
+qui partagent le cache des graphiques sur disque.
+
+    python -m nexus.report --by Region --output output/reports
+"""
+import argparse
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+from nexus.cube import SalesCube
+from nexus.forecast import DailyForecaster
+from nexus.model_cache import ModelCache, filter_fingerprint, fingerprint
+from nexus.store import data_version
+from nexus.topk import top_k
+
+try:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+    from matplotlib.image import imread
+    from matplotlib.patches import FancyBboxPatch
+    MATPLOTLIB_AVAILABLE = True
+except ImportError:
+    MATPLOTLIB_AVAILABLE = False
+
+REPORT_DIR = Path('output/reports')
+CHART_CACHE_DIR = Path('output/data/cache/report_charts')
+CHART_CACHE_MB = 64
+REPORT_DIMENSIONS = ['Region', 'Sales_Rep']
+FORECAST_DAYS = 30
+# Vendeurs affichés sur le Pareto (les suivants sont regroupés dans « Autres »)
+PARETO_BARS = 30
+CHART_DPI = 150
+A4_INCHES = (8.27, 11.69)
+COLORS = {'primary': '#2C3E50', 'accent': '#3498DB', 'danger': '#E74C3C', 'muted': '#7F8C8D'}
+
+
+def report_data(cube, selections=None, date_range=None, forecast_days=FORECAST_DAYS):
+    """Agrégats du rapport : KPIs, ventes journalières, Pareto des vendeurs"""
+    ranges = {'Sale_Date': date_range} if date_range is not None else None
+    selection = cube.select(selections, ranges=ranges)
+    sales, profit, count = selection.total('Sales_Amount'), selection.total('Profit'), selection.count
+    daily = selection.rollup('Sale_Date', ['Sales_Amount'])[['Sale_Date', 'Sales_Amount']]
+    sellers = selection.rollup('Region_and_Sales_Rep', ['Sales_Amount'])
+    pareto = top_k(sellers['Region_and_Sales_Rep'], sellers['Sales_Amount'], PARETO_BARS).frame('Region_and_Sales_Rep')
+    return {
+        'kpis': [
+            ("Chiffre d'affaires", f"{sales:,.0f} €"),
+            ("Profit net", f"{profit:,.0f} €"),
+            ("Marge", f"{profit / sales * 100:.1f} %" if sales else "n/a"),
+            ("Transactions", f"{count:,}"),
+        ],
+        'daily': daily,
+        'pareto': pareto,
+        'forecast_days': forecast_days,
+    }
+
+
+def _png(fig):
+    buffer = io.BytesIO()
+    FigureCanvasAgg(fig)
+    fig.savefig(buffer, format='png', dpi=CHART_DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def _chart_figure(title):
+    fig = Figure(figsize=(7.4, 2.7))
+    ax = fig.add_subplot()
+    ax.set_title(title, loc='left', fontsize=10, color=COLORS['primary'])
+    ax.spines[['top', 'right']].set_visible(False)
+    ax.tick_params(labelsize=7)
+    ax.grid(axis='y', alpha=0.3)
+    return fig, ax
+
+
+def render_trend(data):
+    """Ventes journalières et moyenne mobile 7 jours"""
+    daily = data['daily']
+    fig, ax = _chart_figure("Évolution des ventes")
+    ax.plot(daily['Sale_Date'], daily['Sales_Amount'], color=COLORS['accent'], linewidth=0.6, alpha=0.5, label="Journalier")
+    ax.plot(daily['Sale_Date'], daily['Sales_Amount'].rolling(7, min_periods=1).mean(),
+            color=COLORS['primary'], linewidth=1.4, label="Moyenne 7 jours")
+    ax.legend(fontsize=7, frameon=False)
+    fig.autofmt_xdate()
+    return _png(fig)
+
+
+def render_pareto(data):
+    """Ventes par point de vente (barres) et cumul en % (courbe), seuil des 80 %"""
+    pareto = data['pareto']
+    fig, ax = _chart_figure("Pareto des vendeurs")
+    positions = np.arange(len(pareto))
+    ax.bar(positions, pareto['Sales_Amount'], color=COLORS['accent'])
+    ax.set_xticks(positions, pareto['Region_and_Sales_Rep'].astype(str), rotation=60, ha='right', fontsize=6)
+    cumulative = ax.twinx()
+    cumulative.plot(positions, pareto['Cumulative_Pct'], color=COLORS['danger'], marker='o', markersize=2, linewidth=1.2)
+    cumulative.axhline(80, color=COLORS['muted'], linestyle='--', linewidth=0.8)
+    cumulative.set_ylim(0, 110)
+    cumulative.tick_params(labelsize=7)
+    cumulative.spines[['top']].set_visible(False)
+    return _png(fig)
+
+
+def render_forecast(data, level=0.95):
+    """Historique récent et prévision GradientBoosting avec intervalle de confiance"""
+    daily = data['daily']
+    fig, ax = _chart_figure(f"Prévision des ventes ({data['forecast_days']} jours, IC {level:.0%})")
+    if len(daily) >= 30:
+        forecast = DailyForecaster.fit(daily).forecast(data['forecast_days'], level=level)
+        history = daily.tail(90)
+        ax.plot(history['Sale_Date'], history['Sales_Amount'], color=COLORS['primary'], linewidth=0.9, label="Historique")
+        ax.plot(forecast['Sale_Date'], forecast['Predicted_Sales'], color=COLORS['danger'], linewidth=1.4, label="Prévision")
+        ax.fill_between(forecast['Sale_Date'], forecast['Lower'], forecast['Upper'], color=COLORS['danger'], alpha=0.15)
+        ax.legend(fontsize=7, frameon=False)
+        fig.autofmt_xdate()
+    else:
+        ax.text(0.5, 0.5, "Historique insuffisant pour une prévision", ha='center', va='center',
+                transform=ax.transAxes, color=COLORS['muted'])
+    return _png(fig)
+
+
+CHARTS = {'trend': render_trend, 'pareto': render_pareto, 'forecast': render_forecast}
+
+
+def chart_image(name, data, filter_key, chart_cache=None):
+    """PNG d'un graphique, lu dans le cache (graphique, empreinte des filtres) ou dessiné"""
+    if chart_cache is None:
+        return CHARTS[name](data)
+    return chart_cache.get_or_create(fingerprint('report-chart', name, filter_key), lambda: CHARTS[name](data))
+
+
+def build_report(cube, selections=None, date_range=None, title="Rapport des ventes", filter_key=None,
+                 chart_cache=None, forecast_days=FORECAST_DAYS):
+    """
+    PDF (bytes) d'une page A4 : en-tête, KPIs, évolution, Pareto et prévision. Sans `filter_key`,
+    les graphiques sont mis en cache sous les filtres et la version courante des données.
+    """
+    if not MATPLOTLIB_AVAILABLE:
+        raise ImportError("matplotlib est requis pour générer les rapports PDF")
+    data = report_data(cube, selections, date_range, forecast_days)
+    filter_key = filter_key or filter_fingerprint(selections, date_range, data_version())
+
+    fig = Figure(figsize=A4_INCHES)
+    fig.text(0.06, 0.955, "NEXUS ANALYTICS", fontsize=9, color=COLORS['accent'], weight='bold')
+    fig.text(0.06, 0.93, title, fontsize=16, color=COLORS['primary'])
+    period = ""
+    if date_range is not None:
+        period = f"Période du {date_range[0]:%d/%m/%Y} au {date_range[1]:%d/%m/%Y} • "
+    fig.text(0.06, 0.912, f"{period}Généré le {datetime.now():%d/%m/%Y %H:%M}", fontsize=7.5, color=COLORS['muted'])
+
+    # Cartes KPI
+    for i, (label, value) in enumerate(data['kpis']):
+        left = 0.06 + i * 0.225
+        fig.patches.append(FancyBboxPatch((left, 0.835), 0.205, 0.06, boxstyle='round,pad=0.004', transform=fig.transFigure,
+                                          facecolor='#F8F9FA', edgecolor='#ECF0F1', figure=fig))
+        fig.text(left + 0.01, 0.875, label.upper(), fontsize=6.5, color=COLORS['muted'])
+        fig.text(left + 0.01, 0.848, value, fontsize=11.5, color=COLORS['primary'], weight='bold')
+
+    # Graphiques (images en cache)
+    for i, name in enumerate(['trend', 'pareto', 'forecast']):
+        ax = fig.add_axes([0.05, 0.56 - i * 0.265, 0.9, 0.255])
+        ax.imshow(imread(io.BytesIO(chart_image(name, data, filter_key, chart_cache)), format='png'))
+        ax.set_axis_off()
+
+    buffer = io.BytesIO()
+    with PdfPages(buffer, metadata={'Title': title, 'Creator': 'Nexus Analytics'}) as pdf:
+        pdf.savefig(fig)
+    return buffer.getvalue()
+
+
+def report_name(title):
+    """Nom de fichier d'un rapport à partir de son titre"""
+    slug = ''.join(c if c.isalnum() else '_' for c in title).strip('_')
+    return f"{slug}.pdf"
+
+
+# Cube et cache des graphiques de chaque processus de travail (transmis une fois par processus)
+_worker = {}
+
+
+def _init_worker(cube, chart_cache_dir):
+    _worker['cube'] = cube
+    _worker['cache'] = ModelCache(max_bytes=CHART_CACHE_MB * 1024**2, persist_dir=chart_cache_dir)
+
+
+def batch_values(cube, dimension, selections=None):
+    """Valeurs de `dimension` présentes dans le cube et retenues par les filtres"""
+    values = [str(v) for v in cube.cells[dimension].dropna().unique()]
+    if selections and dimension in selections:
+        selected = set(map(str, selections[dimension]))
+        values = [v for v in values if v in selected]
+    return sorted(values)
+
+
+def _batch_report(dimension, value, selections, date_range, version, output_dir):
+    # Sous-cube de la valeur : Sales_Rep n'est pas une dimension filtrable de l'index
+    cube = _worker['cube']
+    cube = SalesCube(cube.cells[cube.cells[dimension].astype(str) == value], cube.dimensions, cube.measures)
+    title = f"Rapport des ventes – {value}"
+    key = filter_fingerprint({**(selections or {}), dimension: [value]}, date_range, version)
+    pdf = build_report(cube, selections, date_range, title, key, _worker['cache'])
+    path = Path(output_dir) / report_name(f"rapport_{dimension}_{value}")
+    path.write_bytes(pdf)
+    return str(path)
+
+
+def batch_reports(cube, dimension, values, selections=None, date_range=None, version=None,
+                  output_dir=REPORT_DIR, workers=None, chart_cache_dir=CHART_CACHE_DIR, progress=None):
+    """
+    Un rapport par valeur de `dimension` (ex. chaque Région), générés en parallèle.
+    Retourne les chemins des PDF ; `progress(fraction)` est appelé après chaque rapport.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(values)))
+    # spawn : le serveur Streamlit est multi-thread, un fork pourrait hériter d'un verrou pris
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                             initializer=_init_worker, initargs=(cube, str(chart_cache_dir) if chart_cache_dir else None)) as executor:
+        futures = [executor.submit(_batch_report, dimension, value, selections, date_range, version, output_dir)
+                   for value in values]
+        paths = []
+        for future in futures:
+            paths.append(future.result())
+            if progress is not None:
+                progress(len(paths) / len(futures))
+    return paths
+
+
+def zip_reports(paths):
+    """Archive ZIP (bytes) d'un lot de rapports"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for path in paths:
+            archive.write(path, Path(path).name)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les rapports PDF des ventes")
+    parser.add_argument('--by', choices=REPORT_DIMENSIONS, default=None,
+                        help="un rapport par valeur de la dimension (défaut : un rapport global)")
+    parser.add_argument('--output', default=str(REPORT_DIR))
+    parser.add_argument('--workers', type=int, default=None, help="processus de génération (défaut : nombre de cœurs)")
+    args = parser.parse_args(argv)
+
+    from nexus.cube import CUBE_COLUMNS
+    from nexus.frame import load_compact_sales
+
+    start_time = time.perf_counter()
+    cube = SalesCube.build(load_compact_sales(CUBE_COLUMNS))
+    version = data_version()
+    if args.by is None:
+        output = Path(args.output)
+        output.mkdir(parents=True, exist_ok=True)
+        path = output / report_name("rapport_ventes")
+        cache = ModelCache(max_bytes=CHART_CACHE_MB * 1024**2, persist_dir=CHART_CACHE_DIR)
+        path.write_bytes(build_report(cube, filter_key=filter_fingerprint(version=version), chart_cache=cache))
+        paths = [str(path)]
+    else:
+        values = batch_values(cube, args.by)
+        paths = batch_reports(cube, args.by, values, version=version, output_dir=args.output, workers=args.workers)
+    print(f"{len(paths)} rapport(s) écrit(s) dans {args.output} en {time.perf_counter() - start_time:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Échantillon stratifié des ventes pour le mode rapide (réponses approchées) du dashboard.
+
+Chaque strate Région × Catégorie garde au plus `per_stratum` ventes tirées uniformément.
+Le tirage est fait au chargement, puis tenu à jour par réservoir (algorithme R) quand des
+ventes sont ajoutées : chaque vente vue reste dans l'échantillon avec la même probabilité.
+Une sélection de la barre latérale se résout sur l'échantillon (quelques milliers de lignes) ;
+moyennes et totaux sont estimés strate par strate avec un intervalle de confiance, à partir
+des effectifs exacts de chaque strate dans la sélection (lus dans le cube d'agrégats).
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from nexus.index import FilterIndex
+
+STRATA = ['Region', 'Product_Category']
+PER_STRATUM = 10_000
+# En dessous, l'échantillon de la sélection est jugé trop petit : le calcul exact est préférable
+MIN_SAMPLE_ROWS = 1_000
+CONFIDENCE = 0.95
+
+
+def stratum_keys(df, strata=STRATA):
+    """Clé de strate de chaque vente (valeurs jointes, stable d'un lot à l'autre)"""
+    grouped = df.groupby(strata, observed=True, sort=False)
+    labels = np.array([' | '.join(map(str, key)) for key in grouped.size().index], dtype=object)
+    return labels[grouped.ngroup().to_numpy()]
+
+
+def _reservoir(slots, before, n_new, capacity, rng):
+    """
+    Réservoir d'une strate après `n_new` ventes supplémentaires (algorithme R, vectorisé).
+    `slots` : contenu actuel ; les nouvelles ventes sont notées -1, -2, ... dans l'ordre d'arrivée.
+    """
+    position = before + np.arange(1, n_new + 1)
+    accepted = np.flatnonzero((position <= capacity) | (rng.random(n_new) < capacity / position))
+    accepted = -1 - accepted
+    n_fill = min(max(capacity - len(slots), 0), len(accepted))
+    reservoir = np.r_[slots, accepted[:n_fill]]
+    replacing = accepted[n_fill:]
+    if len(replacing):
+        # Chaque acceptation remplace un élément tiré au hasard : seule la dernière arrivée sur un emplacement compte
+        targets = rng.integers(0, capacity, size=len(replacing))
+        last_targets, last = np.unique(targets[::-1], return_index=True)
+        reservoir[last_targets] = replacing[::-1][last]
+    return reservoir
+
+
+class StratifiedSample:
+    """Réservoir uniforme par strate, filtrable comme le frame des transactions"""
+
+    def __init__(self, rows, seen, strata=STRATA, per_stratum=PER_STRATUM, seed=0):
+        self.rows = rows.reset_index(drop=True)
+        self.keys = stratum_keys(self.rows, strata)
+        # Ventes vues par strate (taille de la population)
+        self.seen = seen
+        self.strata = strata
+        self.per_stratum = per_stratum
+        self.seed = seed
+        self.index = FilterIndex(self.rows)
+
+    @classmethod
+    def build(cls, df, strata=STRATA, per_stratum=PER_STRATUM, seed=0):
+        """Tirage initial sans remise de `per_stratum` ventes par strate"""
+        rng = np.random.default_rng(seed)
+        keys = stratum_keys(df, strata)
+        order = np.lexsort((rng.random(len(df)), pd.factorize(keys)[0]))
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        rows = df.take(np.sort(order[rank < per_stratum]))
+        return cls(rows, pd.Series(keys).value_counts(), strata, per_stratum, seed)
+
+    def append(self, df):
+        """Nouvel échantillon intégrant des ventes supplémentaires : seules les nouvelles lignes sont parcourues"""
+        if len(df) == 0:
+            return self
+        rng = np.random.default_rng([self.seed, int(self.seen.sum())])
+        keys = stratum_keys(df, self.strata)
+        seen = self.seen.copy()
+        kept = ~np.isin(self.keys, pd.unique(keys))
+        chosen = [np.flatnonzero(kept)]
+        for key in pd.unique(keys):
+            new = np.flatnonzero(keys == key)
+            before = int(seen.get(key, 0))
+            reservoir = _reservoir(np.flatnonzero(self.keys == key), before, len(new), self.per_stratum, rng)
+            # Indices négatifs : ventes du nouveau lot, ramenées à leur ligne dans `df`
+            chosen.append(np.where(reservoir >= 0, reservoir, -1 - new[np.clip(-1 - reservoir, 0, len(new) - 1)]))
+            seen[key] = before + len(new)
+        chosen = np.concatenate(chosen)
+        rows = pd.concat([self.rows.take(np.sort(chosen[chosen >= 0])), df.take(np.sort(-1 - chosen[chosen < 0]))],
+                         ignore_index=True)
+        # Les modalités nouvelles font perdre le type catégoriel lors de la concaténation
+        for col in self.rows.columns:
+            if isinstance(self.rows[col].dtype, pd.CategoricalDtype) and not isinstance(rows[col].dtype, pd.CategoricalDtype):
+                rows[col] = rows[col].astype('category')
+        return StratifiedSample(rows, seen, self.strata, self.per_stratum, self.seed)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def select(self, selections=None, ranges=None, population=None):
+        """
+        Ventes de l'échantillon correspondant au filtre.
+        `population` : effectif exact de chaque strate dans la sélection (Series indexée par
+        `stratum_keys`) ; à défaut, il est estimé à partir de la part de l'échantillon retenue.
+        """
+        rows = self.index.select(selections, ranges)
+        rows = np.arange(len(self.rows)) if rows is None else rows
+        keys = self.keys[rows]
+        sampled = pd.Series(self.keys).value_counts()
+        in_domain = pd.Series(keys).value_counts()
+        if population is None:
+            population = (self.seen.reindex(in_domain.index) * in_domain / sampled.reindex(in_domain.index)).round()
+        return SampleSlice(self.rows.take(rows), keys, population.astype(np.float64))
+
+
+class SampleSlice:
+    """Sélection de l'échantillon : estimateurs stratifiés et sous-échantillon auto-pondéré pour les graphiques"""
+
+    def __init__(self, rows, keys, population):
+        self.rows = rows
+        self.keys = keys
+        counts = pd.Series(keys).value_counts()
+        # Strates de la sélection représentées dans l'échantillon (les autres sont ignorées)
+        population = population[population > 0]
+        self.population = population[population.index.isin(counts.index)]
+        self.sample_counts = counts.reindex(self.population.index)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def size(self):
+        """Nombre de ventes de la sélection (population)"""
+        return float(self.population.sum())
+
+    @property
+    def fraction(self):
+        return len(self) / self.size if self.size else 0.0
+
+    @property
+    def complete(self):
+        """Toutes les ventes de la sélection sont dans l'échantillon : les estimations sont exactes"""
+        return bool((self.sample_counts >= self.population).all())
+
+    def mean(self, measure, confidence=CONFIDENCE):
+        """Moyenne estimée et demi-largeur de son intervalle de confiance"""
+        if self.size == 0:
+            return np.nan, np.nan
+        grouped = pd.Series(self.rows[measure].to_numpy(dtype=np.float64)).groupby(self.keys)
+        means = grouped.mean().reindex(self.population.index)
+        variances = grouped.var(ddof=1).reindex(self.population.index).fillna(0.0)
+        weights = self.population / self.size
+        n, big_n = self.sample_counts, self.population
+        # Variance de l'estimateur stratifié, avec correction de population finie
+        variance = float((weights**2 * (1 - n / big_n).clip(lower=0) * variances / n).sum())
+        z = norm.ppf(0.5 + confidence / 2)
+        return float((weights * means).sum()), z * np.sqrt(variance)
+
+    def total(self, measure, confidence=CONFIDENCE):
+        """Total estimé et demi-largeur de son intervalle de confiance"""
+        mean, half_width = self.mean(measure, confidence)
+        return mean * self.size, half_width * self.size
+
+    def frame(self, columns=None, n=None, seed=0):
+        """
+        Ventes tirées (avec remise) proportionnellement au poids de leur strate : le tableau obtenu
+        est représentatif de la sélection et se trace sans pondération. `n` : taille (défaut : celle
+        de la sélection dans l'échantillon).
+        """
+        rows = self.rows if columns is None else self.rows[[col for col in columns if col in self.rows.columns]]
+        per_row = (self.population / self.sample_counts).reindex(self.keys).fillna(0.0).to_numpy()
+        if len(rows) == 0 or per_row.sum() == 0:
+            return rows.iloc[:0]
+        if np.allclose(per_row[per_row > 0], per_row[per_row > 0][0]):
+            # Strates déjà échantillonnées au même taux : pas de tirage
+            return rows[per_row > 0] if n is None or n >= len(rows) else rows[per_row > 0].sample(n, random_state=seed)
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(rows), size=n or len(rows), p=per_row / per_row.sum())
+        return rows.take(np.sort(picks))
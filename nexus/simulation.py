@@ -0,0 +1,108 @@
+"""
+Simulation Monte Carlo des scénarios du Simulateur IA.
+
+Les variations de prix, de volume, de coûts et l'élasticité sont tirées pour chaque scénario
+et chaque segment (Region × Product_Category), puis appliquées aux ventes et coûts agrégés du
+segment, comme la projection déterministe de la page. Tous les scénarios sont évalués en une
+seule passe NumPy sur une matrice (scénarios × segments) : le coût ne dépend ni du nombre de
+ventes, ni d'une boucle Python par scénario.
+
+Les chocs d'un même scénario sont corrélés entre segments (`correlation`) : 1 = même choc
+partout, 0 = segments indépendants.
+"""
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+SEGMENT_DIMENSIONS = ['Region', 'Product_Category']
+DISTRIBUTIONS = ['normal', 'uniform', 'triangular']
+DEFAULT_QUANTILES = (5, 50, 95)
+
+
+def segment_totals(cube_slice, by=SEGMENT_DIMENSIONS):
+    """Ventes et coûts (ventes - profit) par segment, à partir d'une sélection du cube"""
+    totals = cube_slice.rollup(list(by), ['Sales_Amount', 'Profit'])
+    totals['Cost'] = totals['Sales_Amount'] - totals['Profit']
+    return totals[list(by) + ['Sales_Amount', 'Cost', 'Profit']]
+
+
+def _shocks(rng, n_scenarios, n_segments, correlation):
+    """Tirages normaux centrés réduits (scénarios × segments), corrélés entre segments"""
+    common = rng.standard_normal((n_scenarios, 1), dtype=np.float32)
+    own = rng.standard_normal((n_scenarios, n_segments), dtype=np.float32)
+    return np.float32(np.sqrt(correlation)) * common + np.float32(np.sqrt(1 - correlation)) * own
+
+
+def _draw(rng, mean, sd, shape, correlation, distribution):
+    """
+    Tirages de moyenne `mean` et d'écart-type `sd` ; les lois uniforme et triangulaire
+    (symétriques) sont obtenues à partir des tirages normaux corrélés (copule gaussienne).
+    """
+    if sd == 0:
+        return np.full(shape, mean, dtype=np.float32)
+    z = _shocks(rng, shape[0], shape[1], correlation)
+    mean, sd = np.float32(mean), np.float32(sd)
+    if distribution == 'normal':
+        return mean + sd * z
+    u = ndtr(z)
+    if distribution == 'uniform':
+        return mean + sd * np.float32(np.sqrt(3)) * (2 * u - 1)
+    if distribution == 'triangular':
+        half_width = sd * np.float32(np.sqrt(6))
+        return mean + half_width * np.where(u < 0.5, np.sqrt(2 * u) - 1, 1 - np.sqrt(2 * (1 - u)))
+    raise ValueError(f"Loi inconnue : {distribution}")
+
+
+def simulate(sales, costs, price=(0.0, 0.0), volume=(0.0, 0.0), cost=(0.0, 0.0), elasticity=(-1.5, 0.0),
+             n_scenarios=10_000, correlation=0.7, distribution='normal', seed=42):
+    """
+    Simule `n_scenarios` scénarios sur les segments de ventes `sales` et de coûts `costs`.
+    price, volume, cost : (moyenne, écart-type) des variations en %, elasticity : (moyenne, écart-type).
+    Retourne (ventes, coûts) projetés, matrices (scénarios × segments).
+    Avec des écarts-types nuls, chaque scénario vaut la projection déterministe.
+    """
+    # Tirages et projections en float32 (moitié moins de mémoire à parcourir), totaux en float64
+    sales = np.asarray(sales, dtype=np.float32)
+    costs = np.asarray(costs, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    shape = (n_scenarios, len(sales))
+    price_change = _draw(rng, *price, shape, correlation, distribution)
+    volume_change = _draw(rng, *volume, shape, correlation, distribution)
+    cost_change = _draw(rng, *cost, shape, correlation, distribution)
+    elasticities = _draw(rng, *elasticity, shape, correlation, distribution)
+
+    # Volume jamais négatif, comme dans la projection déterministe (ElasticityModel.project)
+    volume_factor = np.maximum(1 + (volume_change + price_change * elasticities) / 100, np.float32(0))
+    projected_sales = sales * volume_factor * (1 + price_change / 100)
+    projected_costs = costs * volume_factor * (1 + cost_change / 100)
+    return projected_sales, projected_costs
+
+
+def summarize(projected_sales, projected_costs, quantiles=DEFAULT_QUANTILES):
+    """Totaux par scénario et leurs quantiles (ex. P5/P50/P95)"""
+    sales = projected_sales.sum(axis=1, dtype=np.float64)
+    costs = projected_costs.sum(axis=1, dtype=np.float64)
+    profit = sales - costs
+    return {
+        'sales': sales,
+        'profit': profit,
+        'quantiles': {
+            name: dict(zip(quantiles, np.percentile(values, quantiles)))
+            for name, values in (('sales', sales), ('costs', costs), ('profit', profit))
+        },
+    }
+
+
+def segment_bands(segments, projected_sales, projected_costs, quantiles=DEFAULT_QUANTILES):
+    """Quantiles du profit projeté de chaque segment (une colonne P<q> par quantile)"""
+    bands = np.percentile(projected_sales - projected_costs, quantiles, axis=0)
+    result = segments.drop(columns=['Sales_Amount', 'Cost']).copy()
+    for q, band in zip(quantiles, bands):
+        result[f"P{q}"] = band
+    return result
+
+
+def histogram(values, bins=60):
+    """Histogramme (centres, effectifs) calculé côté serveur : charge du graphique constante"""
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({'value': (edges[:-1] + edges[1:]) / 2, 'count': counts})
@@ -0,0 +1,263 @@
+"""
+Résumés de distribution (histogramme, boîte à moustaches) calculés côté serveur.
+
+Chaque mesure est résumée par un sketch de quantiles à précision relative (type DDSketch) :
+une valeur x tombe dans le compartiment k = ⌈log_γ |x|⌉ (signé), avec γ = (1 + α) / (1 - α),
+dont la valeur représentative est à α près (1 %) de toute valeur du compartiment. Un quantile
+est calculé comme `np.quantile` (interpolation entre les deux valeurs de rangs voisins), chaque
+valeur étant remplacée par le représentant de son compartiment : l'erreur est d'au plus α fois
+la plus grande de ces deux valeurs (en valeur absolue), et d'au plus `MIN_VALUE` près de zéro.
+Deux sketches se fusionnent en additionnant les effectifs de leurs compartiments. Un sketch est tenu par cellule (jour, Région, Catégorie,
+Canal, Type de client), en stockage creux : une sélection de la barre latérale additionne les
+sketches de ses cellules au lieu de relire les ventes, et le graphique envoyé au navigateur
+(une trentaine de barres, cinq statistiques et au plus `OUTLIER_CAP` points par boîte) a une
+taille indépendante du nombre de ventes.
+"""
+import numpy as np
+import pandas as pd
+
+from nexus.index import FilterIndex
+from nexus.moments import MOMENT_DIMENSIONS
+
+SKETCH_MEASURES = ['Unit_Price', 'Profit']
+RELATIVE_ACCURACY = 0.01
+# En deçà (en valeur absolue), une valeur compte comme zéro
+MIN_VALUE = 1e-3
+HISTOGRAM_BINS = 30
+OUTLIER_CAP = 100
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+# Les codes signés commencent à 1 pour |x| = MIN_VALUE ; 0 est le compartiment des valeurs nulles
+_KEY_OFFSET = int(np.ceil(np.log(MIN_VALUE) / _LOG_GAMMA)) - 1
+
+
+def bucket_codes(values):
+    """Code signé du compartiment de chaque valeur (0 pour |x| < MIN_VALUE)"""
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(values)
+    codes = np.zeros(len(values), dtype=np.int32)
+    large = magnitude >= MIN_VALUE
+    keys = np.ceil(np.log(magnitude[large]) / _LOG_GAMMA).astype(np.int64) - _KEY_OFFSET
+    codes[large] = (np.sign(values[large]) * keys).astype(np.int32)
+    return codes
+
+
+def bucket_values(codes):
+    """Valeur représentative de chaque compartiment (erreur relative au plus RELATIVE_ACCURACY)"""
+    codes = np.asarray(codes, dtype=np.int64)
+    keys = np.abs(codes) + _KEY_OFFSET
+    values = 2 * np.exp(keys * _LOG_GAMMA) / (_GAMMA + 1)
+    return np.where(codes == 0, 0.0, np.sign(codes) * values)
+
+
+def bucket_bounds(codes):
+    """Intervalle [bas, haut] couvert par chaque compartiment"""
+    codes = np.asarray(codes, dtype=np.int64)
+    keys = np.abs(codes) + _KEY_OFFSET
+    inner, outer = np.exp((keys - 1) * _LOG_GAMMA), np.exp(keys * _LOG_GAMMA)
+    low = np.where(codes > 0, inner, -outer)
+    high = np.where(codes > 0, outer, -inner)
+    return np.where(codes == 0, 0.0, low), np.where(codes == 0, 0.0, high)
+
+
+class Sketch:
+    """Effectifs par compartiment d'une sélection, avec minimum et maximum exacts"""
+
+    def __init__(self, codes, counts, low=np.nan, high=np.nan):
+        order = np.argsort(bucket_values(codes), kind='stable')
+        self.codes = np.asarray(codes)[order]
+        self.counts = np.asarray(counts, dtype=np.float64)[order]
+        self.values = bucket_values(self.codes)
+        self.low = float(low)
+        self.high = float(high)
+
+    @classmethod
+    def from_values(cls, values):
+        """Sketch d'un tableau de valeurs (ex. échantillon du mode rapide)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return cls(np.array([], dtype=np.int32), np.array([]))
+        codes, counts = np.unique(bucket_codes(values), return_counts=True)
+        return cls(codes, counts, values.min(), values.max())
+
+    @property
+    def count(self):
+        return float(self.counts.sum())
+
+    def merge(self, other):
+        codes, inverse = np.unique(np.r_[self.codes, other.codes], return_inverse=True)
+        counts = np.bincount(inverse, weights=np.r_[self.counts, other.counts])
+        return Sketch(codes, counts, np.nanmin([self.low, other.low]), np.nanmax([self.high, other.high]))
+
+    def _distribution(self):
+        """
+        Fonction de répartition linéaire par morceaux : l'effectif de chaque compartiment est
+        réparti uniformément sur son intervalle (borné par le minimum et le maximum exacts).
+        """
+        lows, highs = bucket_bounds(self.codes)
+        lows, highs = np.clip(lows, self.low, self.high), np.clip(highs, self.low, self.high)
+        cumulative = np.cumsum(self.counts)
+        xs = np.column_stack([lows, highs]).ravel()
+        ys = np.column_stack([cumulative - self.counts, cumulative]).ravel()
+        return xs, ys
+
+    def _ranked(self, ranks):
+        """Estimation des valeurs de rangs `ranks` (0 à count - 1) : représentant de leur compartiment"""
+        cumulative = np.cumsum(self.counts)
+        buckets = np.minimum(np.searchsorted(cumulative, ranks, side='right'), len(cumulative) - 1)
+        values = np.clip(self.values[buckets], self.low, self.high)
+        # Premier et dernier rangs : minimum et maximum exacts
+        return np.where(ranks <= 0, self.low, np.where(ranks >= self.count - 1, self.high, values))
+
+    def quantiles(self, qs):
+        """
+        Quantiles (interpolation linéaire entre rangs voisins, comme `np.quantile`), à
+        RELATIVE_ACCURACY près, bornés par le minimum et le maximum exacts.
+        """
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        ranks = np.asarray(qs, dtype=np.float64) * (self.count - 1)
+        below = np.floor(ranks)
+        lower, upper = self._ranked(below), self._ranked(np.minimum(below + 1, self.count - 1))
+        return lower + (ranks - below) * (upper - lower)
+
+    def histogram(self, bins=HISTOGRAM_BINS):
+        """Effectifs sur `bins` intervalles égaux entre le minimum et le maximum de la sélection"""
+        if self.count == 0:
+            return np.array([]), np.array([])
+        edges = np.linspace(self.low, self.high if self.high > self.low else self.low + 1, bins + 1)
+        xs, ys = self._distribution()
+        cumulative = np.interp(edges, xs, ys)
+        # Les valeurs égales au minimum (compartiment de largeur nulle) tombent dans le premier intervalle
+        cumulative[0], cumulative[-1] = 0.0, self.count
+        return edges, np.diff(cumulative)
+
+    def box(self, outlier_cap=OUTLIER_CAP):
+        """
+        Statistiques de boîte (quartiles, moustaches à 1,5 × IQR) et valeurs atypiques : au plus
+        `outlier_cap` compartiments, les plus extrêmes d'abord, minimum et maximum exacts compris.
+        """
+        q1, median, q3 = self.quantiles([0.25, 0.5, 0.75])
+        low_fence, high_fence = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        # Moustaches : compartiments extrêmes qui touchent l'intervalle des bornes, ramenés aux bornes
+        bucket_low, bucket_high = bucket_bounds(self.codes)
+        inside = (bucket_high >= low_fence) & (bucket_low <= high_fence)
+        if inside.any():
+            lower = max(bucket_low[inside].min(), low_fence, self.low)
+            upper = min(bucket_high[inside].max(), high_fence, self.high)
+        else:
+            lower, upper = q1, q3
+        below, above = self.values[self.values < lower], self.values[self.values > upper]
+        half = outlier_cap // 2
+        below, above = below[:half], above[::-1][:outlier_cap - min(len(below), half)]
+        # Les extrêmes exacts remplacent leurs compartiments
+        if len(below):
+            below[0] = self.low
+        if len(above):
+            above[0] = self.high
+        return {'q1': q1, 'median': median, 'q3': q3, 'lowerfence': lower, 'upperfence': upper,
+                'outliers': np.r_[below, above]}
+
+
+def _cells(df, dimensions):
+    keys = pd.DataFrame({dim: df[dim] for dim in dimensions})
+    if 'Sale_Date' in keys.columns:
+        keys['Sale_Date'] = pd.to_datetime(keys['Sale_Date']).dt.normalize()
+    grouped = keys.groupby(dimensions, observed=True, sort=False)
+    return grouped.ngroup().to_numpy(), grouped.size().reset_index()[dimensions]
+
+
+def _entries(cells, values, n_cells):
+    """Effectifs creux (cellule, compartiment) triés par cellule, et extrêmes par cellule"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    cells, values = cells[valid], values[valid]
+    codes = bucket_codes(values).astype(np.int64)
+    span = int(np.abs(codes).max(initial=0)) * 2 + 1
+    combined, counts = np.unique(cells.astype(np.int64) * span + codes + span // 2, return_counts=True)
+    low = np.full(n_cells, np.inf)
+    high = np.full(n_cells, -np.inf)
+    np.minimum.at(low, cells, values)
+    np.maximum.at(high, cells, values)
+    return {'cell': (combined // span).astype(np.int32), 'code': (combined % span - span // 2).astype(np.int32),
+            'count': counts.astype(np.int64), 'low': low, 'high': high}
+
+
+class SketchCube:
+    """Sketches de quantiles par cellule et par mesure, filtrables comme le cube de ventes"""
+
+    def __init__(self, keys, entries):
+        for dim in keys.columns:
+            if dim != 'Sale_Date':
+                keys[dim] = keys[dim].astype('category')
+        self.keys = keys
+        self.entries = entries
+        self.measures = list(entries)
+        self.index = FilterIndex(keys)
+        # Début des effectifs de chaque cellule (les entrées sont triées par cellule)
+        self.offsets = {m: np.searchsorted(e['cell'], np.arange(len(keys) + 1)) for m, e in entries.items()}
+
+    @classmethod
+    def build(cls, df, measures=None, dimensions=None):
+        measures = [m for m in (measures or SKETCH_MEASURES) if m in df.columns]
+        dimensions = [d for d in (dimensions or MOMENT_DIMENSIONS) if d in df.columns]
+        cells, keys = _cells(df, dimensions)
+        return cls(keys, {m: _entries(cells, df[m].to_numpy(), len(keys)) for m in measures})
+
+    @property
+    def dimensions(self):
+        return list(self.keys.columns)
+
+    @property
+    def source_columns(self):
+        """Colonnes des transactions lues pour mettre le cube à jour"""
+        return self.dimensions + self.measures
+
+    def append(self, df):
+        """Nouveau cube intégrant des ventes supplémentaires : seules les nouvelles lignes sont parcourues"""
+        if len(df) == 0:
+            return self
+        new = SketchCube.build(df, self.measures, self.dimensions)
+        plain = {d: object for d in self.dimensions if d != 'Sale_Date'}
+        all_keys = pd.concat([self.keys.astype(plain), new.keys.astype(plain)], ignore_index=True)
+        grouped = all_keys.groupby(self.dimensions, observed=True, sort=False)
+        remap, keys = grouped.ngroup().to_numpy(), grouped.size().reset_index()[self.dimensions]
+        entries = {}
+        for m in self.measures:
+            old, added = self.entries[m], new.entries[m]
+            cells = np.r_[remap[old['cell']], remap[len(self.keys) + added['cell']]].astype(np.int64)
+            codes = np.r_[old['code'], added['code']].astype(np.int64)
+            span = int(np.abs(codes).max(initial=0)) * 2 + 1
+            combined, inverse = np.unique(cells * span + codes + span // 2, return_inverse=True)
+            low, high = np.full(len(keys), np.inf), np.full(len(keys), -np.inf)
+            np.minimum.at(low, remap, np.r_[old['low'], added['low']])
+            np.maximum.at(high, remap, np.r_[old['high'], added['high']])
+            entries[m] = {'cell': (combined // span).astype(np.int32), 'code': (combined % span - span // 2).astype(np.int32),
+                          'count': np.bincount(inverse, weights=np.r_[old['count'], added['count']]).astype(np.int64),
+                          'low': low, 'high': high}
+        return SketchCube(keys, entries)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def select(self, measure, selections=None, ranges=None):
+        """Sketch de `measure` pour la sélection : fusion des sketches des cellules retenues"""
+        if measure not in self.entries:
+            raise ValueError(f"Pas de sketch pour la mesure {measure!r} (mesures disponibles : {', '.join(self.measures)})")
+        entries, offsets = self.entries[measure], self.offsets[measure]
+        rows = self.index.select(selections, ranges)
+        if rows is None:
+            taken, cells = slice(None), slice(None)
+        else:
+            lengths = offsets[rows + 1] - offsets[rows]
+            # Indices des entrées de chaque cellule retenue, bout à bout
+            taken = np.repeat(offsets[rows] - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+            cells = rows
+        codes = entries['code'][taken]
+        if len(codes) == 0:
+            return Sketch(np.array([], dtype=np.int32), np.array([]))
+        unique, inverse = np.unique(codes, return_inverse=True)
+        counts = np.bincount(inverse, weights=entries['count'][taken])
+        return Sketch(unique, counts, entries['low'][cells].min(), entries['high'][cells].max())
@@ -0,0 +1,208 @@
+"""
+Stockage colonnaire des ventes nettoyées.
+
+Le tableau nettoyé est écrit en Parquet, partitionné par mois (`Sale_Month=AAAA-MM`)
+avec les colonnes catégorielles encodées en dictionnaire. La lecture se fait par
+projection de colonnes : chaque page ne charge que ce qu'elle affiche.
+Le CSV historique reste utilisable et est converti automatiquement au premier accès.
+"""
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DATA_DIR = Path('output/data')
+CSV_PATH = DATA_DIR / 'cleaned_sales_data.csv'
+STORE_PATH = DATA_DIR / 'cleaned_sales_data.parquet'
+
+PARTITION_COL = 'Sale_Month'
+CATEGORICAL_COLS = [
+    'Region', 'Sales_Rep', 'Product_Category', 'Customer_Type',
+    'Payment_Method', 'Sales_Channel', 'Region_and_Sales_Rep'
+]
+
+
+def store_is_fresh(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """Vrai si le store Parquet existe et n'est pas plus ancien que le CSV source"""
+    store_path, csv_path = Path(store_path), Path(csv_path)
+    if not store_path.is_dir() or not any(store_path.iterdir()):
+        return False
+    if csv_path.exists():
+        return store_path.stat().st_mtime >= csv_path.stat().st_mtime
+    return True
+
+
+def data_version(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """
+    Identifiant de version des données (nombre, taille et date des fichiers du store).
+    Sert à invalider les caches dérivés (modèles, agrégats) quand les ventes changent.
+    """
+    files = store_files(store_path)
+    if not files and Path(csv_path).exists():
+        files = [csv_path]
+    stats = [p.stat() for p in files]
+    return f"{len(stats)}-{sum(st.st_size for st in stats)}-{max((st.st_mtime_ns for st in stats), default=0)}"
+
+
+def _prepare(df):
+    """Ajoute la colonne de partition et encode les catégorielles en dictionnaire"""
+    data = df.copy()
+    data['Sale_Date'] = pd.to_datetime(data['Sale_Date'])
+    data[PARTITION_COL] = data['Sale_Date'].dt.strftime('%Y-%m')
+
+    # Encodage dictionnaire des catégorielles (stockées une seule fois par fichier)
+    for col in CATEGORICAL_COLS:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def _widen(schema):
+    """
+    Schéma commun à tous les blocs d'un store : le premier bloc ne fixe ni la largeur des index
+    de dictionnaire (nombre de modalités) ni celle des entiers, qu'un bloc suivant peut dépasser.
+    """
+    fields = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type, field.type.ordered))
+        elif pa.types.is_integer(field.type) and field.type != pa.uint64():
+            field = field.with_type(pa.int64())
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def _dataset(source, **kwargs):
+    """Dataset Parquet lu avec le schéma élargi (stores écrits avant l'élargissement compris)"""
+    dataset = ds.dataset(source, format='parquet', **kwargs)
+    return ds.dataset(source, format='parquet', schema=_widen(dataset.schema), **kwargs)
+
+
+def store_files(store_path=STORE_PATH):
+    """Fichiers Parquet du store, triés"""
+    store_path = Path(store_path)
+    return sorted(store_path.rglob('*.parquet')) if store_path.is_dir() else []
+
+
+def write_store(df, store_path=STORE_PATH):
+    """Écrit le DataFrame nettoyé en Parquet partitionné par mois"""
+    return write_store_chunks([df], store_path)
+
+
+def write_store_chunks(chunks, store_path=STORE_PATH):
+    """
+    Écrit en Parquet partitionné une suite de DataFrames (même schéma), sans jamais
+    les concaténer en mémoire : chaque bloc est converti puis écrit au fil de l'eau.
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow est requis pour écrire le store Parquet")
+
+    store_path = Path(store_path)
+    chunks = iter(chunks)
+    first = _prepare(next(chunks))
+    schema = _widen(first.schema)
+
+    def batches():
+        yield from first.cast(schema).to_batches()
+        for chunk in chunks:
+            yield from _prepare(chunk).select(schema.names).cast(schema).to_batches()
+
+    # Écriture dans un dossier temporaire puis bascule, pour ne jamais exposer un store partiel
+    tmp_path = store_path.with_name(store_path.name + '.tmp')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(
+        batches(), tmp_path, schema=schema, format='parquet',
+        partitioning=[PARTITION_COL], partitioning_flavor='hive',
+        existing_data_behavior='overwrite_or_ignore'
+    )
+    old_path = store_path.with_name(store_path.name + '.old')
+    if store_path.exists():
+        shutil.rmtree(old_path, ignore_errors=True)
+        store_path.rename(old_path)
+    tmp_path.rename(store_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return store_path
+
+
+def append_store(df, name, store_path=STORE_PATH):
+    """
+    Ajoute des ventes au store sans réécrire l'existant : les nouveaux fichiers
+    (`<name>-<n>.parquet`) sont écrits à part puis déplacés dans leurs partitions mensuelles.
+    Retourne la liste des fichiers ajoutés.
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow est requis pour écrire le store Parquet")
+
+    store_path = Path(store_path)
+    table = _prepare(df)
+    if store_files(store_path):
+        # Même schéma que les fichiers existants (ordre des colonnes, types des dictionnaires)
+        schema = _dataset(store_path, partitioning='hive').schema
+        table = table.select(schema.names).cast(schema)
+    else:
+        table = table.cast(_widen(table.schema))
+
+    tmp_path = store_path.with_name(f"{store_path.name}.{name}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(
+        table, tmp_path, format='parquet',
+        partitioning=[PARTITION_COL], partitioning_flavor='hive',
+        basename_template=f"{name}-{{i}}.parquet"
+    )
+    added = []
+    for part in sorted(tmp_path.rglob('*.parquet')):
+        target = store_path / part.relative_to(tmp_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part, target)
+        added.append(target)
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    return added
+
+
+def read_store_files(files, columns=None):
+    """Lit un sous-ensemble de fichiers du store (ex. ceux ajoutés depuis la dernière lecture)"""
+    dataset = _dataset([str(path) for path in files])
+    if columns is not None:
+        columns = [col for col in columns if col in dataset.schema.names]
+    return dataset.to_table(columns=columns).to_pandas()
+
+
+def read_store(columns=None, store_path=STORE_PATH):
+    """Lit le store Parquet en ne chargeant que les colonnes demandées"""
+    dataset = _dataset(store_path, partitioning='hive')
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != PARTITION_COL]
+    else:
+        columns = [col for col in columns if col in dataset.schema.names]
+    return dataset.to_table(columns=columns).to_pandas()
+
+
+def convert_csv_to_store(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """Convertit le CSV nettoyé en store Parquet (une seule lecture complète du CSV)"""
+    df = pd.read_csv(csv_path, parse_dates=['Sale_Date'])
+    return write_store(df, store_path)
+
+
+def load_sales(columns=None, csv_path=CSV_PATH, store_path=STORE_PATH):
+    """
+    Charge les ventes nettoyées depuis le store Parquet.
+    Le CSV est converti au premier usage ; il sert de repli si pyarrow est absent.
+    """
+    if PYARROW_AVAILABLE:
+        if not store_is_fresh(csv_path, store_path):
+            convert_csv_to_store(csv_path, store_path)
+        return read_store(columns, store_path)
+
+    if columns is None:
+        return pd.read_csv(csv_path, parse_dates=['Sale_Date'])
+    usecols = lambda col: col in columns
+    parse_dates = ['Sale_Date'] if 'Sale_Date' in columns else False
+    return pd.read_csv(csv_path, usecols=usecols, parse_dates=parse_dates)
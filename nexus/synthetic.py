@@ -0,0 +1,150 @@
+"""
+Générateur vectorisé de ventes synthétiques, au schéma de `sales_data.csv`.
+
+Chaque colonne est tirée en un seul appel NumPy par bloc : aucune boucle par transaction.
+Les ventes sont réparties sur les jours de la période puis produites par blocs de dates
+consécutives, ce qui permet d'écrire des dizaines de millions de lignes en Parquet avec
+une mémoire bornée par la taille d'un bloc.
+
+    python -m nexus.synthetic --rows 10000000 --reps 20 --skew 1.1 --output /tmp/sales.parquet
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from nexus.cleaning import RAW_COLUMNS, clean_sales
+from nexus.features import point_totals
+
+REGIONS = ['East', 'North', 'South', 'West']
+SALES_REPS = ['Alice', 'Bob', 'Charlie', 'David', 'Eve']
+PRODUCT_CATEGORIES = ['Clothing', 'Electronics', 'Food', 'Furniture']
+CUSTOMER_TYPES = ['New', 'Returning']
+PAYMENT_METHODS = ['Bank Transfer', 'Cash', 'Credit Card']
+SALES_CHANNELS = ['Online', 'Retail']
+PRODUCT_IDS = (1000, 1100)
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def rep_names(n_reps):
+    """Noms des commerciaux : ceux du jeu réel, complétés par Rep_06, Rep_07..."""
+    return SALES_REPS[:n_reps] + [f"Rep_{i:02d}" for i in range(len(SALES_REPS) + 1, n_reps + 1)]
+
+
+def skewed_weights(n, skew):
+    """Poids de type Zipf (rang^-skew) ; skew = 0 donne une répartition uniforme"""
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def _categorical(rng, values, size, skew=0.0):
+    codes = rng.choice(len(values), size=size, p=skewed_weights(len(values), skew))
+    return pd.Categorical.from_codes(codes, categories=values)
+
+
+def _chunk(rng, dates, n_reps, skew, product_ids):
+    """Bloc de transactions pour les dates données (une ligne par date)"""
+    n = len(dates)
+    reps = rep_names(n_reps)
+    region_codes = rng.integers(0, len(REGIONS), n)
+    rep_codes = rng.integers(0, n_reps, n)
+    points = [f"{region}-{rep}" for region in REGIONS for rep in reps]
+
+    # Produits : rangs tirés selon une loi de Zipf pour reproduire des best-sellers
+    product_rank = rng.choice(len(product_ids), size=n, p=skewed_weights(len(product_ids), skew))
+
+    unit_cost = rng.uniform(10, 5000, n).round(2)
+    # Marges du jeu réel : prix = coût × (1 + majoration), majoration médiane ≈ 10 %
+    unit_price = (unit_cost * (1 + rng.exponential(0.15, n))).round(2)
+    return pd.DataFrame({
+        'Product_ID': product_ids[product_rank],
+        'Sale_Date': dates,
+        'Sales_Rep': pd.Categorical.from_codes(rep_codes, categories=reps),
+        'Region': pd.Categorical.from_codes(region_codes, categories=REGIONS),
+        'Sales_Amount': rng.uniform(100, 10000, n).round(2),
+        'Quantity_Sold': rng.integers(1, 50, n),
+        'Product_Category': _categorical(rng, PRODUCT_CATEGORIES, n, skew),
+        'Unit_Cost': unit_cost,
+        'Unit_Price': unit_price,
+        'Customer_Type': _categorical(rng, CUSTOMER_TYPES, n),
+        'Discount': rng.uniform(0, 0.3, n).round(2),
+        'Payment_Method': _categorical(rng, PAYMENT_METHODS, n),
+        'Sales_Channel': _categorical(rng, SALES_CHANNELS, n),
+        'Region_and_Sales_Rep': pd.Categorical.from_codes(region_codes * n_reps + rep_codes, categories=points),
+    }, columns=RAW_COLUMNS)
+
+
+def iter_sales(n_rows, start='2023-01-01', end='2023-12-31', n_reps=len(SALES_REPS), seed=42,
+               skew=0.0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Génère `n_rows` ventes brutes par blocs d'environ `chunk_rows` lignes (jours entiers), triées par date.
+    skew : exposant de Zipf appliqué aux catégories de produit et aux Product_ID (0 = uniforme).
+    """
+    if n_rows <= 0:
+        raise ValueError(f"Nombre de ventes à générer : entier strictement positif attendu, reçu {n_rows}")
+    rng = np.random.default_rng(seed)
+    # Produit de rang k : le même sur tous les blocs
+    product_ids = rng.permutation(np.arange(PRODUCT_IDS[0], PRODUCT_IDS[1] + 1))
+    days = pd.date_range(start, end, freq='D')
+    # Nombre de ventes par jour, puis découpage en blocs de jours consécutifs
+    per_day = rng.multinomial(n_rows, np.full(len(days), 1 / len(days)))
+    bounds = np.searchsorted(np.cumsum(per_day), np.arange(chunk_rows, n_rows, chunk_rows))
+    for block_days, block_counts in zip(np.split(np.arange(len(days)), bounds + 1), np.split(per_day, bounds + 1)):
+        if block_counts.sum() == 0:
+            continue
+        yield _chunk(rng, np.repeat(days.values[block_days], block_counts), n_reps, skew, product_ids)
+
+
+def generate_sales(n_rows, **kwargs):
+    """Génère `n_rows` ventes brutes en un seul DataFrame"""
+    kwargs.setdefault('chunk_rows', max(n_rows, 1))
+    return pd.concat(list(iter_sales(n_rows, **kwargs)), ignore_index=True)
+
+
+def iter_cleaned_sales(n_rows, **kwargs):
+    """Blocs de ventes nettoyées (règles du notebook), cumuls par point de vente poursuivis d'un bloc à l'autre"""
+    n_reps = kwargs.get('n_reps', len(SALES_REPS))
+    categories = {
+        'Sales_Rep': sorted(rep_names(n_reps)),
+        'Region': REGIONS,
+        'Product_Category': PRODUCT_CATEGORIES,
+        'Customer_Type': CUSTOMER_TYPES,
+        'Payment_Method': PAYMENT_METHODS,
+        'Sales_Channel': SALES_CHANNELS,
+        'Region_and_Sales_Rep': sorted(f"{region}-{rep}" for region in REGIONS for rep in rep_names(n_reps)),
+    }
+    offsets = pd.Series(dtype=np.float64)
+    for chunk in iter_sales(n_rows, **kwargs):
+        cleaned = clean_sales(chunk, categories, offsets.to_dict(), drop_duplicates=False)
+        offsets = offsets.add(pd.Series(point_totals(chunk), dtype=np.float64), fill_value=0)
+        yield cleaned
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des ventes synthétiques au format Parquet")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="nombre de ventes")
+    parser.add_argument('--start', default='2023-01-01', help="première date (AAAA-MM-JJ)")
+    parser.add_argument('--end', default='2023-12-31', help="dernière date (AAAA-MM-JJ)")
+    parser.add_argument('--reps', type=int, default=len(SALES_REPS), help="nombre de commerciaux")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skew', type=float, default=0.0, help="exposant de Zipf des catégories (0 = uniforme)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--raw', action='store_true', help="écrire les ventes brutes (sans nettoyage)")
+    parser.add_argument('--output', default='output/data/synthetic_sales.parquet',
+                        help="store Parquet partitionné par mois à écrire")
+    args = parser.parse_args(argv)
+
+    from nexus.store import write_store_chunks
+
+    options = dict(start=args.start, end=args.end, n_reps=args.reps, seed=args.seed,
+                   skew=args.skew, chunk_rows=args.chunk_rows)
+    chunks = iter_sales(args.rows, **options) if args.raw else iter_cleaned_sales(args.rows, **options)
+    start_time = time.perf_counter()
+    path = write_store_chunks(chunks, args.output)
+    print(f"{args.rows:,} ventes écrites dans {path} en {time.perf_counter() - start_time:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Top-k et analyse Pareto sur des dimensions à forte cardinalité (produits, vendeurs...).
+
+Deux moteurs renvoient le même résultat (`TopK`) : les k premières entités, le rang
+auquel le cumul atteint le seuil Pareto (80 %) et le regroupement « Autres » :
+    - exact (`top_k`) : totaux par entité (`bincount` sur les codes), puis sélection partielle
+      (`argpartition`) des k plus grands ; seules ces k valeurs sont triées ;
+    - approché (`SpaceSaving`) : résumé à nombre de compteurs borné, alimenté par blocs,
+      pour les flux trop gros ou trop divers pour des totaux exacts. Chaque compteur surestime
+      le total de son entité d'au plus `error`.
+Le graphique Pareto affiche ainsi au plus k barres, quelle que soit la cardinalité.
+"""
+import numpy as np
+import pandas as pd
+
+from nexus.export import iter_frames
+
+DEFAULT_K = 50
+PARETO_SHARE = 0.8
+OTHERS_LABEL = "Autres"
+# Compteurs du résumé Space-Saving : au-delà de k, ils resserrent la marge d'erreur des k premiers
+DEFAULT_CAPACITY = 2_000
+# Au-delà, une sélection de transactions est parcourue par blocs (Space-Saving, mémoire bornée)
+EXACT_MAX_ROWS = 5_000_000
+
+
+def _codes(keys):
+    """Codes entiers (>= 0, -1 pour une valeur manquante) et libellés correspondants"""
+    keys = pd.Series(keys)
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return keys.cat.codes.to_numpy(), keys.cat.categories.to_numpy()
+    if keys.dtype.kind in 'iu' and len(keys):
+        low, high = int(keys.min()), int(keys.max())
+        # Identifiants entiers denses : les valeurs servent directement de codes
+        if low >= 0 and high < 4 * len(keys) + 65_536:
+            return keys.to_numpy(dtype=np.int64), np.arange(high + 1)
+    return pd.factorize(keys)
+
+
+def _cutoff_rank(values, share):
+    """Nombre d'entités (triées par total décroissant) nécessaires pour atteindre `share` du total"""
+    total = values.sum()
+    if len(values) == 0 or total <= 0:
+        return 0
+    k = min(64, len(values))
+    while True:
+        top = np.sort(values[np.argpartition(-values, k - 1)[:k]])[::-1]
+        rank = int(np.searchsorted(np.cumsum(top), share * total))
+        if rank < k or k == len(values):
+            return min(rank + 1, len(values))
+        k = min(4 * k, len(values))
+
+
+class TopK:
+    """k premières entités d'une dimension, seuil Pareto et reste regroupé"""
+
+    def __init__(self, labels, values, total, n_entities, cutoff_rank, share=PARETO_SHARE, errors=None):
+        self.labels = labels
+        self.values = values
+        self.total = float(total)
+        self.n_entities = n_entities
+        self.cutoff_rank = cutoff_rank
+        self.share = share
+        # None : résultat exact ; sinon surestimation maximale de chaque total (Space-Saving)
+        self.errors = errors
+
+    @property
+    def exact(self):
+        return self.errors is None
+
+    @property
+    def others(self):
+        """Total des entités hors des k premières"""
+        return max(self.total - float(self.values.sum()), 0.0)
+
+    def frame(self, name, value_name='Sales_Amount', others_label=OTHERS_LABEL):
+        """
+        Tableau prêt à tracer : une ligne par entité du top, plus une ligne « Autres » s'il reste
+        des entités, et le cumul en % du total.
+        """
+        result = pd.DataFrame({name: [str(label) for label in self.labels], value_name: self.values})
+        if self.n_entities is None or self.n_entities > len(self.labels):
+            result.loc[len(result)] = [others_label, self.others]
+        result['Cumulative_Pct'] = result[value_name].cumsum() / self.total * 100 if self.total else 0.0
+        return result
+
+
+def top_k(keys, weights, k=DEFAULT_K, share=PARETO_SHARE):
+    """Top-k exact des totaux de `weights` par valeur de `keys` (sélection partielle, sans tri complet)"""
+    codes, labels = _codes(keys)
+    weights = np.asarray(weights, dtype=np.float64)
+    valid = codes >= 0
+    codes, weights = codes[valid], weights[valid]
+    totals = np.bincount(codes, weights=weights, minlength=len(labels))
+    present = np.bincount(codes, minlength=len(labels)) > 0
+    labels, totals = labels[present], totals[present]
+
+    k = min(k, len(totals))
+    top = np.argpartition(-totals, k - 1)[:k] if k else np.array([], dtype=np.int64)
+    top = top[np.argsort(-totals[top], kind='stable')]
+    return TopK(labels[top], totals[top], totals.sum(), len(totals), _cutoff_rank(totals, share), share)
+
+
+class SpaceSaving:
+    """
+    Résumé Space-Saving pondéré, mis à jour par blocs : au plus `capacity` compteurs.
+    Une entité absente du résumé a un total d'au plus `floor` ; une entité nouvelle entre avec
+    `floor` ajouté à son total du bloc (et `floor` comme erreur possible).
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.float64)
+        self.errors = pd.Series(dtype=np.float64)
+        self.floor = 0.0
+        self.total = 0.0
+
+    def update(self, keys, weights):
+        """Intègre un bloc de transactions"""
+        batch = pd.Series(np.asarray(weights, dtype=np.float64)).groupby(np.asarray(keys), sort=False).sum()
+        self.total += float(batch.sum())
+        new = batch.index.difference(self.counts.index)
+        counts = self.counts.add(batch, fill_value=0.0)
+        errors = self.errors.reindex(counts.index, fill_value=0.0)
+        counts[new] += self.floor
+        errors[new] = self.floor
+        if len(counts) > self.capacity:
+            order = np.argsort(-counts.to_numpy(), kind='stable')
+            dropped = counts.iloc[order[self.capacity:]]
+            self.floor = max(self.floor, float(dropped.max()))
+            keep = order[:self.capacity]
+            counts, errors = counts.iloc[keep], errors.iloc[keep]
+        self.counts, self.errors = counts, errors
+        return self
+
+    def top(self, k=DEFAULT_K, share=PARETO_SHARE):
+        """Top-k approché (totaux surestimés d'au plus `errors`, rang Pareto estimé sur les compteurs)"""
+        counts = self.counts.sort_values(ascending=False, kind='stable')
+        top = counts.iloc[:k]
+        # Tant que le résumé n'a rien évincé, les totaux sont exacts
+        n_entities = len(counts) if self.floor == 0 else None
+        rank = _cutoff_rank(counts.to_numpy(), share * self.total / counts.sum()) if counts.sum() else 0
+        errors = None if self.floor == 0 else self.errors[top.index].to_numpy()
+        return TopK(top.index.to_numpy(), top.to_numpy(), self.total, n_entities, rank, share, errors)
+
+
+def heavy_hitters(chunks, key, weight, capacity=DEFAULT_CAPACITY, k=DEFAULT_K, share=PARETO_SHARE):
+    """Top-k approché d'un flux de blocs de transactions (ex. `export.iter_frames`), en mémoire bornée"""
+    summary = SpaceSaving(capacity)
+    for chunk in chunks:
+        summary.update(chunk[key].to_numpy(), chunk[weight].to_numpy())
+    return summary.top(k, share)
+
+
+def top_k_view(view, key, weight='Sales_Amount', k=DEFAULT_K, share=PARETO_SHARE, exact_max_rows=EXACT_MAX_ROWS):
+    """Top-k d'une sélection de transactions (FilteredView) : exact, ou approché par blocs si elle est trop grande"""
+    if len(view) <= exact_max_rows:
+        return top_k(view[key], view[weight], k, share)
+    return heavy_hitters(iter_frames(view, [key, weight]), key, weight, k=k, share=share)
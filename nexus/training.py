@@ -0,0 +1,284 @@
+"""
+Comparaison des modèles de ventes par validation croisée temporelle.
+
+Reprend la section « Entraînement des modèles » du notebook, avec une évaluation plus robuste
+et plus rapide :
+- validation à origine glissante (fenêtre d'entraînement croissante, test sur la période suivante)
+  au lieu d'un unique découpage 80/20 ;
+- features de chaque pli calculées une seule fois (FeaturePipeline ajusté sur le train du pli),
+  mises en cache sur disque et relues en mémoire mappée par tous les modèles ;
+- couples (modèle, pli) évalués en parallèle dans un pool de processus ;
+- arrêt précoce pour les modèles de boosting, dont HistGradientBoosting.
+
+Le meilleur modèle (R² moyen) est réentraîné sur toutes les ventes et écrit dans
+`output/models/` avec son pipeline de features et `model_comparison.json`.
+
+    python -m nexus.training --folds 4 --workers 4
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from nexus.cleaning import row_hashes
+from nexus.features import FeaturePipeline
+from nexus.model_cache import fingerprint
+from nexus.profiling import PeakMemory
+from nexus.registry import MODELS_DIR
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+RANDOM_SEED = 42
+FOLD_CACHE_DIR = MODELS_DIR / 'cv_cache'
+METRICS_FILE = 'model_comparison.json'
+DEFAULT_MODEL = 'best_model_gradientboosting'
+# Part la plus récente du train d'un pli réservée à l'arrêt précoce (XGBoost)
+EARLY_STOPPING_FRACTION = 0.1
+
+
+def make_model(name):
+    """Modèle candidat, avec les hyperparamètres du notebook (plus l'arrêt précoce du boosting)"""
+    if name == 'RandomForest':
+        return RandomForestRegressor(n_estimators=100, max_depth=15, min_samples_split=5, min_samples_leaf=2,
+                                     random_state=RANDOM_SEED, n_jobs=1)
+    if name == 'GradientBoosting':
+        return GradientBoostingRegressor(n_estimators=500, max_depth=5, learning_rate=0.1, random_state=RANDOM_SEED,
+                                         validation_fraction=EARLY_STOPPING_FRACTION, n_iter_no_change=10)
+    if name == 'HistGradientBoosting':
+        return HistGradientBoostingRegressor(max_iter=500, max_depth=5, learning_rate=0.1, random_state=RANDOM_SEED,
+                                             early_stopping=True, validation_fraction=EARLY_STOPPING_FRACTION,
+                                             n_iter_no_change=10)
+    if name == 'XGBoost':
+        return xgb.XGBRegressor(n_estimators=500, max_depth=5, learning_rate=0.1, random_state=RANDOM_SEED,
+                                n_jobs=1, early_stopping_rounds=10)
+    if name == 'Ridge':
+        return Ridge(alpha=1.0)
+    raise ValueError(f"Modèle inconnu : {name}")
+
+
+MODEL_NAMES = ['RandomForest', 'GradientBoosting', 'HistGradientBoosting'] + \
+    (['XGBoost'] if XGBOOST_AVAILABLE else []) + ['Ridge']
+
+
+def fit_model(name, X, y):
+    """Entraîne un candidat ; X et y sont triés par date (la fin du train sert à l'arrêt précoce de XGBoost)"""
+    model = make_model(name)
+    if name == 'XGBoost':
+        split = int(len(y) * (1 - EARLY_STOPPING_FRACTION))
+        model.fit(X[:split], y[:split], eval_set=[(X[split:], y[split:])], verbose=False)
+    else:
+        model.fit(X, y)
+    return model
+
+
+def iterations(model):
+    """Nombre d'itérations de boosting retenues (None pour les autres modèles)"""
+    for attr in ('n_estimators_', 'n_iter_'):
+        if getattr(model, attr, None) is not None:
+            return int(getattr(model, attr))
+    if getattr(model, 'best_iteration', None) is not None:
+        return int(model.best_iteration) + 1
+    return None
+
+
+def rolling_origin_folds(dates, n_folds=4, min_train=0.6):
+    """
+    Plis à origine glissante : (masque train, masque test) ; le train couvre toutes les ventes
+    jusqu'à l'origine, le test la période suivante. Les origines sont des quantiles des dates,
+    de `min_train` à 1 ; le dernier pli teste la fin de l'historique.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    cutoffs = dates.quantile(np.linspace(min_train, 1, n_folds + 1)).to_numpy()
+    folds = []
+    for start, stop in zip(cutoffs[:-1], cutoffs[1:]):
+        train = (dates <= start).to_numpy()
+        test = ((dates > start) & (dates <= stop)).to_numpy()
+        if train.any() and test.any():
+            folds.append((train, test))
+    return folds
+
+
+def build_fold_cache(df, n_folds=4, min_train=0.6, cache_dir=FOLD_CACHE_DIR, target='Sales_Amount'):
+    """
+    Calcule (ou retrouve) les features de chaque pli et retourne les chemins des fichiers.
+    La clé du cache dépend du contenu des ventes et du découpage : un même jeu de données n'est
+    transformé qu'une fois, quel que soit le nombre de modèles ou d'exécutions.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = fingerprint('cv_folds', int(row_hashes(df).sum(dtype=np.uint64)), len(df), n_folds, min_train, target)
+    paths = sorted(cache_dir.glob(f"{key}-*.joblib"))
+    if paths:
+        return paths
+
+    # Tri par date : la fin de chaque train est la période la plus récente
+    df = df.sort_values('Sale_Date', kind='stable', ignore_index=True)
+    paths = []
+    for i, (train, test) in enumerate(rolling_origin_folds(df['Sale_Date'], n_folds, min_train)):
+        pipeline = FeaturePipeline.fit(df[train])
+        fold = {
+            'X_train': pipeline.transform(df[train]).to_numpy(dtype=np.float64),
+            'y_train': df.loc[train, target].to_numpy(dtype=np.float64),
+            'X_test': pipeline.transform(df[test]).to_numpy(dtype=np.float64),
+            'y_test': df.loc[test, target].to_numpy(dtype=np.float64),
+            'test_start': str(df.loc[test, 'Sale_Date'].min().date()),
+            'test_end': str(df.loc[test, 'Sale_Date'].max().date()),
+        }
+        path = cache_dir / f"{key}-{i}.joblib"
+        tmp_path = path.with_suffix('.tmp')
+        joblib.dump(fold, tmp_path)
+        tmp_path.replace(path)
+        paths.append(path)
+    return paths
+
+
+def evaluate(name, fold_path):
+    """Entraîne et évalue un modèle sur un pli (exécuté dans un processus du pool)"""
+    fold = joblib.load(fold_path, mmap_mode='r')
+    with PeakMemory() as memory:
+        start_time = time.perf_counter()
+        model = fit_model(name, fold['X_train'], fold['y_train'])
+        fit_seconds = time.perf_counter() - start_time
+        y_pred = model.predict(fold['X_test'])
+    y_test = fold['y_test']
+    return {
+        'model': name,
+        'fold': Path(fold_path).stem.rsplit('-', 1)[1],
+        'test_start': fold['test_start'],
+        'test_end': fold['test_end'],
+        'r2': float(r2_score(y_test, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+        'iterations': iterations(model),
+        'fit_seconds': fit_seconds,
+        'wall_seconds': time.perf_counter() - start_time,
+        'peak_memory_mb': memory.peak_mb,
+    }
+
+
+def summarize(fold_results):
+    """Tableau de comparaison : une ligne par modèle, trié par R² moyen décroissant"""
+    folds = pd.DataFrame(fold_results)
+    table = folds.groupby('model').agg(
+        cv_r2=('r2', 'mean'), cv_r2_std=('r2', 'std'), cv_rmse=('rmse', 'mean'), cv_mae=('mae', 'mean'),
+        iterations=('iterations', 'median'), wall_seconds=('wall_seconds', 'sum'),
+        peak_memory_mb=('peak_memory_mb', 'max'), folds=('fold', 'count'),
+    )
+    return table.sort_values('cv_r2', ascending=False).reset_index()
+
+
+def compare_models(df, models=None, n_folds=4, min_train=0.6, workers=None, cache_dir=FOLD_CACHE_DIR, progress=None):
+    """
+    Évalue les modèles sur les plis à origine glissante -> (tableau de comparaison, résultats par pli).
+    `progress(terminés, total)` est appelé après chaque couple (modèle, pli).
+    """
+    models = models or MODEL_NAMES
+    fold_paths = build_fold_cache(df, n_folds, min_train, cache_dir)
+    tasks = [(name, path) for name in models for path in fold_paths]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    results = []
+    if workers == 1:
+        for name, path in tasks:
+            results.append(evaluate(name, path))
+            if progress is not None:
+                progress(len(results), len(tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(evaluate, *zip(*tasks)):
+                results.append(result)
+                if progress is not None:
+                    progress(len(results), len(tasks))
+    return summarize(results), results
+
+
+def save_winner(df, table, fold_results, models_dir=MODELS_DIR, n_folds=4, min_train=0.6):
+    """
+    Réentraîne le meilleur modèle sur toutes les ventes et écrit dans `models_dir` :
+    best_model_<nom>.joblib, feature_pipeline.joblib, scaler.joblib et model_comparison.json.
+    """
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    best = table.iloc[0]['model']
+
+    df = df.sort_values('Sale_Date', kind='stable', ignore_index=True)
+    pipeline = FeaturePipeline.fit(df)
+    start_time = time.perf_counter()
+    model = fit_model(best, pipeline.transform(df).to_numpy(dtype=np.float64), df['Sales_Amount'].to_numpy(dtype=np.float64))
+    refit_seconds = time.perf_counter() - start_time
+
+    model_name = f"best_model_{best.lower()}"
+    joblib.dump(model, models_dir / f"{model_name}.joblib")
+    pipeline.save(models_dir / 'feature_pipeline.joblib')
+    joblib.dump(pipeline.scaler, models_dir / 'scaler.joblib')
+
+    report = {
+        'best_model': model_name,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'rows': len(df),
+        'validation': {'method': 'rolling_origin', 'folds': n_folds, 'min_train': min_train},
+        'refit_seconds': refit_seconds,
+        'models': json.loads(table.to_json(orient='records')),
+        'folds': fold_results,
+    }
+    with open(models_dir / METRICS_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+    return model_name
+
+
+def load_comparison(models_dir=MODELS_DIR):
+    """Rapport de la dernière comparaison (model_comparison.json) ou None"""
+    path = Path(models_dir) / METRICS_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def best_model_name(models_dir=MODELS_DIR):
+    """Nom (dans le registre) du modèle retenu par la dernière comparaison, sinon le modèle du notebook"""
+    report = load_comparison(models_dir)
+    if report and (Path(models_dir) / f"{report['best_model']}.joblib").exists():
+        return report['best_model']
+    return DEFAULT_MODEL
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare les modèles de ventes par validation croisée temporelle")
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES, choices=MODEL_NAMES)
+    parser.add_argument('--folds', type=int, default=4, help="nombre de plis à origine glissante")
+    parser.add_argument('--min-train', type=float, default=0.6, help="part des dates du premier train")
+    parser.add_argument('--workers', type=int, default=None, help="processus d'entraînement (défaut : nombre de cœurs)")
+    parser.add_argument('--output-dir', default=str(MODELS_DIR))
+    args = parser.parse_args(argv)
+
+    from nexus.store import load_sales
+
+    df = load_sales()
+    start_time = time.perf_counter()
+    table, fold_results = compare_models(
+        df, args.models, args.folds, args.min_train, args.workers,
+        progress=lambda done, total: print(f"\r{done}/{total} évaluations", end='', flush=True)
+    )
+    print()
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    model_name = save_winner(df, table, fold_results, args.output_dir, args.folds, args.min_train)
+    print(f"Meilleur modèle : {model_name} ({time.perf_counter() - start_time:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.cleaning import CLEANED_ENCODED_COLUMNS, CleaningState, clean_sales, row_hashes
+from nexus.features import encoder_categories
+from nexus.synthetic import generate_sales
+
+COMPARED = ['Product_ID', 'Sale_Date', 'Sales_Amount', 'Profit', 'Cum_Sales_By_Point'] + \
+    [f"{col}_encoded" for col in CLEANED_ENCODED_COLUMNS]
+
+
+def _raw_with_duplicates(seed=3):
+    """Ventes brutes dont certaines lignes reviennent plus loin, dans le même bloc ou un bloc suivant"""
+    raw = generate_sales(3_000, seed=seed)
+    for col in raw.select_dtypes('category').columns:
+        raw[col] = raw[col].astype(str)
+    repeated = raw.iloc[[5, 6, 7, 999, 1_000, 1_001, 2_500]]
+    rows = pd.concat([raw.iloc[:1_000], repeated.iloc[:2], raw.iloc[1_000:2_000], repeated, raw.iloc[2_000:]],
+                     ignore_index=True)
+    return rows
+
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+@pytest.mark.parametrize('chunk_rows', [250, 999, 1_000, 1_001, 10_000])
+def test_chunked_cleaning_matches_notebook(chunk_rows):
+    """Doublons d'un bloc à l'autre écartés et cumuls par point poursuivis : même résultat qu'en un seul lot"""
+    raw = _raw_with_duplicates()
+    categories = encoder_categories(raw, CLEANED_ENCODED_COLUMNS)
+    expected = clean_sales(raw, categories).reset_index(drop=True)
+
+    state = CleaningState(categories=categories)
+    result = pd.concat([state.apply(chunk) for chunk in _chunks(raw, chunk_rows)], ignore_index=True)
+    assert len(result) == len(expected) == 3_000
+    pd.testing.assert_frame_equal(result[COMPARED], expected[COMPARED], check_dtype=False)
+    assert state.rows == 3_000
+    np.testing.assert_array_equal(state.seen, np.sort(row_hashes(raw.drop_duplicates())))
+    # Au plus log2(n) suites d'empreintes, chacune plus du double de la suivante
+    sizes = [len(run) for run in state.runs]
+    assert all(larger > 2 * smaller for larger, smaller in zip(sizes, sizes[1:]))
+
+
+def test_resume_from_cleaned_history():
+    """Ingestion : un état reconstruit depuis le store poursuit les cumuls et reconnaît les ventes déjà stockées"""
+    raw = _raw_with_duplicates(seed=4)
+    categories = encoder_categories(raw, CLEANED_ENCODED_COLUMNS)
+    expected = clean_sales(raw, categories).reset_index(drop=True)
+    history = clean_sales(raw.iloc[:1_500], categories)
+
+    state = CleaningState.from_frame(history)
+    # Le nouveau lot recommence par des ventes déjà stockées
+    result = state.apply(raw.iloc[1_400:])
+    tail = expected.iloc[len(history):].reset_index(drop=True)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True)[COMPARED], tail[COMPARED], check_dtype=False)
+
+
+def test_state_saved_before_runs_still_loads():
+    """Un état enregistré avec une seule suite triée (`seen`) reste utilisable"""
+    raw = generate_sales(500, seed=5)
+    state = CleaningState(categories=encoder_categories(raw, CLEANED_ENCODED_COLUMNS))
+    state.apply(raw.iloc[:300])
+    legacy = CleaningState.__new__(CleaningState)
+    legacy.__dict__.update({key: value for key, value in state.__dict__.items() if key != 'runs'}, seen=state.seen)
+    restored = pickle.loads(pickle.dumps(legacy))
+    assert restored.is_new(row_hashes(raw.iloc[:300])).sum() == 0
+    assert len(restored.apply(raw)) == 200
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.downsample import density_grid, downsample, lttb_indices, minmax_indices
+
+
+def _reference_lttb(x, y, n_out):
+    """LTTB point par point, d'après la description de l'algorithme"""
+    n = len(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected, previous = [0], 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        areas = [abs((x[previous] - next_x) * (y[j] - y[previous]) - (x[previous] - x[j]) * (next_y - y[previous]))
+                 for j in range(start, stop)]
+        previous = start + int(np.argmax(areas))
+        selected.append(previous)
+    return np.array(selected + [n - 1])
+
+
+@pytest.mark.parametrize('n, n_out', [(50, 3), (1_000, 37), (5_000, 1_400), (1_401, 1_400)])
+def test_lttb_matches_reference(n, n_out):
+    rng = np.random.default_rng(n)
+    x, y = np.sort(rng.uniform(0, 100, n)), np.cumsum(rng.normal(size=n))
+    result = lttb_indices(x, y, n_out)
+    np.testing.assert_array_equal(result, _reference_lttb(x, y, n_out))
+    assert len(result) == n_out
+    assert result[0] == 0 and result[-1] == n - 1
+    assert (np.diff(result) > 0).all()
+
+
+def test_lttb_keeps_datetime_endpoints():
+    dates = pd.date_range('2023-01-01', periods=10_000, freq='min').to_numpy()
+    values = np.sin(np.arange(10_000) / 50)
+    result = lttb_indices(dates, values, 100)
+    assert result[0] == 0 and result[-1] == 9_999
+    assert len(lttb_indices(dates, values, 20_000)) == 10_000
+
+
+def test_minmax_keeps_extrema():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=10_003)
+    n_out = 200
+    result = minmax_indices(y, n_out)
+    assert y.argmax() in result and y.argmin() in result
+    starts = np.arange(n_out // 2) * len(y) // (n_out // 2)
+    for start, stop in zip(starts, np.append(starts[1:], len(y))):
+        kept = result[(result >= start) & (result < stop)]
+        assert y[kept].max() == y[start:stop].max()
+        assert y[kept].min() == y[start:stop].min()
+
+
+def test_downsample_frame():
+    frame = pd.DataFrame({'Sale_Date': pd.date_range('2023-01-01', periods=5_000, freq='h'),
+                          'Sales_Amount': np.arange(5_000.0)})
+    assert len(downsample(frame.head(100), 'Sale_Date', 'Sales_Amount', width_px=200)) == 100
+    reduced = downsample(frame.sample(frac=1, random_state=0), 'Sale_Date', 'Sales_Amount', width_px=200)
+    assert len(reduced) == 200
+    assert reduced['Sale_Date'].is_monotonic_increasing
+    assert reduced['Sales_Amount'].iloc[0] == 0 and reduced['Sales_Amount'].iloc[-1] == 4_999
+
+
+def test_density_grid_counts():
+    rng = np.random.default_rng(1)
+    x, y = rng.normal(size=20_000), rng.normal(size=20_000)
+    x[:10] = np.nan
+    _, _, counts = density_grid(x, y, bins=(30, 20))
+    assert counts.shape == (20, 30)
+    assert np.nansum(counts) == 19_990
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.elasticity import ELASTICITY_DIMENSIONS, ElasticityModel, waterfall
+
+
+def _sales(n=3_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Product_Category': rng.choice(['Clothing', 'Electronics', 'Food', 'Furniture'], n),
+        'Customer_Type': rng.choice(['New', 'Returning'], n),
+        'Unit_Price': rng.uniform(10, 500, n),
+        'Unit_Cost': rng.uniform(5, 300, n),
+        'Quantity_Sold': rng.integers(1, 50, n).astype(np.float64),
+        # Remises aux bornes (0, 1) et valeurs répétées : cas des recherches dichotomiques
+        'Discount': rng.choice([0.0, 0.05, 0.1, 0.15, 0.3, 1.0], n),
+    })
+
+
+def _brute_force(df, price, volume, cost, discount, elasticities):
+    """Reprojection ligne à ligne des formules du module"""
+    segment = pd.MultiIndex.from_frame(df[ELASTICITY_DIMENSIONS])
+    elasticity = pd.Series(elasticities).reindex(segment).to_numpy()
+    factor = np.maximum(1 + volume / 100 + price / 100 * elasticity, 0.0)
+    new_discount = np.clip(df['Discount'] + discount / 100, 0, 1)
+    revenue = df['Quantity_Sold'] * factor * df['Unit_Price'] * (1 + price / 100) * (1 - new_discount)
+    costs = df['Quantity_Sold'] * factor * df['Unit_Cost'] * (1 + cost / 100)
+    base_revenue = df['Quantity_Sold'] * df['Unit_Price'] * (1 - df['Discount'])
+    base_cost = df['Quantity_Sold'] * df['Unit_Cost']
+    frame = pd.DataFrame({'Revenue': revenue, 'Cost': costs, 'Base_Revenue': base_revenue, 'Base_Cost': base_cost})
+    return frame.groupby([df[dim] for dim in ELASTICITY_DIMENSIONS]).sum()
+
+
+@pytest.mark.parametrize('price, volume, cost, discount', [
+    (0, 0, 0, 0), (10, 0, 0, 0), (-25, 5, 0, 0), (0, 0, 0, 5), (0, 0, 0, -10),
+    (0, 0, 0, 80), (0, 0, 0, -100), (15, -10, 7, 12), (-90, 0, 0, 0),
+])
+def test_projection_matches_brute_force(price, volume, cost, discount):
+    df = _sales()
+    model = ElasticityModel.build(df)
+    elasticities = -np.linspace(0.5, 2.5, len(model.segments))
+    projection = model.project(price, volume, cost, discount, elasticities)
+    index = pd.MultiIndex.from_frame(model.segments)
+    expected = _brute_force(df, price, volume, cost, discount, pd.Series(elasticities, index=index)).reindex(index)
+    for column in ['Revenue', 'Cost', 'Base_Revenue', 'Base_Cost']:
+        np.testing.assert_allclose(projection[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9)
+
+    # Les effets du waterfall mènent exactement du profit de base au nouveau profit
+    steps = dict(waterfall(projection))
+    total = steps['Profit de base'] + sum(steps[step] for step in ['Effet prix', 'Effet volume', 'Effet remise', 'Effet coûts'])
+    assert total == pytest.approx(steps['Nouveau profit'], rel=1e-9)
+
+
+def test_empty_segments_are_dropped():
+    df = _sales()
+    df = df[~((df['Product_Category'] == 'Food') & (df['Customer_Type'] == 'New'))]
+    model = ElasticityModel.build(df)
+    assert len(model.segments) == 7
+    projection = model.project(discount_change=3)
+    np.testing.assert_allclose(projection['Revenue'].sum(), _brute_force(df, 0, 0, 0, 3, {
+        tuple(row): -1.5 for row in model.segments.itertuples(index=False)})['Revenue'].sum(), rtol=1e-9)
@@ -0,0 +1,107 @@
+import gzip
+import io
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.export import export_bytes, export_reader
+from nexus.frame import compact_frame
+from nexus.index import FilteredView
+from nexus.synthetic import iter_cleaned_sales
+
+CHUNK_ROWS = 700
+
+
+@pytest.fixture(scope='module')
+def sales():
+    """Ventes nettoyées triées par date, leur frame compact et une sélection de plusieurs blocs"""
+    df = pd.concat(list(iter_cleaned_sales(5_000, chunk_rows=2_000, seed=3)), ignore_index=True)
+    df = df.sort_values('Sale_Date', kind='stable', ignore_index=True)
+    rows = np.flatnonzero(df['Region'].astype(str).isin(['East', 'West']).to_numpy())
+    assert len(rows) > 3 * CHUNK_ROWS
+    return df, compact_frame(df), rows
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz'])
+def test_csv_round_trip(sales, fmt):
+    """Le CSV exporté par blocs depuis le frame compact est celui des ventes d'origine"""
+    df, compact, rows = sales
+    content = export_bytes(FilteredView(compact, rows), fmt, chunk_rows=CHUNK_ROWS)
+    if fmt == 'csv.gz':
+        content = gzip.decompress(content)
+    assert content.decode('utf-8') == df.take(rows).to_csv(index=False)
+
+
+def test_parquet_round_trip(sales):
+    pytest.importorskip('pyarrow')
+    df, compact, rows = sales
+    result = pd.read_parquet(io.BytesIO(export_bytes(FilteredView(compact, rows), 'parquet', chunk_rows=CHUNK_ROWS)))
+    expected = df.take(rows).reset_index(drop=True)
+    assert list(result.columns) == list(expected.columns)
+    for col in expected.columns:
+        if isinstance(expected[col].dtype, pd.CategoricalDtype):
+            assert result[col].astype(str).tolist() == expected[col].astype(str).tolist()
+        else:
+            np.testing.assert_array_equal(result[col].to_numpy(), expected[col].to_numpy())
+
+
+def _xlsx_rows(content):
+    """Cellules de la première feuille (texte en ligne, nombres), sans dépendre d'openpyxl"""
+    ns = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        sheet = ET.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        shared = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            strings = ET.fromstring(archive.read('xl/sharedStrings.xml'))
+            shared = [''.join(node.itertext()) for node in strings.findall('x:si', ns)]
+    rows = []
+    for row in sheet.iterfind('.//x:sheetData/x:row', ns):
+        values = []
+        for cell in row.findall('x:c', ns):
+            assert int(re.sub(r'\D', '', cell.get('r'))) == len(rows) + 1
+            kind = cell.get('t')
+            if kind == 'inlineStr':
+                values.append(''.join(cell.find('x:is', ns).itertext()))
+            elif kind == 's':
+                values.append(shared[int(cell.find('x:v', ns).text)])
+            else:
+                values.append(float(cell.find('x:v', ns).text))
+        rows.append(values)
+    return rows
+
+
+def test_xlsx_round_trip(sales):
+    pytest.importorskip('xlsxwriter')
+    df, compact, rows = sales
+    result = _xlsx_rows(export_bytes(FilteredView(compact, rows), 'xlsx', chunk_rows=CHUNK_ROWS))
+    expected = df.take(rows)
+    assert result[0] == list(expected.columns)
+    assert len(result) == len(expected) + 1
+    for i, col in enumerate(expected.columns):
+        values = [row[i] for row in result[1:]]
+        series = expected[col]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            # Dates Excel : jours depuis le 30/12/1899
+            days = (series - pd.Timestamp('1899-12-30')) / pd.Timedelta(days=1)
+            np.testing.assert_allclose(values, days.to_numpy(), rtol=0, atol=1e-9)
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            # xlsxwriter écrit les nombres sur 16 chiffres significatifs, comme Excel les conserve
+            assert values == [float(f"{value:.16g}") for value in series.astype(np.float64)]
+        else:
+            assert values == series.astype(str).tolist()
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_export_reader(sales, fmt, tmp_path, monkeypatch):
+    """Lecteur remis au bouton de téléchargement : même contenu, fichier temporaire déjà supprimé"""
+    df, compact, rows = sales
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    reader = export_reader(FilteredView(compact, rows), fmt, chunk_rows=CHUNK_ROWS)
+    assert isinstance(reader, io.BufferedReader)
+    assert list(tmp_path.iterdir()) == []
+    with reader:
+        assert reader.read() == export_bytes(FilteredView(compact, rows), fmt, chunk_rows=CHUNK_ROWS)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from nexus.features import MODEL_FEATURES, NUMERICAL_FEATURES, FeaturePipeline
+from nexus.synthetic import generate_sales, iter_cleaned_sales
+
+
+def test_pipeline_round_trip(tmp_path):
+    """fit -> save -> load : même matrice de features, colonnes dans l'ordre du modèle"""
+    sales = pd.concat(list(iter_cleaned_sales(5_000, chunk_rows=2_000, seed=1)), ignore_index=True)
+    train = sales['Sale_Date'] <= sales['Sale_Date'].quantile(0.8)
+    pipeline = FeaturePipeline.fit(sales, scale_rows=train)
+    loaded = FeaturePipeline.load(pipeline.save(tmp_path / 'feature_pipeline.joblib'))
+
+    expected = pipeline.transform(sales)
+    result = loaded.transform(sales)
+    assert list(result.columns) == MODEL_FEATURES
+    pd.testing.assert_frame_equal(result, expected)
+
+    # Transactions nouvelles (brutes, sans colonnes dérivées) : cumuls poursuivis depuis l'entraînement
+    new = generate_sales(200, seed=7).drop(columns=['Sales_Amount'])
+    pd.testing.assert_frame_equal(loaded.transform(new), pipeline.transform(new))
+    assert np.isfinite(loaded.transform(new).to_numpy()).all()
+
+
+def test_scaler_fitted_on_training_rows():
+    """Le scaler est ajusté sur les seules lignes d'entraînement (comme dans le notebook)"""
+    sales = pd.concat(list(iter_cleaned_sales(3_000, seed=2)), ignore_index=True)
+    train = sales['Sale_Date'] <= sales['Sale_Date'].quantile(0.8)
+    X = FeaturePipeline.fit(sales, scale_rows=train).transform(sales[train])
+    np.testing.assert_allclose(X[NUMERICAL_FEATURES].mean(), 0.0, atol=1e-9)
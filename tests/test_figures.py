@@ -0,0 +1,41 @@
+import base64
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import plotly.tools
+import pytest
+
+from nexus.figures import cached_form, compact_figure
+
+
+def _scatter(n=10_000):
+    rng = np.random.default_rng(0)
+    return go.Figure(go.Scattergl(x=rng.random(n), y=rng.random(n), mode='markers'), layout={'title': {'text': 'Nuage'}})
+
+
+def test_cached_form_is_not_revalidated(monkeypatch):
+    """st.plotly_chart reprend l'objet Figure en cache sans le reconstruire (ni le revalider)"""
+    fig = cached_form(_scatter())
+
+    def rebuilt(*args, **kwargs):
+        raise AssertionError("figure revalidée")
+    # Chemin suivi par st.plotly_chart : un dict y serait reconstruit en Figure pour validation
+    monkeypatch.setattr('plotly.graph_objs.Figure', rebuilt)
+    spec = plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True)
+    assert pio.to_json(spec, validate=False) == pio.to_json(fig, validate=False)
+    with pytest.raises(AssertionError, match="revalidée"):
+        plotly.tools.return_figure_from_figure_or_data(compact_figure(fig), validate_figure=True)
+
+
+def test_cached_form_sends_float32():
+    """Le JSON envoyé est celui du dict compact : grands tableaux en float32, valeurs conservées"""
+    fig = _scatter()
+    sent = json.loads(pio.to_json(cached_form(fig), validate=False))
+    assert sent == json.loads(pio.to_json(compact_figure(fig), validate=False))
+    trace = sent['data'][0]
+    assert trace['x']['dtype'] == 'f4'
+    np.testing.assert_allclose(
+        np.frombuffer(base64.b64decode(trace['x']['bdata']), dtype=np.float32), fig.data[0].x, rtol=1e-7)
+    assert sent['layout']['title']['text'] == 'Nuage'
@@ -0,0 +1,114 @@
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.forecast import ArimaForecaster, DailyForecaster, load_arima
+from nexus.model_cache import ModelCache
+
+
+def _daily(days=120, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=days, freq='D')
+    sales = 1_000 + 200 * np.sin(np.arange(days) / 7) + rng.normal(0, 50, days)
+    return pd.DataFrame({'Sale_Date': dates, 'Sales_Amount': sales})
+
+
+def test_persisted_forecaster_keeps_interval(tmp_path):
+    """Le prévisionniste relu depuis le cache disque garde la dispersion de ses résidus"""
+    forecaster = DailyForecaster.fit(_daily(), n_estimators=20)
+    ModelCache(persist_dir=tmp_path).put('key', forecaster)
+    loaded = ModelCache(persist_dir=tmp_path).get('key')
+    assert loaded.residual_std == forecaster.residual_std > 0
+    result = loaded.forecast(10)
+    assert (result['Upper'] > result['Lower']).all()
+    pd.testing.assert_frame_equal(result, forecaster.forecast(10))
+
+
+def test_outdated_pickle_is_rebuilt(tmp_path, monkeypatch):
+    """Un fichier d'un format antérieur (sans version ni résidus) est écarté, pas servi sans intervalle"""
+    forecaster = DailyForecaster.fit(_daily(), n_estimators=20)
+    legacy = {'model': forecaster.model, 'last_date': forecaster.last_date, 'predictions': pd.Series(dtype='float64')}
+    monkeypatch.setattr(DailyForecaster, '__getstate__', lambda self: legacy)
+    ModelCache(persist_dir=tmp_path).put('key', forecaster)
+    monkeypatch.undo()
+
+    cache = ModelCache(persist_dir=tmp_path)
+    assert cache.get('key') is None
+    assert 'key' not in cache
+    rebuilt = cache.get_or_create('key', lambda: DailyForecaster.fit(_daily(), n_estimators=20))
+    assert rebuilt.residual_std > 0
+
+
+def test_concurrent_horizons():
+    """Des sessions qui étendent les prévisions en même temps obtiennent la même série"""
+    forecaster = DailyForecaster.fit(_daily(), n_estimators=20)
+    expected = DailyForecaster.fit(_daily(), n_estimators=20).forecast(60)
+    results = {}
+
+    def run(horizon):
+        results[horizon] = forecaster.forecast(horizon)
+
+    threads = [threading.Thread(target=run, args=(horizon,)) for horizon in (7, 30, 14, 60, 45)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for horizon, result in results.items():
+        pd.testing.assert_frame_equal(result, expected.iloc[:horizon])
+    assert len(forecaster.predictions) == 60
+    assert forecaster.predictions.index.is_monotonic_increasing
+
+
+@pytest.mark.parametrize('level', [0.8, 0.95])
+def test_interval_level(level):
+    forecaster = DailyForecaster.fit(_daily(), n_estimators=20)
+    narrow, wide = forecaster.forecast(5, level=level), forecaster.forecast(5, level=0.99)
+    assert ((wide['Upper'] - wide['Lower']) > (narrow['Upper'] - narrow['Lower'])).all()
+
+
+def test_arima_last_date_and_extension(tmp_path):
+    """ARIMA : dernière date mémorisée à l'entraînement, ventes postérieures intégrées par filtrage"""
+    pytest.importorskip('statsmodels')
+    series = _daily().set_index('Sale_Date')['Sales_Amount']
+    train, recent = series.iloc[:100], series.iloc[100:]
+    forecaster = ArimaForecaster.fit(train)
+    assert forecaster.last_date == train.index[-1]
+
+    result = forecaster.forecast(series, 7)
+    assert result['Sale_Date'].iloc[0] == series.index[-1] + pd.Timedelta(days=1)
+    expected = forecaster.results.extend(recent).get_forecast(7).predicted_mean
+    np.testing.assert_allclose(result['Predicted_Sales'], expected.to_numpy())
+
+    # Format du notebook : résultats statsmodels bruts
+    joblib.dump(forecaster.results, tmp_path / 'arima_model.joblib')
+    loaded = load_arima(tmp_path / 'arima_model.joblib')
+    assert loaded.last_date == forecaster.last_date
+    pd.testing.assert_frame_equal(loaded.forecast(series, 7), result)
+
+
+def test_arima_concurrent_histories(tmp_path):
+    """ARIMA partagé : des sessions aux historiques différents obtiennent chacune leur prévision"""
+    pytest.importorskip('statsmodels')
+    series = _daily().set_index('Sale_Date')['Sales_Amount']
+    forecaster = ArimaForecaster.fit(series.iloc[:100])
+    histories = [series.iloc[:end] for end in (110, 130, 150, 120, 140)] * 2
+    expected = [ArimaForecaster.fit(series.iloc[:100]).forecast(history, 7) for history in histories]
+    results = {}
+
+    def run(i):
+        results[i] = forecaster.forecast(histories[i], 7)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(histories))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i, result in results.items():
+        pd.testing.assert_frame_equal(result, expected[i])
+
+    # Sans verrou dans l'état picklé : mesurable par le cache de modèles, persistable
+    joblib.dump(forecaster, tmp_path / 'arima.joblib')
+    pd.testing.assert_frame_equal(joblib.load(tmp_path / 'arima.joblib').forecast(histories[0], 7), expected[0])
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.frame import compact_frame, decimal_values, fits_float32
+from nexus.synthetic import iter_cleaned_sales
+
+
+@pytest.fixture(scope='module')
+def sales():
+    """Ventes nettoyées triées par date (ordre du frame compact) et leur frame compact"""
+    df = pd.concat(list(iter_cleaned_sales(5_000, chunk_rows=2_000, seed=3)), ignore_index=True)
+    df = df.sort_values('Sale_Date', kind='stable', ignore_index=True)
+    return df, compact_frame(df)
+
+
+def test_compaction_keeps_precise_columns(sales):
+    """Seules les colonnes restituées exactement passent en float32"""
+    df, compact = sales
+    assert compact['Unit_Price'].dtype == np.float32
+    assert compact['Cum_Sales_By_Point'].dtype == np.float64
+    for col in df.select_dtypes('float').columns:
+        values = compact[col].to_numpy()
+        if fits_float32(df[col]):
+            assert values.dtype == np.float32
+            values = decimal_values(values)
+        np.testing.assert_array_equal(values, df[col].to_numpy())
+
+
+def test_decimal_values():
+    """Décimal le plus court redonnant chaque float32 ; NaN et infinis conservés"""
+    values = np.array([12.34, 0.1, -1095.45, 7.0, np.nan, np.inf, 1.234567])
+    np.testing.assert_array_equal(decimal_values(values.astype(np.float32)), values)
+    assert fits_float32(pd.Series([1.5, 2.25, np.nan]))
+    assert not fits_float32(pd.Series([250_000_000.01]))
+    assert not fits_float32(pd.Series([1095.4499999999998]))
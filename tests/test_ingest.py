@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.cleaning import RAW_COLUMNS
+from nexus.cube import CUBE_COLUMNS, SalesCube
+from nexus.ingest import Ingestor, LiveCube, file_digest
+from nexus.store import read_store, store_files, write_store_chunks
+from nexus.synthetic import generate_sales, iter_cleaned_sales
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Store de ventes nettoyées et dossier de dépôt dans un répertoire temporaire"""
+    monkeypatch.chdir(tmp_path)
+    store = write_store_chunks(iter_cleaned_sales(3_000, chunk_rows=1_000, seed=1), tmp_path / 'store.parquet')
+    ingestor = Ingestor(tmp_path / 'incoming', store, tmp_path / 'ingest_state.joblib')
+    ingestor.drop_dir.mkdir()
+    return ingestor
+
+
+def _drop(ingestor, name='lot.csv', n=800, seed=2):
+    """Dépose un fichier de ventes brutes (dont une partie déjà présente dans le store)"""
+    raw = generate_sales(n, seed=seed)
+    known = read_store(RAW_COLUMNS, ingestor.store_path).iloc[:50]
+    raw = pd.concat([raw, known], ignore_index=True)
+    path = ingestor.drop_dir / name
+    raw.to_csv(path, index=False)
+    return path
+
+
+def _assert_same_cube(cube, expected):
+    cells, reference = (c.cells.sort_values(c.dimensions, ignore_index=True) for c in (cube, expected))
+    assert len(cells) == len(reference)
+    for col in reference.columns:
+        if col in cube.dimensions:
+            assert cells[col].astype(str).tolist() == reference[col].astype(str).tolist()
+        else:
+            np.testing.assert_allclose(cells[col].to_numpy(dtype=np.float64), reference[col].to_numpy(dtype=np.float64), rtol=1e-9)
+
+
+def test_refreshed_cube_matches_rebuild(workspace):
+    """Après ingestion d'un fichier déposé, le cube mis à jour par delta est celui d'une reconstruction"""
+    live = LiveCube(SalesCube.build(read_store(CUBE_COLUMNS, workspace.store_path)), store_files(workspace.store_path),
+                    store_path=workspace.store_path)
+    before = len(read_store(['Sale_Date'], workspace.store_path))
+    added = workspace.ingest_file(_drop(workspace))
+    # Les 50 ventes déjà présentes dans le store sont écartées
+    assert 0 < added <= 800
+    assert len(read_store(['Sale_Date'], workspace.store_path)) == before + added
+    assert (workspace.drop_dir / 'processed' / 'lot.csv').exists()
+    _assert_same_cube(live.refresh(), SalesCube.build(read_store(CUBE_COLUMNS, workspace.store_path)))
+
+
+def test_same_file_twice_is_noop(workspace):
+    """Réingérer le même fichier n'ajoute ni ventes ni fichiers au store"""
+    path = _drop(workspace)
+    content = path.read_bytes()
+    workspace.ingest_file(path)
+    files = store_files(workspace.store_path)
+    again = workspace.drop_dir / 'lot.csv'
+    again.write_bytes(content)
+    assert workspace.ingest_file(again) == 0
+    assert store_files(workspace.store_path) == files
+
+
+def test_resume_after_crash_does_not_duplicate(workspace, monkeypatch):
+    """Arrêt entre l'écriture des ventes et celle de l'état : la reprise remplace les fichiers écrits"""
+    path = _drop(workspace)
+    content, digest = path.read_bytes(), file_digest(path)
+    expected = len(read_store(['Sale_Date'], workspace.store_path))
+    workspace.state.save(workspace.state_path)
+
+    def crash(self, state_path):
+        raise RuntimeError("arrêt")
+    with monkeypatch.context() as patch:
+        patch.setattr(type(workspace.state), 'save', crash)
+        with pytest.raises(RuntimeError):
+            workspace.ingest_file(path)
+    assert any(p.name.startswith(f"ingest-{digest}-") for p in store_files(workspace.store_path))
+
+    # Le fichier rejeté est redéposé : l'état sur disque ne connaît pas encore ses ventes
+    retry = workspace.drop_dir / 'lot.csv'
+    retry.write_bytes(content)
+    added = workspace.ingest_file(retry)
+    assert added > 0
+    assert len(read_store(['Sale_Date'], workspace.store_path)) == expected + added
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.moments import MomentCube, correlation_columns
+from nexus.synthetic import iter_cleaned_sales
+
+
+@pytest.fixture(scope='module')
+def sales():
+    df = pd.concat(list(iter_cleaned_sales(6_000, chunk_rows=3_000, seed=5)), ignore_index=True)
+    # Mesure constante partout, et mesure constante sur une seule région
+    df['Fixed_Fee'] = 12.7
+    df['Regional_Fee'] = np.where(df['Region'] == 'East', 3.84, df['Unit_Cost'] / 7)
+    return df
+
+
+def _slice(df, regions, start, end):
+    mask = df['Region'].isin(regions) & df['Sale_Date'].between(pd.Timestamp(start), pd.Timestamp(end))
+    return df[mask]
+
+
+@pytest.mark.parametrize('regions', [['East'], ['North', 'West']])
+def test_append_then_select_matches_pandas(sales, regions):
+    """Cube construit sur un premier lot, complété par `append`, filtré : mêmes statistiques que pandas"""
+    first, added = sales.iloc[:4_000], sales.iloc[4_000:]
+    cube = MomentCube.build(first).append(added)
+    columns = correlation_columns(sales)
+    assert cube.columns == columns
+
+    moments = cube.select({'Region': regions}, {'Sale_Date': (pd.Timestamp('2023-03-01'), pd.Timestamp('2023-10-31'))})
+    expected = _slice(sales, regions, '2023-03-01', '2023-10-31 23:59:59')[columns]
+    assert moments.count == len(expected)
+    pd.testing.assert_series_equal(moments.mean(), expected.mean(), rtol=1e-9)
+    pd.testing.assert_frame_equal(moments.covariance(), expected.cov(), rtol=1e-8, atol=1e-8)
+    pd.testing.assert_frame_equal(moments.correlation(), expected.corr(), rtol=1e-8, atol=1e-10)
+
+
+def test_zero_variance_column(sales):
+    """Une mesure constante sur la sélection a une corrélation NaN, comme avec pandas"""
+    cube = MomentCube.build(sales.iloc[:3_000]).append(sales.iloc[3_000:])
+    corr = cube.select({'Region': ['East']}).correlation()
+    expected = sales[sales['Region'] == 'East'][correlation_columns(sales)].corr()
+    for col in ('Fixed_Fee', 'Regional_Fee'):
+        assert corr[col].isna().all() and corr.loc[col].isna().all()
+    pd.testing.assert_frame_equal(corr, expected, rtol=1e-8, atol=1e-10)
+    # Sur l'ensemble des régions, seule la mesure constante partout reste sans corrélation
+    corr = cube.select().correlation()
+    assert corr['Fixed_Fee'].isna().all()
+    assert corr.loc['Regional_Fee', 'Regional_Fee'] == pytest.approx(1.0)
+
+
+def test_append_keeps_cells_unique(sales):
+    """Les cellules communes aux deux lots sont fusionnées, pas dupliquées"""
+    full = MomentCube.build(sales)
+    appended = MomentCube.build(sales.iloc[:3_000]).append(sales.iloc[3_000:])
+    assert len(appended) == len(full)
+    assert appended.select().count == len(sales)
+    assert appended.append(sales.iloc[:0]) is appended
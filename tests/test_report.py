@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from nexus.cube import SalesCube
+from nexus.model_cache import ModelCache
+from nexus.report import build_report
+from nexus.synthetic import iter_cleaned_sales
+
+pytest.importorskip('matplotlib')
+
+
+def test_default_key_follows_data_version(monkeypatch):
+    """Sans empreinte fournie, une nouvelle version des données redessine les graphiques"""
+    cube = SalesCube.build(pd.concat(list(iter_cleaned_sales(2_000, seed=4)), ignore_index=True))
+    cache = ModelCache()
+    monkeypatch.setattr('nexus.report.data_version', lambda: 'v1')
+    assert build_report(cube, chart_cache=cache).startswith(b'%PDF')
+    assert len(cache) == 3
+    build_report(cube, chart_cache=cache)
+    assert len(cache) == 3
+
+    # Ingestion : le store change de version, les graphiques en cache ne sont plus servis
+    monkeypatch.setattr('nexus.report.data_version', lambda: 'v2')
+    build_report(cube, chart_cache=cache)
+    assert len(cache) == 6
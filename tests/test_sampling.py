@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.sampling import StratifiedSample, stratum_keys
+from nexus.synthetic import iter_cleaned_sales
+
+
+@pytest.fixture(scope='module')
+def sales():
+    df = pd.concat(list(iter_cleaned_sales(20_000, chunk_rows=5_000, seed=11, skew=1.0)), ignore_index=True)
+    df['Sale_ID'] = np.arange(len(df))
+    return df
+
+
+def _population(df):
+    return pd.Series(stratum_keys(df)).value_counts()
+
+
+def test_interval_covers_exact_mean(sales):
+    """Sur un tirage fixé, l'IC 95 % de la moyenne stratifiée contient la moyenne exacte de la sélection"""
+    sample = StratifiedSample.build(sales, per_stratum=300, seed=7)
+    selected = sales[sales['Sales_Channel'] == 'Online']
+    estimate = sample.select({'Sales_Channel': ['Online']}, population=_population(selected))
+    assert not estimate.complete
+    assert estimate.size == len(selected)
+    mean, half_width = estimate.mean('Sales_Amount')
+    assert 0 < half_width < 0.05 * mean
+    assert abs(mean - selected['Sales_Amount'].mean()) <= half_width
+    total, total_half_width = estimate.total('Sales_Amount')
+    assert abs(total - selected['Sales_Amount'].sum()) <= total_half_width
+
+
+def test_interval_coverage(sales):
+    """Sur de nombreux tirages, l'IC 95 % contient la moyenne exacte dans environ 95 % des cas"""
+    selected = sales[sales['Region'].isin(['East', 'North'])]
+    exact, population = selected['Profit'].mean(), _population(selected)
+    covered = []
+    for seed in range(100):
+        sample = StratifiedSample.build(sales, per_stratum=150, seed=seed)
+        mean, half_width = sample.select({'Region': ['East', 'North']}, population=population).mean('Profit')
+        covered.append(abs(mean - exact) <= half_width)
+    assert np.mean(covered) >= 0.88
+
+
+def test_complete_sample_is_exact(sales):
+    """Strates entièrement échantillonnées : estimation exacte, intervalle nul"""
+    sample = StratifiedSample.build(sales, per_stratum=len(sales), seed=0)
+    estimate = sample.select({'Region': ['West']})
+    assert estimate.complete
+    mean, half_width = estimate.mean('Unit_Price')
+    assert mean == pytest.approx(sales.loc[sales['Region'] == 'West', 'Unit_Price'].mean())
+    assert half_width == 0
+
+
+def test_append_keeps_reservoirs_bounded(sales):
+    """Après des ajouts, chaque strate garde min(per_stratum, vues) ventes distinctes ; les effectifs vus sont exacts"""
+    per_stratum = 400
+    sample = StratifiedSample.build(sales.iloc[:5_000], per_stratum=per_stratum, seed=3)
+    for start in range(5_000, len(sales), 3_000):
+        sample = sample.append(sales.iloc[start:start + 3_000])
+        seen = sales.iloc[:start + 3_000]
+        expected_seen = _population(seen)
+        pd.testing.assert_series_equal(sample.seen.sort_index(), expected_seen.sort_index(), check_names=False)
+        sizes = pd.Series(sample.keys).value_counts()
+        assert (sizes == np.minimum(per_stratum, expected_seen.reindex(sizes.index))).all()
+        assert sample.rows['Sale_ID'].is_unique
+        assert sample.rows['Sale_ID'].isin(seen['Sale_ID']).all()
+    assert isinstance(sample.rows['Region'].dtype, pd.CategoricalDtype)
+    assert sample.append(sales.iloc[:0]) is sample
+
+
+def test_append_keeps_sample_uniform(sales):
+    """Réservoir : les ventes ajoutées ont la même probabilité d'être retenues que les premières"""
+    first, added = sales.iloc[:10_000], sales.iloc[10_000:]
+    share = []
+    for seed in range(20):
+        sample = StratifiedSample.build(first, per_stratum=200, seed=seed).append(added)
+        share.append(sample.rows['Sale_ID'].ge(10_000).mean())
+    assert np.mean(share) == pytest.approx(len(added) / len(sales), abs=0.03)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from nexus.simulation import simulate, summarize
+
+
+def test_deterministic_without_spread():
+    """Écarts-types nuls : chaque scénario vaut la projection déterministe"""
+    sales, costs = np.array([1_000.0, 250.0]), np.array([600.0, 100.0])
+    projected_sales, projected_costs = simulate(sales, costs, price=(10, 0), volume=(5, 0), cost=(-2, 0),
+                                                elasticity=(-1.5, 0), n_scenarios=20)
+    volume_factor = 1 + (5 + 10 * -1.5) / 100
+    np.testing.assert_allclose(projected_sales, np.broadcast_to(sales * volume_factor * 1.1, (20, 2)), rtol=1e-6)
+    np.testing.assert_allclose(projected_costs, np.broadcast_to(costs * volume_factor * 0.98, (20, 2)), rtol=1e-6)
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'uniform', 'triangular'])
+def test_extreme_price_shock_keeps_volumes_positive(distribution):
+    """Hausse de prix extrême : le volume s'annule au lieu de devenir négatif"""
+    sales, costs = np.array([1_000.0, 250.0, 40.0]), np.array([600.0, 100.0, 30.0])
+    projected_sales, projected_costs = simulate(sales, costs, price=(150, 40), elasticity=(-2, 0.5),
+                                                n_scenarios=5_000, distribution=distribution)
+    assert (projected_sales >= 0).all() and (projected_costs >= 0).all()
+    # Une partie des segments perd tout son volume : ventes et coûts nuls
+    assert (projected_sales == 0).any() and (projected_costs == 0).any()
+    summary = summarize(projected_sales, projected_costs)
+    assert (summary['sales'] >= 0).all()
+    assert summary['profit'].min() >= -(projected_costs.sum(axis=1).max())
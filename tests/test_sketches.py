@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.sketches import MIN_VALUE, RELATIVE_ACCURACY, Sketch, SketchCube, bucket_codes, bucket_values
+from nexus.synthetic import iter_cleaned_sales
+
+QUANTILES = np.array([0.0, 0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999, 1.0])
+
+
+def _assert_accuracy(sketch, values, qs=QUANTILES):
+    """
+    Erreur de chaque quantile au plus α × max(|x_a|, |x_b|) (+ MIN_VALUE), x_a et x_b étant les
+    deux valeurs de rangs voisins interpolées par `np.quantile`
+    """
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    ranks = qs * (len(values) - 1)
+    scale = np.maximum(np.abs(values[np.floor(ranks).astype(int)]), np.abs(values[np.ceil(ranks).astype(int)]))
+    error = np.abs(sketch.quantiles(qs) - np.quantile(values, qs))
+    assert (error <= RELATIVE_ACCURACY * scale * (1 + 1e-9) + MIN_VALUE).all(), np.c_[qs, error / scale]
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return pd.concat(list(iter_cleaned_sales(8_000, chunk_rows=4_000, seed=9)), ignore_index=True)
+
+
+def test_bucket_representative_accuracy():
+    """Le représentant d'un compartiment est à α près de toute valeur, positive ou négative"""
+    rng = np.random.default_rng(0)
+    values = np.r_[rng.lognormal(0, 6, 50_000), -rng.lognormal(0, 6, 50_000)]
+    values = values[np.abs(values) >= MIN_VALUE]
+    estimates = bucket_values(bucket_codes(values))
+    assert (np.sign(estimates) == np.sign(values)).all()
+    assert (np.abs(estimates - values) <= RELATIVE_ACCURACY * np.abs(values) * (1 + 1e-9)).all()
+    assert (bucket_codes([0.0, MIN_VALUE / 2, -MIN_VALUE / 2]) == 0).all()
+
+
+@pytest.mark.parametrize('kind', ['positive', 'negative', 'mixed', 'sparse'])
+def test_quantiles_within_relative_accuracy(kind):
+    rng = np.random.default_rng(1)
+    values = {
+        'positive': rng.lognormal(5, 2, 20_000),
+        'negative': -rng.lognormal(5, 2, 20_000),
+        'mixed': rng.normal(-500, 2_000, 20_000),
+        # Peu de valeurs : des compartiments vides séparent les rangs voisins de la queue
+        'sparse': rng.normal(-40_000, 60_000, 1_000),
+    }[kind]
+    _assert_accuracy(Sketch.from_values(values), values)
+
+
+def test_profit_p99():
+    """p99 du profit des ventes nettoyées du projet : quantile exact de pandas à α près"""
+    path = Path(__file__).resolve().parent.parent / 'output' / 'data' / 'cleaned_sales_data.csv'
+    if not path.exists():
+        pytest.skip(f"{path} absent")
+    df = pd.read_csv(path, parse_dates=['Sale_Date'])
+    sketch = SketchCube.build(df).select('Profit')
+    assert sketch.quantiles([0.99])[0] == pytest.approx(df['Profit'].quantile(0.99), rel=RELATIVE_ACCURACY)
+    _assert_accuracy(sketch, df['Profit'])
+
+
+def test_merge_and_append_keep_accuracy(sales):
+    """Sketches fusionnés, cube complété par `append` puis filtré : même garantie qu'un sketch direct"""
+    first, added = sales.iloc[:5_000], sales.iloc[5_000:]
+    merged = Sketch.from_values(first['Profit']).merge(Sketch.from_values(added['Profit']))
+    _assert_accuracy(merged, sales['Profit'])
+    assert merged.low == sales['Profit'].min() and merged.high == sales['Profit'].max()
+
+    cube = SketchCube.build(first).append(added)
+    for measure in ('Profit', 'Unit_Price'):
+        _assert_accuracy(cube.select(measure), sales[measure])
+    selected = sales[sales['Region'].isin(['East', 'South'])]
+    sketch = cube.select('Profit', {'Region': ['East', 'South']})
+    assert sketch.count == len(selected)
+    _assert_accuracy(sketch, selected['Profit'])
+    edges, counts = sketch.histogram()
+    assert counts.sum() == pytest.approx(len(selected))
+    assert edges[0] == selected['Profit'].min() and edges[-1] == selected['Profit'].max()
+
+
+def test_unknown_measure(sales):
+    cube = SketchCube.build(sales.iloc[:500])
+    with pytest.raises(ValueError, match="Sales_Amount.*Unit_Price, Profit"):
+        cube.select('Sales_Amount')
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from nexus.frame import compact_frame, open_frame, write_frame
+from nexus.store import append_store, read_store, read_store_files, write_store_chunks
+
+
+def _chunk(n, n_regions, start, quantity_dtype=np.int64, step=1):
+    return pd.DataFrame({
+        'Sale_Date': pd.date_range(start, periods=n, freq='h'),
+        'Region': [f"R{i % n_regions:03d}" for i in range(n)],
+        'Quantity_Sold': (np.arange(n) * step).astype(quantity_dtype),
+        'Unit_Price': np.linspace(1.0, 2.0, n),
+    })
+
+
+def test_chunks_wider_than_first(tmp_path):
+    """Un bloc suivant peut avoir plus de modalités ou des entiers plus grands que le premier"""
+    chunks = [_chunk(10, 3, '2024-01-01', np.int8), _chunk(500, 300, '2024-02-01', step=1_000)]
+    store = write_store_chunks(chunks, tmp_path / 'store.parquet')
+    result = read_store(store_path=store).sort_values('Sale_Date', ignore_index=True)
+    expected = pd.concat(chunks, ignore_index=True)
+    assert len(result) == len(expected)
+    assert result['Region'].astype(str).tolist() == expected['Region'].tolist()
+    assert result['Quantity_Sold'].tolist() == expected['Quantity_Sold'].astype(np.int64).tolist()
+
+
+def test_append_new_categories(tmp_path):
+    """Les ventes ajoutées peuvent dépasser le nombre de modalités des fichiers existants"""
+    store = write_store_chunks([_chunk(10, 3, '2024-01-01')], tmp_path / 'store.parquet')
+    added = append_store(_chunk(400, 400, '2024-01-05'), 'batch', store)
+    assert read_store_files(added)['Region'].nunique() == 400
+    result = read_store(store_path=store)
+    assert len(result) == 410
+    assert result['Region'].nunique() == 400
+
+
+def test_compact_frame_round_trip(tmp_path):
+    """Le frame compact mappé restitue les valeurs du store (catégorielles, float32)"""
+    store = write_store_chunks([_chunk(10, 3, '2024-01-01'), _chunk(500, 300, '2024-02-01')], tmp_path / 'store.parquet')
+    sales = read_store(store_path=store)
+    compact = compact_frame(sales)
+    frame = open_frame(frame_path=write_frame(compact, tmp_path / 'frame.arrow'))
+    expected = sales.sort_values('Sale_Date', kind='stable', ignore_index=True)
+    assert isinstance(frame['Region'].dtype, pd.CategoricalDtype)
+    assert frame['Region'].astype(str).tolist() == expected['Region'].astype(str).tolist()
+    assert (frame['Quantity_Sold'].to_numpy() == expected['Quantity_Sold'].to_numpy()).all()
+    np.testing.assert_allclose(frame['Unit_Price'], expected['Unit_Price'], rtol=1e-6)
@@ -0,0 +1,21 @@
+import pytest
+
+from nexus.cleaning import RAW_COLUMNS
+from nexus.synthetic import generate_sales, iter_cleaned_sales, iter_sales
+
+
+@pytest.mark.parametrize('n_rows', [1, 999, 5_000])
+def test_row_count_and_schema(n_rows):
+    """Exactement `n_rows` ventes, au schéma brut, quel que soit le découpage en blocs"""
+    df = generate_sales(n_rows, seed=1)
+    assert len(df) == n_rows
+    assert list(df.columns) == RAW_COLUMNS
+    assert sum(len(chunk) for chunk in iter_sales(n_rows, seed=1, chunk_rows=700)) == n_rows
+
+
+@pytest.mark.parametrize('n_rows', [0, -5])
+def test_rejects_non_positive_rows(n_rows):
+    with pytest.raises(ValueError, match="strictement positif"):
+        generate_sales(n_rows)
+    with pytest.raises(ValueError, match="strictement positif"):
+        next(iter_cleaned_sales(n_rows))
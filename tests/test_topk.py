@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nexus.index import FilteredView
+from nexus.topk import OTHERS_LABEL, SpaceSaving, _cutoff_rank, heavy_hitters, top_k, top_k_view
+
+
+def _stream(n=200_000, n_entities=20_000, skew=1.2, seed=0):
+    """Ventes d'un flux asymétrique : entités tirées selon une loi de Zipf, montants positifs"""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_entities + 1) ** skew
+    keys = rng.choice(n_entities, size=n, p=weights / weights.sum())
+    return pd.DataFrame({'Product_ID': rng.permutation(n_entities)[keys] + 1000, 'Sales_Amount': rng.uniform(10, 1000, n)})
+
+
+@pytest.mark.parametrize('kind', ['int', 'category', 'object'])
+def test_top_k_matches_pandas(kind):
+    """Top-k exact : mêmes entités et totaux que groupby().sum().nlargest()"""
+    df = _stream(20_000, 3_000)
+    if kind != 'int':
+        df['Product_ID'] = ('P' + df['Product_ID'].astype(str)).astype(kind)
+    expected = df.groupby('Product_ID', observed=True)['Sales_Amount'].sum().nlargest(25)
+    result = top_k(df['Product_ID'], df['Sales_Amount'], k=25)
+    assert [str(label) for label in result.labels] == [str(label) for label in expected.index]
+    np.testing.assert_allclose(result.values, expected.to_numpy())
+    assert result.total == pytest.approx(df['Sales_Amount'].sum())
+    assert result.n_entities == df['Product_ID'].nunique()
+    assert result.exact
+
+
+def test_missing_keys_are_ignored():
+    keys = pd.Series(['a', None, 'b', 'a', None])
+    result = top_k(keys, [1.0, 5.0, 2.0, 3.0, 7.0], k=5)
+    assert list(result.labels) == ['a', 'b']
+    assert result.total == 6.0
+
+
+@pytest.mark.parametrize('share', [0.5, 0.8, 0.99, 1.0])
+def test_cutoff_rank(share):
+    """Rang Pareto : plus petit nombre d'entités dont le cumul atteint `share` du total (tri complet)"""
+    values = _stream(50_000, 5_000).groupby('Product_ID')['Sales_Amount'].sum().to_numpy()
+    cumulative = np.cumsum(np.sort(values)[::-1])
+    expected = int(np.argmax(cumulative >= share * values.sum() * (1 - 1e-12))) + 1
+    assert _cutoff_rank(values, share) == expected
+    assert _cutoff_rank(np.array([]), share) == 0
+    assert _cutoff_rank(np.zeros(3), share) == 0
+
+
+def test_frame_others_row():
+    """Ligne « Autres » : reste du total hors top-k ; cumul terminé à 100 %"""
+    df = _stream(20_000, 3_000)
+    result = top_k(df['Product_ID'], df['Sales_Amount'], k=10)
+    frame = result.frame('Product_ID')
+    assert len(frame) == 11
+    assert frame['Product_ID'].iloc[-1] == OTHERS_LABEL
+    totals = df.groupby('Product_ID')['Sales_Amount'].sum()
+    assert frame['Sales_Amount'].iloc[-1] == pytest.approx(totals.sum() - totals.nlargest(10).sum())
+    assert frame['Cumulative_Pct'].iloc[-1] == pytest.approx(100.0)
+    assert frame['Cumulative_Pct'].is_monotonic_increasing
+
+    # Toutes les entités dans le top : pas de ligne « Autres »
+    everything = top_k(df['Product_ID'], df['Sales_Amount'], k=5_000).frame('Product_ID')
+    assert OTHERS_LABEL not in everything['Product_ID'].tolist()
+    assert everything['Cumulative_Pct'].iloc[-1] == pytest.approx(100.0)
+
+
+def test_space_saving_bound():
+    """Space-Saving sur un flux asymétrique : total réel encadré par [compteur - erreur, compteur]"""
+    df = _stream()
+    truth = df.groupby('Product_ID')['Sales_Amount'].sum()
+    summary = SpaceSaving(capacity=500)
+    for start in range(0, len(df), 10_000):
+        chunk = df.iloc[start:start + 10_000]
+        summary.update(chunk['Product_ID'].to_numpy(), chunk['Sales_Amount'].to_numpy())
+    assert len(summary.counts) == 500
+    assert summary.floor > 0
+    assert summary.total == pytest.approx(truth.sum())
+
+    true_counts = truth[summary.counts.index]
+    assert (true_counts <= summary.counts * (1 + 1e-12)).all()
+    assert (summary.counts - summary.errors <= true_counts * (1 + 1e-12)).all()
+    assert (summary.errors <= summary.floor).all()
+    # Les entités absentes du résumé ont un total d'au plus `floor`
+    assert truth.drop(summary.counts.index).max() <= summary.floor
+
+    # Sur ce flux, les premières entités sont retrouvées dans l'ordre exact
+    result = summary.top(20)
+    assert not result.exact
+    assert list(result.labels) == list(truth.nlargest(20).index)
+    assert ((result.values - result.errors <= truth[result.labels].to_numpy() * (1 + 1e-12)) &
+            (truth[result.labels].to_numpy() <= result.values * (1 + 1e-12))).all()
+
+
+def test_space_saving_without_eviction_is_exact():
+    df = _stream(20_000, 300)
+    result = heavy_hitters([df.iloc[:7_000], df.iloc[7_000:]], 'Product_ID', 'Sales_Amount', capacity=1_000, k=10)
+    expected = top_k(df['Product_ID'], df['Sales_Amount'], k=10)
+    assert result.exact
+    assert list(result.labels) == list(expected.labels)
+    np.testing.assert_allclose(result.values, expected.values)
+    assert result.cutoff_rank == expected.cutoff_rank
+
+
+def test_top_k_view_switches_to_summary():
+    """Au-delà de `exact_max_rows`, la sélection est parcourue par blocs (résultat approché)"""
+    df = _stream(50_000, 5_000)
+    rows = np.flatnonzero(df['Sales_Amount'].to_numpy() > 100)
+    view = FilteredView(df, rows)
+    exact = top_k_view(view, 'Product_ID', k=10)
+    approx = top_k_view(view, 'Product_ID', k=10, exact_max_rows=1_000)
+    assert exact.exact and not approx.exact
+    assert list(approx.labels[:5]) == list(exact.labels[:5])
+    assert approx.total == pytest.approx(exact.total)